@@ -0,0 +1,3 @@
+"""
+Benchmarks package - Đo hiệu năng các thành phần của FocusGuard
+"""
@@ -0,0 +1,113 @@
+"""
+Đo độ trễ xác thực và bộ nhớ của từng thuật toán KDF trên máy hiện tại
+Dùng để chọn thuật toán/tham số cho từng máy triển khai
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.kdf_benchmark [--target-ms 250] [--rounds 5] [--json out.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import kdf
+
+def _measure(name: str, params: Dict[str, int], rounds: int, queue):
+    """Chạy trong process con để đo RSS đỉnh riêng cho từng bộ tham số"""
+    backend = kdf.get_backend(name)
+    password = b"focusguard-benchmark"
+    
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    start = time.perf_counter()
+    payload = backend.hash(password, params)
+    hash_ms = (time.perf_counter() - start) * 1000
+    
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        backend.verify(password, params, payload)
+        samples.append((time.perf_counter() - start) * 1000)
+    
+    rss_after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    samples.sort()
+    queue.put({
+        "kdf": name,
+        "params": params,
+        "hash_ms": round(hash_ms, 2),
+        "verify_median_ms": round(statistics.median(samples), 2),
+        "verify_max_ms": round(samples[-1], 2),
+        "peak_rss_delta_kb": max(0, rss_after_kb - rss_before_kb),
+        "estimated_memory_kb": backend.estimated_memory(params) // 1024,
+    })
+
+def parameter_grid(backend: kdf.KdfBackend, target_ms: float) -> List[Dict[str, int]]:
+    """Bộ tham số cần đo: mặc định, đã hiệu chỉnh và hai bậc lân cận"""
+    calibrated = backend.calibrate(target_ms)
+    grid = [backend.default_params(), calibrated]
+    
+    if backend.name == "bcrypt":
+        grid += [{"cost": calibrated["cost"] - 1}, {"cost": calibrated["cost"] + 1}]
+    elif backend.name == "scrypt":
+        grid += [dict(calibrated, n=calibrated["n"] // 2)]
+        if calibrated["n"] * 2 <= 2 ** backend.max_log_n:
+            grid.append(dict(calibrated, n=calibrated["n"] * 2))
+    else:
+        grid += [{"i": calibrated["i"] // 2}, {"i": calibrated["i"] * 2}]
+    
+    unique = []
+    for params in grid:
+        if params not in unique:
+            unique.append(params)
+    return unique
+
+def run(target_ms: float, rounds: int) -> List[Dict]:
+    """Đo tất cả thuật toán có sẵn"""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in kdf.available_backends():
+        for params in parameter_grid(backend, target_ms):
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(backend.name, params, rounds, queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+    return results
+
+def print_table(results: List[Dict], target_ms: float):
+    """In bảng kết quả"""
+    print(f"{'KDF':<15} {'Tham số':<24} {'Hash':>9} {'Verify':>9} {'Max':>9} {'RSS+':>9} {'Mem lý thuyết':>14}")
+    for row in results:
+        params = ",".join(f"{k}={v}" for k, v in sorted(row["params"].items()))
+        marker = " *" if row["verify_median_ms"] <= target_ms else ""
+        print(
+            f"{row['kdf']:<15} {params:<24} {row['hash_ms']:>7.1f}ms {row['verify_median_ms']:>7.1f}ms "
+            f"{row['verify_max_ms']:>7.1f}ms {row['peak_rss_delta_kb']:>7}KB {row['estimated_memory_kb']:>12}KB{marker}"
+        )
+    print(f"\n* = xác thực trong ngưỡng {target_ms:.0f} ms")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark các thuật toán mã hóa mật khẩu")
+    parser.add_argument("--target-ms", type=float, default=250, help="Độ trễ xác thực mong muốn (ms)")
+    parser.add_argument("--rounds", type=int, default=5, help="Số lần xác thực cho mỗi bộ tham số")
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args(argv)
+    
+    results = run(args.target_ms, args.rounds)
+    print_table(results, args.target_ms)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"target_ms": args.target_ms, "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
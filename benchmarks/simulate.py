@@ -0,0 +1,166 @@
+"""
+Chế độ mô phỏng: chạy trọn vòng đời phiên (chặn hosts file tạm, hết giờ, dừng sớm bằng mật khẩu,
+bị khóa vì nhập sai) trên đồng hồ ảo, nhanh hơn thời gian thật hàng nghìn lần
+
+Chạy từ thư mục gốc dự án (HOME tạm, không đụng tới /etc/hosts):
+    python -m benchmarks.simulate [--sessions 2000] [--stop-ratio 0.2] [--seed 0] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.suite import BASE_HOSTS
+from benchmarks.synthetic import make_domains
+
+PASSWORD = "focusguard-simulation"
+
+class Simulation:
+    """Engine thật (hosts file tạm, không sudo) chạy trên SimulatedClock trong work_dir"""
+    
+    def __init__(self, work_dir: Path, stop_ratio: float = 0.2, wrong_ratio: float = 0.3, seed: int = 0):
+        from src.core.clock import SimulatedClock
+        from src.core.config_manager import ConfigManager
+        from src.core.focus_engine import FocusEngine
+        from src.core.password_manager import PasswordManager
+        from src.core.session_manager import SessionManager
+        from src.core.website_blocker import WebsiteBlocker
+        
+        self.stop_ratio = stop_ratio
+        self.wrong_ratio = wrong_ratio
+        self.rng = random.Random(seed)
+        self.clock = SimulatedClock()
+        
+        hosts_path = work_dir / "hosts"
+        hosts_path.write_text(BASE_HOSTS)
+        self.blocker = WebsiteBlocker(work_dir / "hosts.backup", hosts_path, use_sudo=False)
+        
+        self.config_manager = ConfigManager()
+        self.config_manager.set("strict_mode", True)
+        self.password_manager = PasswordManager(clock=self.clock)
+        # Mô phỏng cần hàng nghìn lần xác thực: tham số KDF rẻ thay vì ~250 ms mỗi lần
+        self.password_manager.target_verify_ms = 2
+        self.password_manager.set_password(PASSWORD)
+        self.session_manager = SessionManager(self.config_manager.get_data_dir(), self.clock)
+        self.engine = FocusEngine(self.config_manager, self.password_manager, self.session_manager,
+                                  self.blocker, self.clock)
+        
+        self.websites = make_domains(12)
+        self.sessions = 0
+        self.counts = {"completed": 0, "stopped": 0, "wrong_password": 0, "lockouts": 0}
+    
+    def run_session(self):
+        """Một phiên trọn vẹn: chặn, hết giờ hoặc dừng sớm (có thể nhập sai, bị khóa), rồi nghỉ"""
+        from src.core.engine_protocol import EngineError
+        
+        rng, clock, engine = self.rng, self.clock, self.engine
+        index = self.sessions
+        duration = rng.choice((15, 25, 25, 25, 45, 50))
+        engine.start_session(duration, self.websites)
+        if not self.blocker.is_blocking_active():
+            raise RuntimeError(f"Phiên {index}: hosts file không có khối chặn")
+        
+        if rng.random() < self.stop_ratio:
+            clock.advance(rng.uniform(60, duration * 60 - 60))
+            while rng.random() < self.wrong_ratio:
+                try:
+                    engine.stop_session("sai-mat-khau")
+                except EngineError as e:
+                    self.counts["wrong_password"] += 1
+                    if e.code == "locked_out" or self.password_manager.is_locked_out():
+                        self.counts["lockouts"] += 1
+                        # Chờ hết thời gian khóa (phiên có thể tự kết thúc trong lúc đó)
+                        clock.advance_to(self.password_manager.get_lockout_until() + 1)
+                        engine.poll()
+                        break
+            if engine.is_active():
+                engine.stop_session(PASSWORD)
+                self.counts["stopped"] += 1
+            else:
+                self.counts["completed"] += 1
+        else:
+            clock.advance_to(engine.deadline)
+            engine.poll()
+            self.counts["completed"] += 1
+        
+        if engine.is_active() or self.blocker.is_blocking_active():
+            raise RuntimeError(f"Phiên {index}: chưa kết thúc hoặc còn khối chặn")
+        self.sessions += 1
+        
+        # Nghỉ giữa các phiên, sang ngày mới sau khoảng 8 phiên
+        clock.advance(rng.choice((300, 300, 600, 900)) if index % 8 != 7 else 14 * 3600)
+    
+    def verify_database(self):
+        """Database phải khớp với những gì đã mô phỏng"""
+        recent = self.session_manager.get_recent_sessions(limit=self.sessions)
+        completed_in_db = sum(1 for session in recent if session['completed'])
+        if len(recent) != self.sessions or completed_in_db != self.counts["completed"]:
+            raise RuntimeError(f"Database không khớp: {len(recent)} phiên, {completed_in_db} hoàn thành, "
+                               f"mô phỏng {self.sessions} phiên, {self.counts['completed']} hoàn thành")
+
+def simulate(work_dir: Path, sessions: int, stop_ratio: float = 0.2, wrong_ratio: float = 0.3,
+             seed: int = 0) -> Dict:
+    """Chạy `sessions` phiên qua FocusEngine với SimulatedClock; kiểm tra hosts file và database sau mỗi phiên"""
+    simulation = Simulation(work_dir, stop_ratio, wrong_ratio, seed)
+    simulated_start = simulation.clock.time()
+    wall_start = time.perf_counter()
+    
+    for _ in range(sessions):
+        simulation.run_session()
+    
+    wall_seconds = time.perf_counter() - wall_start
+    simulated_seconds = simulation.clock.time() - simulated_start
+    simulation.config_manager.flush()
+    simulation.verify_database()
+    
+    return dict(
+        simulation.counts,
+        sessions=sessions,
+        wall_seconds=round(wall_seconds, 3),
+        simulated_hours=round(simulated_seconds / 3600, 1),
+        speedup=round(simulated_seconds / max(wall_seconds, 1e-9)),
+        sessions_per_second=round(sessions / max(wall_seconds, 1e-9), 1),
+    )
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mô phỏng nhiều phiên tập trung trên đồng hồ ảo")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--stop-ratio", type=float, default=0.2, help="Tỉ lệ phiên bị dừng sớm bằng mật khẩu")
+    parser.add_argument("--wrong-ratio", type=float, default=0.3, help="Xác suất nhập sai mỗi lần thử dừng")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args(argv)
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="focusguard-sim-"))
+    old_home = os.environ.get("HOME")
+    os.environ["HOME"] = str(work_dir)
+    try:
+        result = simulate(work_dir, args.sessions, args.stop_ratio, args.wrong_ratio, args.seed)
+    except RuntimeError as e:
+        print(f"Mô phỏng thất bại: {e}")
+        return 1
+    finally:
+        if old_home is not None:
+            os.environ["HOME"] = old_home
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"{result['sessions']} phiên ({result['simulated_hours']} giờ mô phỏng) trong {result['wall_seconds']} s: "
+          f"nhanh hơn thời gian thật x{result['speedup']}, {result['sessions_per_second']} phiên/s")
+    print(f"  hoàn thành {result['completed']}, dừng sớm {result['stopped']}, "
+          f"nhập sai {result['wrong_password']}, bị khóa {result['lockouts']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
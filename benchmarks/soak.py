@@ -0,0 +1,242 @@
+"""
+Soak test bộ nhớ: chạy hàng nghìn phiên mô phỏng, làm mới thống kê/lịch sử và mở dialog mật khẩu
+trên Qt offscreen như app nằm ở khay hệ thống nhiều tuần; chụp tracemalloc và đọc RSS định kỳ,
+báo các vị trí cấp phát tăng nhiều nhất và thất bại nếu bộ nhớ ở trạng thái ổn định vẫn tăng
+
+Chạy từ thư mục gốc dự án (HOME tạm, không đụng tới /etc/hosts):
+    python -m benchmarks.soak [--sessions 3000] [--interval 250] [--max-growth-kb 1024] [--no-gui]
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.simulate import Simulation
+
+# Bỏ qua cấp phát của chính tracemalloc và bộ import
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+def read_rss_kb() -> Optional[int]:
+    """VmRSS của process (kB) từ /proc/self/status, None nếu không có (không phải Linux)"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+class GuiRefresher:
+    """Cửa sổ chính thật trên Qt offscreen, làm mới như sau mỗi phiên trong app"""
+    
+    def __init__(self, simulation: Simulation):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtCore import QEvent, QTimer
+        from PyQt5.QtWidgets import QApplication
+        from src.core.startup import StartupTasks
+        from src.gui.main_window import MainWindow
+        from src.gui.password_dialog import PasswordDialog
+        
+        self.QApplication = QApplication
+        self.QEvent = QEvent
+        self.QTimer = QTimer
+        self.PasswordDialog = PasswordDialog
+        self.simulation = simulation
+        self.app = QApplication.instance() or QApplication([sys.argv[0]])
+        
+        # Kết quả khởi động lấy từ các đối tượng của mô phỏng
+        session_manager = simulation.session_manager
+        self.startup = StartupTasks(max_workers=1)
+        self.startup.submit("session_manager", lambda: session_manager)
+        self.startup.submit("today_stats", session_manager.get_today_stats)
+        self.startup.submit("week_stats", session_manager.get_week_stats)
+        self.startup.submit("unfinished_session", simulation.engine.find_unfinished_session)
+        
+        self.window = MainWindow(simulation.config_manager, simulation.password_manager,
+                                 simulation.engine, self.startup)
+        self.window.resize(900, 700)
+        self.window.show()
+        self._settle()
+        # Phiên do mô phỏng điều khiển; không để cửa sổ tự đồng bộ và chạy FocusTimer trên đồng hồ ảo
+        self.window.engine_sync_timer.stop()
+    
+    def _settle(self):
+        """Xử lý event đang chờ, gồm cả các widget đã deleteLater"""
+        self.window.tasks.wait_for_done(5000)
+        self.app.processEvents()
+        self.app.sendPostedEvents(None, self.QEvent.DeferredDelete)
+    
+    def _dismiss_dialog(self):
+        dialog = self.QApplication.activeModalWidget()
+        if dialog is not None:
+            dialog.reject()
+    
+    def refresh(self):
+        """Thống kê + biểu đồ, lịch sử, một dialog mật khẩu được mở rồi hủy"""
+        session_manager = self.simulation.session_manager
+        self.window.show_stats((session_manager.get_today_stats(), session_manager.get_week_stats(),
+                                session_manager.get_app_usage_summary()))
+        self.window.update_history_display()
+        self.QTimer.singleShot(0, self._dismiss_dialog)
+        self.PasswordDialog.ask(self.simulation.password_manager, "Soak test", self.window)
+        self._settle()
+    
+    def close(self):
+        self.simulation.config_manager.remove_listener(self.window.config_listener)
+        self.window.tasks.cancel_all()
+        self.window.tasks.wait_for_done(5000)
+        # Không có khay hệ thống (offscreen) thì cửa sổ không tạo tray_icon
+        tray = getattr(self.window, "tray_icon", None)
+        if tray is not None:
+            tray.hide()
+        self.window.deleteLater()
+        self.app.sendPostedEvents(None, self.QEvent.DeferredDelete)
+        self.startup.shutdown()
+
+def _snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+def soak(work_dir: Path, sessions: int, interval: int, gui: bool, warmup: float = 0.2,
+         top: int = 10, seed: int = 0) -> Dict:
+    """Chạy soak test; mốc so sánh là ảnh chụp sau giai đoạn khởi động (warmup × sessions)"""
+    simulation = Simulation(work_dir, seed=seed)
+    refresher = GuiRefresher(simulation) if gui else None
+    
+    tracemalloc.start()
+    warmup_sessions = max(interval, int(sessions * warmup) // interval * interval)
+    samples: List[Dict] = []
+    baseline = None
+    wall_start = time.perf_counter()
+    try:
+        for index in range(1, sessions + 1):
+            simulation.run_session()
+            if refresher is not None:
+                refresher.refresh()
+            if index % interval and index != sessions:
+                continue
+            
+            snapshot = _snapshot()
+            traced = sum(stat.size for stat in snapshot.statistics("filename"))
+            samples.append({"session": index, "rss_kb": read_rss_kb(), "traced_kb": traced // 1024})
+            if index == warmup_sessions:
+                baseline = snapshot
+    finally:
+        tracemalloc.stop()
+        if refresher is not None:
+            # Lỗi khi dọn giao diện không được che kết quả (hay lỗi) của soak test
+            try:
+                refresher.close()
+            except Exception as e:
+                print(f"Lỗi khi đóng cửa sổ soak test: {e!r}", file=sys.stderr)
+    simulation.verify_database()
+    
+    if baseline is None or len(samples) < 2:
+        raise RuntimeError("Quá ít phiên để so sánh: tăng --sessions hoặc giảm --interval")
+    
+    # Tăng trưởng ở trạng thái ổn định: từ mốc sau khởi động tới ảnh chụp cuối
+    start = next(sample for sample in samples if sample["session"] == warmup_sessions)
+    end = samples[-1]
+    growth = [stat for stat in snapshot.compare_to(baseline, "lineno") if stat.size_diff > 0][:top]
+    rss_growth = None
+    if start["rss_kb"] is not None and end["rss_kb"] is not None:
+        rss_growth = end["rss_kb"] - start["rss_kb"]
+    
+    return {
+        "sessions": sessions,
+        "gui": gui,
+        "wall_seconds": round(time.perf_counter() - wall_start, 1),
+        "warmup_sessions": warmup_sessions,
+        "samples": samples,
+        "traced_growth_kb": end["traced_kb"] - start["traced_kb"],
+        "rss_growth_kb": rss_growth,
+        "top_growth": [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in growth
+        ],
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Soak test bộ nhớ với phiên mô phỏng và Qt offscreen")
+    parser.add_argument("--sessions", type=int, default=3000)
+    parser.add_argument("--interval", type=int, default=250, help="Chụp tracemalloc/RSS sau mỗi N phiên")
+    parser.add_argument("--warmup", type=float, default=0.2, help="Phần phiên đầu bỏ qua khi tính tăng trưởng")
+    parser.add_argument("--max-growth-kb", type=int, default=1024,
+                        help="Ngưỡng tăng bộ nhớ Python (tracemalloc) sau khởi động")
+    parser.add_argument("--max-rss-growth-kb", type=int, default=16384, help="Ngưỡng tăng RSS sau khởi động")
+    parser.add_argument("--top", type=int, default=10, help="Số vị trí cấp phát tăng nhiều nhất cần in")
+    parser.add_argument("--no-gui", action="store_true", help="Chỉ engine và SQLite (không cần PyQt5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args(argv)
+    
+    gui = not args.no_gui
+    if gui:
+        try:
+            import PyQt5  # noqa: F401
+        except ImportError:
+            print("Thiếu PyQt5: chạy với --no-gui hoặc cài python3-pyqt5")
+            return 2
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="focusguard-soak-"))
+    old_home = os.environ.get("HOME")
+    os.environ["HOME"] = str(work_dir)
+    try:
+        result = soak(work_dir, args.sessions, args.interval, gui, args.warmup, args.top, args.seed)
+    except RuntimeError as e:
+        print(f"Soak test thất bại: {e}")
+        return 1
+    finally:
+        if old_home is not None:
+            os.environ["HOME"] = old_home
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"{result['sessions']} phiên{' + làm mới giao diện' if gui else ''} trong {result['wall_seconds']} s")
+    print(f"{'phiên':>8} {'RSS (MB)':>10} {'traced (MB)':>12}")
+    for sample in result["samples"]:
+        rss = f"{sample['rss_kb'] / 1024:.1f}" if sample["rss_kb"] is not None else "-"
+        print(f"{sample['session']:>8} {rss:>10} {sample['traced_kb'] / 1024:>12.2f}")
+    
+    print(f"\nTăng sau phiên {result['warmup_sessions']}: traced {result['traced_growth_kb']} kB"
+          + (f", RSS {result['rss_growth_kb']} kB" if result["rss_growth_kb"] is not None else ""))
+    if result["top_growth"]:
+        print("Vị trí cấp phát tăng nhiều nhất:")
+        for site in result["top_growth"]:
+            print(f"  {site['size_diff_kb']:>+9.1f} kB {site['count_diff']:>+7} khối  {site['site']}")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    
+    failed = []
+    if result["traced_growth_kb"] > args.max_growth_kb:
+        failed.append(f"traced tăng {result['traced_growth_kb']} kB > {args.max_growth_kb} kB")
+    if result["rss_growth_kb"] is not None and result["rss_growth_kb"] > args.max_rss_growth_kb:
+        failed.append(f"RSS tăng {result['rss_growth_kb']} kB > {args.max_rss_growth_kb} kB")
+    if failed:
+        print("\nRò rỉ bộ nhớ: " + "; ".join(failed))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Bộ benchmark tái lập được cho FocusGuard
+Đo tạo/xóa khối chặn trong hosts file, truy vấn SQLite trên lịch sử giả, vẽ biểu đồ,
+xác thực mật khẩu và thời gian khởi động tới lần vẽ đầu tiên; so sánh với baseline đã lưu
+
+Chạy từ thư mục gốc dự án (không cần display, không đụng tới /etc/hosts hay HOME thật):
+    python -m benchmarks.suite [--quick] [--only hosts,sessions] [--json out.json]
+                               [--baseline benchmarks/baseline.json] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+HOSTS_SIZES = (10, 1000, 100000, 1000000)
+SESSION_SIZES = (1000, 100000, 1000000)
+QUICK_HOSTS_SIZES = (10, 1000, 10000)
+QUICK_SESSION_SIZES = (1000, 10000)
+
+SECTIONS = ("hosts", "sessions", "chart", "kdf", "startup")
+
+# Nội dung /etc/hosts điển hình trước khi chặn
+BASE_HOSTS = """127.0.0.1\tlocalhost
+127.0.1.1\tworkstation
+
+# The following lines are desirable for IPv6 capable hosts
+::1     ip6-localhost ip6-loopback
+fe00::0 ip6-localnet
+ff00::0 ip6-mcastprefix
+ff02::1 ip6-allnodes
+ff02::2 ip6-allrouters
+"""
+
+def measure(func: Callable[[], object], min_rounds: int = 3, max_rounds: int = 50,
+            min_time: float = 0.2) -> Dict[str, float]:
+    """Chạy func nhiều lần (ít nhất min_rounds, tới khi đủ min_time giây); thời gian tính bằng ms"""
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_rounds and (len(samples) < min_rounds or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+        "rounds": len(samples),
+    }
+
+# === CÁC NHÓM BENCHMARK ===
+
+def bench_hosts(work_dir: Path, sizes) -> Dict[str, Dict]:
+    """Tạo nội dung khối chặn, thay khối đã biên dịch sẵn, xóa khối chặn và đọc lại danh sách từ hosts file tạm"""
+    from benchmarks.synthetic import make_domains
+    from src.core.website_blocker import WebsiteBlocker
+    
+    hosts_path = work_dir / "hosts"
+    blocker = WebsiteBlocker(work_dir / "hosts.backup", hosts_path)
+    results = {}
+    for size in sizes:
+        websites = make_domains(size)
+        blocked = blocker.build_block_content(BASE_HOSTS, websites)
+        hosts_path.write_text(blocked)
+        
+        results[f"hosts.build[n={size}]"] = measure(lambda: blocker.build_block_content(BASE_HOSTS, websites))
+        region = blocker.build_region(websites)
+        results[f"hosts.swap[n={size}]"] = measure(lambda: blocker.swap_region(blocked, region))
+        results[f"hosts.remove[n={size}]"] = measure(lambda: blocker._remove_existing_blocks(blocked))
+        results[f"hosts.read[n={size}]"] = measure(blocker.get_blocked_websites_from_hosts)
+    return results
+
+def bench_sessions(work_dir: Path, sizes) -> Dict[str, Dict]:
+    """Từng truy vấn của SessionManager trên DB có sẵn `size` phiên"""
+    from benchmarks.synthetic import make_domains, populate_sessions
+    from src.core.session_manager import SessionManager
+    
+    results = {}
+    for size in sizes:
+        data_dir = work_dir / f"sessions-{size}"
+        data_dir.mkdir()
+        SessionManager(data_dir)
+        populate_sessions(data_dir / "sessions.db", size)
+        manager = SessionManager(data_dir)
+        
+        def start_and_end():
+            session_id = manager.start_session(25, make_domains(12))
+            manager.end_session(session_id, completed=True)
+        
+        results[f"sessions.get_current_session[n={size}]"] = measure(manager.get_current_session)
+        results[f"sessions.get_today_stats[n={size}]"] = measure(manager.get_today_stats)
+        results[f"sessions.get_week_stats[n={size}]"] = measure(manager.get_week_stats)
+        results[f"sessions.get_recent_sessions[n={size}]"] = measure(manager.get_recent_sessions)
+        results[f"sessions.start_end[n={size}]"] = measure(start_and_end)
+        shutil.rmtree(data_dir)
+    return results
+
+def bench_chart(work_dir: Path) -> Dict[str, Dict]:
+    """StatisticsWidget.update_chart với dữ liệu 7 ngày (Qt offscreen)"""
+    from PyQt5.QtWidgets import QApplication
+    from benchmarks.synthetic import populate_sessions
+    from src.core.session_manager import SessionManager
+    from src.gui.statistics_widget import StatisticsWidget
+    
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    data_dir = work_dir / "chart"
+    data_dir.mkdir()
+    SessionManager(data_dir)
+    populate_sessions(data_dir / "sessions.db", 100)
+    manager = SessionManager(data_dir)
+    
+    widget = StatisticsWidget(manager, auto_refresh=False)
+    widget.resize(800, 600)
+    week_stats = manager.get_week_stats()
+    result = {"chart.update_chart": measure(lambda: widget.update_chart(week_stats), min_rounds=5)}
+    widget.deleteLater()
+    app.processEvents()
+    return result
+
+def bench_kdf() -> Dict[str, Dict]:
+    """Xác thực mật khẩu với tham số mặc định của từng KDF có sẵn (gồm bcrypt nếu đã cài)"""
+    from src.core import kdf
+    
+    password = b"focusguard-benchmark"
+    results = {}
+    for backend in kdf.available_backends():
+        params = backend.default_params()
+        payload = backend.hash(password, params)
+        results[f"kdf.verify[{backend.name}]"] = measure(
+            lambda: backend.verify(password, params, payload), min_rounds=3, max_rounds=10
+        )
+    return results
+
+def bench_startup(work_dir: Path, rounds: int = 3) -> Dict[str, Dict]:
+    """Khởi động nguội tới lần vẽ đầu tiên (main.py --profile-startup trong process riêng)"""
+    from src.core.password_manager import PasswordManager
+    
+    # Chế độ đo khởi động không hiện dialog tạo mật khẩu
+    PasswordManager().set_password("focusguard-benchmark")
+    
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    samples = []
+    for _ in range(rounds):
+        completed = subprocess.run(
+            [sys.executable, str(ROOT_DIR / "main.py"), "--profile-startup"],
+            capture_output=True, text=True, env=env, cwd=str(work_dir), timeout=120
+        )
+        match = re.search(r"^\s*([\d.]+) ms\s+first_paint$", completed.stdout, re.MULTILINE)
+        if match is None:
+            # Dòng cuối thường là lỗi (thiếu PyQt5, FocusGuard đang chạy...)
+            output = (completed.stdout + completed.stderr).strip().splitlines()
+            raise RuntimeError(
+                f"Không đo được lần vẽ đầu tiên (mã thoát {completed.returncode}): {output[-1] if output else ''}"
+            )
+        samples.append(float(match.group(1)))
+    
+    samples.sort()
+    return {"startup.first_paint": {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+        "rounds": len(samples),
+    }}
+
+def run(sections: List[str], quick: bool) -> Dict[str, Dict]:
+    """Chạy các nhóm benchmark trong HOME tạm; nhóm thiếu thư viện được ghi là bị bỏ qua"""
+    work_dir = Path(tempfile.mkdtemp(prefix="focusguard-bench-"))
+    old_home = os.environ.get("HOME")
+    os.environ["HOME"] = str(work_dir)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    
+    runners = {
+        "hosts": lambda: bench_hosts(work_dir, QUICK_HOSTS_SIZES if quick else HOSTS_SIZES),
+        "sessions": lambda: bench_sessions(work_dir, QUICK_SESSION_SIZES if quick else SESSION_SIZES),
+        "chart": lambda: bench_chart(work_dir),
+        "kdf": bench_kdf,
+        "startup": lambda: bench_startup(work_dir, 1 if quick else 3),
+    }
+    results: Dict[str, Dict] = {}
+    try:
+        for section in sections:
+            print(f"[{section}]", flush=True)
+            try:
+                section_results = runners[section]()
+            except ImportError as e:
+                results[section] = {"skipped": f"thiếu thư viện: {e.name}"}
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                results[section] = {"skipped": str(e)}
+            if section in results:
+                print(f"  bỏ qua: {results[section]['skipped']}", flush=True)
+                continue
+            for name, result in section_results.items():
+                print(f"  {name:<48} {result['median_ms']:>12.3f} ms  ({result['rounds']} lần)", flush=True)
+            results.update(section_results)
+    finally:
+        if old_home is not None:
+            os.environ["HOME"] = old_home
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float,
+            min_delta_ms: float) -> List[str]:
+    """Danh sách benchmark chậm hơn baseline quá threshold (và quá min_delta_ms để bỏ qua nhiễu)"""
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if "median_ms" not in result or not base or "median_ms" not in base:
+            continue
+        current, previous = result["median_ms"], base["median_ms"]
+        ratio = current / previous if previous > 0 else float("inf")
+        marker = ""
+        if current > previous * (1 + threshold) and current - previous >= min_delta_ms:
+            regressions.append(name)
+            marker = "  <-- CHẬM HƠN"
+        print(f"  {name:<48} {previous:>12.3f} -> {current:>12.3f} ms  x{ratio:.2f}{marker}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark các đường nóng của FocusGuard")
+    parser.add_argument("--quick", action="store_true", help="Kích thước nhỏ (cho CI)")
+    parser.add_argument("--only", help=f"Chỉ chạy các nhóm (phân cách bởi dấu phẩy): {','.join(SECTIONS)}")
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="File baseline để so sánh")
+    parser.add_argument("--update-baseline", action="store_true", help="Ghi kết quả làm baseline mới")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Tỉ lệ chậm hơn bị coi là hồi quy")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Bỏ qua chênh lệch nhỏ hơn (ms)")
+    args = parser.parse_args(argv)
+    
+    sections = args.only.split(",") if args.only else list(SECTIONS)
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        parser.error(f"nhóm không tồn tại: {', '.join(unknown)}")
+    
+    results = run(sections, args.quick)
+    document = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+    
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        print(f"Đã ghi baseline: {baseline_path}")
+        return 0
+    
+    if not baseline_path.exists():
+        print(f"Chưa có baseline ({baseline_path}), bỏ qua so sánh")
+        return 0
+    
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get("results", {})
+    print(f"\nSo sánh với baseline {baseline_path} (ngưỡng +{args.threshold * 100:.0f}%):")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark chậm hơn baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
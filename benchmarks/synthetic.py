@@ -0,0 +1,137 @@
+"""
+Sinh lịch sử phiên giả nhưng sát thực tế cho benchmark và soak test
+Ngày thường nhiều phiên hơn cuối tuần, phiên nối tiếp nhau trong giờ làm việc, phiên dài dễ bị dừng sớm hơn;
+ghi bằng executemany theo từng lô lớn trong một transaction
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.synthetic --data-dir /tmp/fg-history --sessions 1000000 [--seed 0]
+"""
+
+import argparse
+import json
+import math
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Số phiên trung bình mỗi ngày (thứ Hai..Chủ nhật)
+SESSIONS_PER_DAY = (6.0, 6.5, 6.5, 6.0, 5.0, 2.0, 1.5)
+# (thời lượng dự kiến (phút), trọng số, xác suất hoàn thành)
+DURATIONS = ((15, 10, 0.92), (25, 55, 0.88), (45, 15, 0.78), (50, 12, 0.75), (90, 8, 0.6))
+BATCH_SIZE = 100000
+
+def make_domains(count: int) -> List[str]:
+    """count domain khác nhau, xen lẫn domain có sẵn tiền tố www."""
+    return [f"www.site{i}.example.com" if i % 10 == 0 else f"site{i}.example.com" for i in range(count)]
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Thuật toán Knuth, đủ nhanh với mean nhỏ
+    limit = math.exp(-mean)
+    count, product = 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+def _daily_counts(rng: random.Random, count: int, last_day: datetime) -> List[Tuple[datetime, int]]:
+    """Số phiên của từng ngày, lùi dần từ last_day cho tới khi đủ count (trả về theo thứ tự thời gian)"""
+    days = []
+    total = 0
+    day = last_day
+    while total < count:
+        sessions = min(_poisson(rng, SESSIONS_PER_DAY[day.weekday()]), count - total)
+        days.append((day, sessions))
+        total += sessions
+        day -= timedelta(days=1)
+    days.reverse()
+    return days
+
+def generate_sessions(count: int, seed: int = 0, now: datetime = None) -> Iterator[tuple]:
+    """Các dòng cho bảng sessions theo thứ tự thời gian, phiên cuối cùng kết thúc trước `now`"""
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    durations = [d[0] for d in DURATIONS]
+    weights = [d[1] for d in DURATIONS]
+    completion = {d[0]: d[2] for d in DURATIONS}
+    website_lists = [json.dumps(make_domains(size)) for size in (6, 12, 24)]
+    
+    # Ngày cuối là hôm qua để không đè lên phiên thật của hôm nay
+    last_day = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    for day, sessions in _daily_counts(rng, count, last_day):
+        # Bắt đầu buổi làm việc quanh 8h30, phiên nối tiếp nhau với khoảng nghỉ ngắn
+        start = day + timedelta(minutes=max(0.0, rng.gauss(510, 45)))
+        for _ in range(sessions):
+            planned = rng.choices(durations, weights)[0]
+            completed = rng.random() < completion[planned]
+            actual = planned if completed else rng.randint(1, planned - 1)
+            end = start + timedelta(minutes=actual, seconds=rng.randint(0, 59))
+            notes = "Hoàn thành đầy đủ" if completed else "Dừng sớm bởi người dùng"
+            yield (start, end, planned, actual, completed, not completed, rng.choice(website_lists), notes)
+            start = end + timedelta(minutes=rng.choice((5, 5, 5, 10, 15, 30, 60)))
+
+def populate_sessions(db_path: Path, count: int, seed: int = 0, now: datetime = None,
+                      batch_size: int = BATCH_SIZE) -> int:
+    """Thêm count phiên đã kết thúc và thống kê hàng ngày tương ứng; trả về số ngày được phủ
+    
+    Bảng phải đã được tạo (SessionManager(data_dir) gọi init_database).
+    """
+    daily: Dict[str, List[int]] = {}
+    rows = generate_sessions(count, seed, now)
+    
+    with sqlite3.connect(db_path) as conn:
+        # Dữ liệu giả: ưu tiên tốc độ ghi hơn độ bền khi mất điện
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        while True:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                stats = daily.setdefault(row[0].date().isoformat(), [0, 0, 0])
+                stats[0] += row[3]
+                stats[1 if row[4] else 2] += 1
+                if len(batch) >= batch_size:
+                    break
+            if not batch:
+                break
+            conn.executemany('''
+            INSERT INTO sessions (start_time, end_time, planned_duration, actual_duration,
+                                  completed, interrupted, websites_blocked, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+            conn.commit()
+        
+        conn.executemany('''
+        INSERT OR REPLACE INTO daily_stats (date, total_focus_time, sessions_completed, sessions_interrupted)
+        VALUES (?, ?, ?, ?)
+        ''', ((date, *stats) for date, stats in daily.items()))
+        conn.commit()
+    return len(daily)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sinh lịch sử phiên giả vào sessions.db")
+    parser.add_argument("--data-dir", required=True, help="Thư mục chứa sessions.db (không dùng thư mục thật)")
+    parser.add_argument("--sessions", type=int, default=100000, help="Số phiên cần sinh")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    from src.core.session_manager import SessionManager
+    
+    data_dir = Path(args.data_dir).expanduser()
+    data_dir.mkdir(parents=True, exist_ok=True)
+    SessionManager(data_dir)
+    
+    start = time.perf_counter()
+    days = populate_sessions(data_dir / "sessions.db", args.sessions, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Đã sinh {args.sessions} phiên trên {days} ngày trong {elapsed:.1f} s "
+          f"({args.sessions / max(elapsed, 1e-9):.0f} phiên/s) vào {data_dir / 'sessions.db'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,116 +4,82 @@ FocusGuard - Ứng dụng quản lý sự tập trung cho Ubuntu/Linux
 Chặn trang web xao nhãng trong thời gian tập trung
 """
 
+import logging
 import sys
 import os
-import signal
-import psutil
-from PyQt5.QtWidgets import QApplication, QMainWindow, QSystemTrayIcon
-from PyQt5.QtCore import QTimer, pyqtSignal
-from PyQt5.QtGui import QIcon
 
 # Thêm thư mục src vào path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.gui.main_window import MainWindow
-from src.core.config_manager import ConfigManager
-from src.core.password_manager import PasswordManager
+from src.core.logs import default_log_dir, pipeline
+from src.core.profiler import parse_profile_args, profiler
+from src.core.single_instance import SingleInstance
+from src.core.startup import start_background_init
 
-class FocusGuardApp(QApplication):
-    """Ứng dụng chính FocusGuard"""
-    
-    def __init__(self, argv):
-        super().__init__(argv)
-        
-        # Thiết lập ứng dụng
-        self.setQuitOnLastWindowClosed(False)
-        self.setApplicationName("FocusGuard")
-        self.setApplicationVersion("1.0.0")
-        
-        # Khởi tạo các thành phần
-        self.config_manager = ConfigManager()
-        self.password_manager = PasswordManager()
-        self.main_window = None
-        
-        # Kiểm tra instance duy nhất
-        self.check_single_instance()
-        
-        # Thiết lập signal handlers
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
-        
-    def check_single_instance(self):
-        """Đảm bảo chỉ có một instance của app đang chạy"""
-        app_name = "focusguard"
-        current_pid = os.getpid()
-        
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if (proc.info['name'] == 'python3' and 
-                    proc.info['pid'] != current_pid and
-                    any(app_name in str(cmd) for cmd in proc.info['cmdline'] or [])):
-                    print("FocusGuard đã đang chạy!")
-                    sys.exit(1)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-    
-    def signal_handler(self, signum, frame):
-        """Xử lý signal để thoát ứng dụng một cách an toàn"""
-        print(f"Nhận signal {signum}, đang thoát...")
-        self.quit()
-    
-    def initialize(self):
-        """Khởi tạo ứng dụng"""
-        print("Initializing FocusGuard...")
-        
-        # Kiểm tra xem có cần setup không
-        if not self.password_manager.has_password():
-            print("Password not set, showing setup dialog...")
-            from src.gui.setup_dialog import SetupDialog
-            setup_dialog = SetupDialog()
-            setup_dialog.show()
-            setup_dialog.raise_()
-            setup_dialog.activateWindow()
-            if setup_dialog.exec_() != setup_dialog.Accepted:
-                print("Setup dialog cancelled")
-                return False
-            print("Setup completed successfully")
-        
-        # Tạo cửa sổ chính
-        print("Creating main window...")
-        self.main_window = MainWindow(self.config_manager, self.password_manager)
-        self.main_window.show()
-        self.main_window.raise_()
-        self.main_window.activateWindow()
-        print("Main window created and shown")
-        
-        return True
+logger = logging.getLogger(__name__)
 
 def main():
     """Hàm main của ứng dụng"""
-    print("Starting FocusGuard application...")
-    print(f"Display: {os.environ.get('DISPLAY', 'Not set')}")
-    print(f"QT Platform: {os.environ.get('QT_QPA_PLATFORM', 'Not set')}")
+    # Lệnh CLI (start/stop/status/daemon) không cần tới giao diện
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+        from src.cli import main as cli_main
+        return cli_main(sys.argv[1:])
     
-    app = FocusGuardApp(sys.argv)
-    print("Application created successfully")
-
-    # Always clean up leftover blocks at startup
-    try:
-        from src.core.website_blocker import WebsiteBlocker
-        blocker = WebsiteBlocker(app.config_manager.get_backup_hosts_path())
-        if blocker.is_blocking_active():
-            print("Cleaning up leftover website blocks from previous session...")
-            blocker.remove_block_entries()
-    except Exception as e:
-        print(f"Error cleaning up hosts file: {e}")
+    # Đo thời gian khởi động (--profile-startup)
+    original_argv = list(sys.argv)
+    profile_options = parse_profile_args(sys.argv)
+    if profile_options.enabled:
+        if profile_options.imports:
+            profiler.reexec_with_importtime(original_argv)
+        profiler.enable(profile_options)
+    
+    # Kiểm tra instance duy nhất trước khi import PyQt5 (chỉ một lần bind socket)
+    instance = SingleInstance("gui")
+    with profiler.span("single_instance"):
+        acquired = instance.acquire()
+    if not acquired:
+        reply = instance.forward("show")
+        if reply is not None and reply.get("ok"):
+            print("FocusGuard đã đang chạy, đã hiển thị cửa sổ hiện có")
+            return 0
+        print("FocusGuard đã đang chạy!")
+        return 1
+    
+    # Log đi qua hàng đợi tới thread ghi file; mức log lấy từ cấu hình khi đã đọc xong
+    pipeline.start(default_log_dir())
+    logger.info("Starting FocusGuard application...")
+    logger.info("Display: %s", os.environ.get('DISPLAY', 'Not set'))
+    logger.info("QT Platform: %s", os.environ.get('QT_QPA_PLATFORM', 'Not set'))
+    
+    # Các bước I/O chạy song song với việc import PyQt5 và dựng giao diện
+    with profiler.span("start_background_init"):
+        startup = start_background_init()
+    
+    with profiler.span("import_gui"):
+        from src.gui.app import FocusGuardApp
+    
+    with profiler.span("app_init"):
+        app = FocusGuardApp(sys.argv, startup)
+    instance.listen(app.receive_instance_command)
+    logger.info("Application created successfully")
 
-    if not app.initialize():
-        print("Failed to initialize application")
+    with profiler.span("initialize"):
+        initialized = app.initialize()
+    if not initialized:
+        logger.error("Failed to initialize application")
         return 1
 
-    print("Application initialized, starting event loop...")
-    return app.exec_()
+    logger.info("Application initialized, starting event loop...")
+    profiler.mark("event_loop")
+    exit_code = app.exec_()
+    
+    if profiler.enabled:
+        # Báo cáo in xong mới dừng engine như khi thoát bình thường (gỡ chặn, ghi cấu hình)
+        exit_code = profiler.finish()
+        if "engine_start" in startup:
+            startup.result("engine_start")
+        app.engine.shutdown(notes="Thoát ứng dụng")
+    return exit_code
 
 if __name__ == "__main__":
     sys.exit(main())
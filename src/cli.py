@@ -0,0 +1,252 @@
+"""
+Giao diện dòng lệnh của FocusGuard
+Điều khiển phiên qua engine (daemon hoặc GUI đang chạy), không import PyQt5
+"""
+
+import getpass
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from src.core.config_model import DEFAULT_PROFILE, websites_version
+from src.core.engine_client import EngineClient
+from src.core.engine_protocol import EngineError
+from src.core.session_plan import PHASE_LABELS
+
+COMMANDS = ("start", "stop", "pause", "resume", "next", "status", "profiles", "quotas", "allow", "block", "lists",
+            "daemon")
+
+USAGE = """Cách dùng: focusguard <lệnh>
+
+  start [PHÚT] [CHU_KỲ] [-p HỒ_SƠ]
+                          Bắt đầu phiên tập trung; CHU_KỲ > 1 xen kẽ các lần nghỉ (mặc định theo cấu hình),
+                          HỒ_SƠ: hồ sơ chặn (mặc định: danh sách website chính)
+  stop                    Dừng phiên đang chạy (chế độ nghiêm khắc sẽ hỏi mật khẩu)
+  pause                   Tạm dừng phiên; thời gian tạm dừng không tính vào thời gian tập trung
+  resume                  Tiếp tục phiên đang tạm dừng
+  next                    Bắt đầu lần nghỉ đang chờ (khi auto_start_break tắt)
+  status                  Xem trạng thái phiên hiện tại
+  profiles                Liệt kê các hồ sơ chặn
+  quotas                  Xem hạn mức hôm nay của các website có hạn mức
+  allow WEBSITE           Mở website có hạn mức; thời gian mở trừ vào hạn mức hôm nay
+  block WEBSITE           Chặn lại website có hạn mức đang mở
+  lists [--update]        Xem các danh sách chặn theo dõi; --update: tải lại tất cả ngay
+  daemon                  Chạy engine không giao diện
+"""
+
+def _format_seconds(seconds: int) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def print_quotas(status: dict, only_open: bool = False):
+    """In hạn mức hôm nay (only_open: chỉ các website đang mở)"""
+    for quota in status.get("quotas", []):
+        if only_open and not quota["open"]:
+            continue
+        state = "đang mở" if quota["open"] else ("hết hạn mức" if quota["remaining_seconds"] <= 0 else "bị chặn")
+        print(f"{quota['website']:<24} còn {_format_seconds(quota['remaining_seconds'])}"
+              f" / {quota['minutes']} phút  ({state})")
+
+def print_status(status: dict):
+    """In trạng thái phiên"""
+    print_quotas(status, only_open=True)
+    if status.get("scheduled_websites"):
+        until = datetime.fromtimestamp(status["scheduled_until"]).strftime("%H:%M")
+        print(f"Lịch chặn: đang chặn {len(status['scheduled_websites'])} website tới {until}")
+    if not status["active"]:
+        print("Không có phiên tập trung nào đang chạy")
+        return
+    
+    phase = PHASE_LABELS.get(status['phase_kind'], "")
+    if status['phase_count'] > 1:
+        phase = f"{phase}, pha {status['phase_index'] + 1}/{status['phase_count']}"
+    if status['profile'] and status['profile'] != DEFAULT_PROFILE:
+        phase = f"{phase}, hồ sơ {status['profile']}"
+    if status['waiting']:
+        print(f"Phiên #{status['session_id']}: chờ bắt đầu {phase} ({status['planned_duration']} phút),"
+              " chạy `focusguard next`")
+    elif status['paused']:
+        print(f"Phiên #{status['session_id']} ({phase}): tạm dừng, còn {_format_seconds(status['remaining_seconds'])}"
+              f" / {status['planned_duration']} phút, chạy `focusguard resume`")
+    else:
+        print(f"Phiên #{status['session_id']} ({phase}): còn {_format_seconds(status['remaining_seconds'])}"
+              f" / {status['planned_duration']} phút")
+    if status["blocking"]:
+        print(f"Đang chặn {len(status['websites'])} website")
+        if status.get("subscribed_domains"):
+            print(f"Cùng {status['subscribed_domains']} tên miền từ các danh sách theo dõi")
+    elif status["blocking_error"]:
+        print(f"Không chặn website: {status['blocking_error']}")
+    if status.get("app_blocking"):
+        print(f"Đang chặn ứng dụng ({status['app_blocking']}), đã chặn {status['app_hits']} lần")
+    if status["strict_mode"]:
+        print("Chế độ nghiêm khắc: bật")
+
+def spawn_daemon(client: EngineClient, timeout: float = 5.0) -> bool:
+    """Chạy daemon ở nền và chờ nó sẵn sàng nhận lệnh"""
+    main_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    subprocess.Popen(
+        [sys.executable, main_script, "daemon"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.is_running():
+            return True
+        time.sleep(0.05)
+    return False
+
+def cmd_start(client: EngineClient, args: List[str]) -> int:
+    duration = None
+    cycles = None
+    profile = None
+    if "-p" in args:
+        index = args.index("-p")
+        if index + 1 >= len(args):
+            print("Thiếu tên hồ sơ sau -p")
+            return 2
+        profile = args[index + 1]
+        args = args[:index] + args[index + 2:]
+    if args:
+        try:
+            duration = int(args[0])
+        except ValueError:
+            print(f"Thời lượng không hợp lệ: {args[0]}")
+            return 2
+    if len(args) > 1:
+        try:
+            cycles = int(args[1])
+        except ValueError:
+            print(f"Số chu kỳ không hợp lệ: {args[1]}")
+            return 2
+    
+    if not client.is_running() and not spawn_daemon(client):
+        print("Không thể khởi động FocusGuard daemon")
+        return 1
+    
+    if duration is None:
+        from src.core.config_manager import ConfigManager
+        duration = ConfigManager().get_focus_duration()
+    
+    print_status(client.start_session(duration, cycles=cycles, profile=profile))
+    return 0
+
+def _with_password(call):
+    """Gọi lệnh, hỏi mật khẩu và gọi lại nếu chế độ nghiêm khắc yêu cầu"""
+    try:
+        return call()
+    except EngineError as e:
+        if e.code != "password_required":
+            raise
+        return call(password=getpass.getpass("Mật khẩu: "))
+
+def cmd_stop(client: EngineClient, args: List[str]) -> int:
+    _with_password(client.stop_session)
+    print("Phiên tập trung đã được dừng.")
+    return 0
+
+def cmd_pause(client: EngineClient, args: List[str]) -> int:
+    print_status(_with_password(client.pause_session))
+    return 0
+
+def cmd_resume(client: EngineClient, args: List[str]) -> int:
+    print_status(client.unpause_session())
+    return 0
+
+def cmd_next(client: EngineClient, args: List[str]) -> int:
+    print_status(client.continue_plan())
+    return 0
+
+def cmd_profiles(client: EngineClient, args: List[str]) -> int:
+    from src.core.config_manager import ConfigManager
+    settings = ConfigManager().settings
+    print(f"{DEFAULT_PROFILE:<20} {len(settings.blocked_websites):>4} website  {websites_version(settings.blocked_websites)}")
+    for profile in settings.profiles:
+        print(f"{profile.name:<20} {len(profile.websites):>4} website  {profile.version}")
+    return 0
+
+def cmd_quotas(client: EngineClient, args: List[str]) -> int:
+    status = client.status()
+    if not status.get("quotas"):
+        print("Không có website nào có hạn mức")
+    print_quotas(status)
+    return 0
+
+def cmd_allow(client: EngineClient, args: List[str]) -> int:
+    if not args:
+        print("Thiếu tên website")
+        return 2
+    print_quotas(client.open_site(args[0]), only_open=True)
+    return 0
+
+def cmd_block(client: EngineClient, args: List[str]) -> int:
+    if not args:
+        print("Thiếu tên website")
+        return 2
+    print_quotas(client.close_site(args[0]))
+    return 0
+
+def cmd_lists(client: EngineClient, args: List[str]) -> int:
+    from src.core.config_manager import ConfigManager
+    from src.core.session_manager import SessionManager
+    config_manager = ConfigManager()
+    subscriptions = config_manager.settings.subscriptions
+    if not subscriptions:
+        print("Không có danh sách chặn theo dõi nào")
+        return 0
+    errors = {}
+    if "--update" in args:
+        errors = client.refresh_subscriptions(force=True).get("subscription_errors", {})
+        print("Đang tải lại các danh sách trong nền")
+    session_manager = SessionManager(config_manager.get_data_dir())
+    for subscription in subscriptions:
+        state = session_manager.get_subscription(subscription.url)
+        if state is None or state['checked_at'] is None:
+            detail = "chưa tải"
+        else:
+            updated = state['updated_at'].strftime("%d/%m %H:%M") if state['updated_at'] else "-"
+            detail = (f"{state['domains']} tên miền, đổi lúc {updated},"
+                      f" kiểm tra lúc {state['checked_at'].strftime('%d/%m %H:%M')}")
+        if subscription.url in errors:
+            detail = f"{detail} ({errors[subscription.url]})"
+        print(f"{subscription.url}\n    {detail}, mỗi {subscription.refresh_hours} giờ")
+    return 0
+
+def cmd_status(client: EngineClient, args: List[str]) -> int:
+    try:
+        print_status(client.status())
+    except EngineError as e:
+        if e.code != "not_running":
+            raise
+        print("FocusGuard engine không chạy")
+    return 0
+
+def main(argv: List[str]) -> int:
+    """Chạy một lệnh CLI, trả về exit code"""
+    if not argv or argv[0] not in COMMANDS:
+        print(USAGE)
+        return 2
+    
+    command, args = argv[0], argv[1:]
+    if command == "daemon":
+        from src.core.engine_server import run_daemon
+        return run_daemon()
+    
+    client = EngineClient()
+    handlers = {"start": cmd_start, "stop": cmd_stop, "pause": cmd_pause, "resume": cmd_resume,
+                "next": cmd_next, "status": cmd_status, "profiles": cmd_profiles, "quotas": cmd_quotas,
+                "allow": cmd_allow, "block": cmd_block, "lists": cmd_lists}
+    try:
+        return handlers[command](client, args)
+    except EngineError as e:
+        print(f"Lỗi: {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 130
@@ -0,0 +1,68 @@
+"""
+Đồng hồ có thể thay thế cho FocusGuard
+Mặc định dùng thời gian thật; chế độ mô phỏng dùng đồng hồ ảo để chạy cả ngày phiên trong vài giây
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+class Clock:
+    """Nguồn thời gian thật của hệ thống"""
+    # False: không có thời gian thật trôi, bên gọi phải tự tiến đồng hồ (không hẹn threading.Timer)
+    realtime = True
+    
+    def time(self) -> float:
+        """Thời điểm hiện tại (epoch giây)"""
+        return time.time()
+    
+    def monotonic(self) -> float:
+        """Đồng hồ đơn điệu (giây) để đo khoảng thời gian"""
+        return time.monotonic()
+    
+    def now(self) -> datetime:
+        """Thời điểm hiện tại theo giờ địa phương"""
+        return datetime.now()
+    
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class SimulatedClock(Clock):
+    """Đồng hồ ảo: chỉ tiến khi gọi advance() hoặc sleep() (sleep trả về ngay)"""
+    realtime = False
+    
+    def __init__(self, start: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._now = time.time() if start is None else float(start)
+        self._monotonic = 0.0
+    
+    def time(self) -> float:
+        return self._now
+    
+    def monotonic(self) -> float:
+        return self._monotonic
+    
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self._now)
+    
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+    
+    def advance(self, seconds: float):
+        """Tiến đồng hồ thêm `seconds` giây"""
+        if seconds < 0:
+            raise ValueError("Không thể lùi đồng hồ")
+        with self._lock:
+            self._now += seconds
+            self._monotonic += seconds
+    
+    def advance_to(self, timestamp: float):
+        """Tiến đồng hồ tới thời điểm `timestamp` (bỏ qua nếu đã qua)"""
+        with self._lock:
+            delta = max(0.0, timestamp - self._now)
+            self._now += delta
+            self._monotonic += delta
+
+# Đồng hồ mặc định của process
+SYSTEM_CLOCK = Clock()
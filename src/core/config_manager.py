@@ -3,15 +3,25 @@ Quản lý cấu hình ứng dụng FocusGuard
 Lưu trữ và đọc cài đặt từ file JSON
 """
 
+import logging
 import os
+import copy
 import json
-from typing import Dict, List, Any
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Mapping, Optional, Set, Tuple
 from pathlib import Path
 
+from src.core.file_utils import atomic_write_text
+from src.core.config_model import AppConfig, ConfigError, DEFAULT_CONFIG
+
+logger = logging.getLogger(__name__)
+
 class ConfigManager:
     """Quản lý cấu hình ứng dụng"""
     
-    def __init__(self):
+    def __init__(self, save_delay: float = 1.0):
         # Đường dẫn thư mục cấu hình
         self.config_dir = Path.home() / ".config" / "focusguard"
         self.config_file = self.config_dir / "config.json"
@@ -20,74 +30,234 @@ class ConfigManager:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         # Cấu hình mặc định
-        self.default_config = {
-            "blocked_websites": [
-                "facebook.com",
-                "www.facebook.com",
-                "twitter.com",
-                "www.twitter.com",
-                "instagram.com",
-                "www.instagram.com",
-                "youtube.com",
-                "www.youtube.com",
-                "tiktok.com",
-                "www.tiktok.com",
-                "reddit.com",
-                "www.reddit.com"
-            ],
-            "default_focus_duration": 25,  # phút
-            "strict_mode": False,
-            "auto_start_break": True,
-            "break_duration": 5,  # phút
-            "notification_enabled": True,
-            "sound_enabled": True,
-            "theme": "light",
-            "window_position": {"x": 100, "y": 100},
-            "window_size": {"width": 800, "height": 600}
-        }
+        self.default_config = copy.deepcopy(DEFAULT_CONFIG)
+        
+        # Trạng thái ghi trễ (debounce) và gom nhóm thay đổi
+        self.save_delay = save_delay  # giây
+        self._lock = threading.RLock()
+        self._dirty_keys = set()
+        self._batch_depth = 0
+        self._save_timer = None
+        
+        # Chữ ký (inode, mtime, size) của file lần cuối đọc/ghi, dùng cho hot reload
+        self._file_signature: Optional[Tuple[int, int, int]] = None
+        # Nơi nhận tập key đổi khi file bị sửa từ bên ngoài; chỉ một bên đọc lại rồi báo cho tất cả
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self._watch_stop: Optional[threading.Event] = None
         
-        # Load cấu hình
-        self.config = self.load_config()
+        # Load cấu hình (parse một lần thành đối tượng có kiểu)
+        self.settings: AppConfig = self.load_config()
+        self._raw = self.settings.to_dict()
     
-    def load_config(self) -> Dict[str, Any]:
+    @property
+    def config(self) -> Mapping[str, Any]:
+        """Cấu hình dạng dict (chỉ đọc, giữ tương thích với code cũ)"""
+        return MappingProxyType(self._raw)
+    
+    def load_config(self) -> AppConfig:
         """Đọc cấu hình từ file"""
         try:
             if self.config_file.exists():
                 with open(self.config_file, 'r', encoding='utf-8') as f:
+                    self._file_signature = self._stat_signature()
                     config = json.load(f)
-                    # Merge với default config để đảm bảo có đủ keys
-                    merged_config = self.default_config.copy()
-                    merged_config.update(config)
-                    return merged_config
+                    return self._parse(config)
             else:
                 # Tạo file config mới với cấu hình mặc định
                 self.save_config(self.default_config)
-                return self.default_config.copy()
+                return AppConfig.default()
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Lỗi đọc file cấu hình: {e}")
-            return self.default_config.copy()
+            logger.error("Lỗi đọc file cấu hình: %s", e)
+            return AppConfig.default()
+    
+    def _parse(self, data: Any) -> AppConfig:
+        """Parse dữ liệu từ file, thay giá trị sai bằng mặc định"""
+        if not isinstance(data, dict):
+            logger.error("Lỗi file cấu hình: nội dung không phải object JSON, dùng mặc định")
+            return AppConfig.default()
+        
+        errors: List[ConfigError] = []
+        settings = AppConfig.from_dict(data, strict=False, errors=errors)
+        for error in errors:
+            logger.warning("Bỏ qua giá trị cấu hình không hợp lệ: %s", error)
+        return settings
     
     def save_config(self, config: Dict[str, Any] = None):
-        """Lưu cấu hình vào file"""
+        """Lưu cấu hình vào file (ghi nguyên tử, không để lại file dở dang)"""
+        try:
+            config_to_save = config if config is not None else self._raw
+            atomic_write_text(
+                self.config_file,
+                json.dumps(config_to_save, indent=2, ensure_ascii=False)
+            )
+            self._file_signature = self._stat_signature()
+        except (IOError, OSError) as e:
+            logger.error("Lỗi lưu file cấu hình: %s", e)
+    
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Lấy (inode, mtime_ns, size) của file cấu hình"""
         try:
-            config_to_save = config if config is not None else self.config
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_to_save, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            print(f"Lỗi lưu file cấu hình: {e}")
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def add_listener(self, callback: Callable[[Set[str]], None]):
+        """Đăng ký nhận tập key đã đổi khi file cấu hình bị sửa từ bên ngoài
+        
+        Callback chạy trên thread phát hiện thay đổi (thread theo dõi hoặc thread gọi reload_if_changed).
+        """
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[Set[str]], None]):
+        """Hủy đăng ký nhận thay đổi cấu hình"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def start_watching(self, interval: float = 2.0):
+        """Theo dõi file cấu hình trên thread nền (mỗi `interval` giây một lần stat)"""
+        with self._lock:
+            if self._watch_stop is not None:
+                return
+            stop = self._watch_stop = threading.Event()
+        
+        def watch():
+            while not stop.wait(interval):
+                self.reload_if_changed()
+        
+        threading.Thread(target=watch, name="config-watch", daemon=True).start()
+    
+    def stop_watching(self):
+        """Dừng thread theo dõi file cấu hình"""
+        with self._lock:
+            stop, self._watch_stop = self._watch_stop, None
+        if stop is not None:
+            stop.set()
+    
+    def reload_if_changed(self) -> Set[str]:
+        """Đọc lại cấu hình nếu file bị process khác sửa (chỉ tốn một lần stat)
+        
+        Trả về tập các key đã thay đổi (rỗng nếu không có gì mới); các listener nhận cùng tập này.
+        """
+        signature = self._stat_signature()
+        if signature is None or signature == self._file_signature:
+            return set()
+        
+        with self._lock:
+            # Thread khác có thể vừa đọc lại xong
+            signature = self._stat_signature()
+            if signature is None or signature == self._file_signature:
+                return set()
+            data = self._read_config_file()
+            self._file_signature = signature
+            if not data:
+                return set()
+            
+            settings = self._parse(data)
+            
+            # Các thay đổi chưa ghi của process này vẫn được ưu tiên
+            for key in self._dirty_keys:
+                settings = settings.with_value(key, self._raw[key])
+            
+            old_raw = self._raw
+            self.settings = settings
+            self._raw = settings.to_dict()
+            changed = {key for key in self._raw if old_raw.get(key) != self._raw[key]}
+            listeners = list(self._listeners) if changed else []
+        
+        for listener in listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.exception("Lỗi áp dụng cấu hình mới: %s", e)
+        return changed
     
     def get(self, key: str, default=None):
         """Lấy giá trị cấu hình"""
-        return self.config.get(key, default)
+        return self._raw.get(key, default)
     
     def set(self, key: str, value: Any):
-        """Đặt giá trị cấu hình"""
-        self.config[key] = value
-        self.save_config()
+        """Đặt giá trị cấu hình (lưu trễ, gom nhiều thay đổi thành một lần ghi)
+        
+        Ném ConfigError nếu giá trị không hợp lệ.
+        """
+        with self._lock:
+            # Chỉ parse và chuyển đổi key thay đổi, không dựng lại cả cấu hình
+            settings = self.settings.with_value(key, value)
+            raw_value = settings.raw_value(key)
+            if key in self._raw and self._raw[key] == raw_value:
+                return
+            
+            self.settings = settings
+            # Thay dict thay vì sửa tại chỗ: bản `config` đã đưa ra không đổi giữa chừng
+            self._raw = dict(self._raw, **{key: raw_value})
+            self._dirty_keys.add(key)
+            
+            if self._batch_depth == 0:
+                self._schedule_save()
+    
+    @contextmanager
+    def batch(self):
+        """Gom các thay đổi cấu hình trong khối `with` thành một lần ghi"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty_keys:
+                    self._schedule_save()
+    
+    def _schedule_save(self):
+        """Hẹn giờ lưu các key đã thay đổi (debounce)"""
+        if self.save_delay <= 0:
+            self.flush()
+            return
+        
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        
+        self._save_timer = threading.Timer(self.save_delay, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+    
+    def flush(self):
+        """Ghi ngay các key đã thay đổi xuống file (gọi khi thoát ứng dụng)"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            
+            if not self._dirty_keys:
+                return
+            
+            # Chỉ ghi đè các key đã thay đổi lên nội dung hiện có trên đĩa
+            config_to_save = self._read_config_file() or dict(self._raw)
+            for key in self._dirty_keys:
+                config_to_save[key] = self._raw[key]
+            
+            self._dirty_keys.clear()
+            self.save_config(config_to_save)
+    
+    def has_pending_changes(self) -> bool:
+        """Kiểm tra còn thay đổi chưa được ghi xuống file không"""
+        return bool(self._dirty_keys)
+    
+    def _read_config_file(self) -> Dict[str, Any]:
+        """Đọc nội dung file cấu hình hiện tại (rỗng nếu lỗi)"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except (json.JSONDecodeError, IOError, OSError):
+            return {}
     
     def get_blocked_websites(self) -> List[str]:
         """Lấy danh sách website bị chặn"""
-        return self.config.get("blocked_websites", [])
+        return list(self.settings.blocked_websites)
     
     def add_blocked_website(self, website: str):
         """Thêm website vào danh sách chặn"""
@@ -103,9 +273,13 @@ class ConfigManager:
             blocked_sites.remove(website)
             self.set("blocked_websites", blocked_sites)
     
+    def get_profile_names(self) -> List[str]:
+        """Tên các hồ sơ chặn (không gồm hồ sơ mặc định)"""
+        return [profile.name for profile in self.settings.profiles]
+    
     def get_focus_duration(self) -> int:
         """Lấy thời gian tập trung mặc định (phút)"""
-        return self.config.get("default_focus_duration", 25)
+        return self.settings.default_focus_duration
     
     def set_focus_duration(self, duration: int):
         """Đặt thời gian tập trung mặc định"""
@@ -113,7 +287,7 @@ class ConfigManager:
     
     def is_strict_mode(self) -> bool:
         """Kiểm tra có bật chế độ nghiêm khắc không"""
-        return self.config.get("strict_mode", False)
+        return self.settings.strict_mode
     
     def set_strict_mode(self, enabled: bool):
         """Bật/tắt chế độ nghiêm khắc"""
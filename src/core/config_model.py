@@ -0,0 +1,617 @@
+"""
+Mô hình cấu hình có kiểu cho FocusGuard
+Parse và kiểm tra hợp lệ một lần khi load, giá trị sai bị từ chối ngay tại biên
+"""
+
+import copy
+import dataclasses
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Cấu hình mặc định (định dạng lưu trong config.json)
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "blocked_websites": [
+        "facebook.com",
+        "www.facebook.com",
+        "twitter.com",
+        "www.twitter.com",
+        "instagram.com",
+        "www.instagram.com",
+        "youtube.com",
+        "www.youtube.com",
+        "tiktok.com",
+        "www.tiktok.com",
+        "reddit.com",
+        "www.reddit.com"
+    ],
+    # Ứng dụng bị chặn trong phiên (tên file thực thi, vd "discord", "steam"); app_block_action: kill / suspend
+    "blocked_apps": [],
+    "app_block_action": "kill",
+    "default_focus_duration": 25,  # phút
+    "strict_mode": False,
+    "auto_start_break": True,
+    "break_duration": 5,  # phút
+    "unblock_during_pause": False,  # bỏ chặn website khi phiên tạm dừng
+    "notification_enabled": True,
+    "sound_enabled": True,
+    "theme": "light",
+    "window_position": {"x": 100, "y": 100},
+    "window_size": {"width": 800, "height": 600},
+    "diagnostics": {"stall_watchdog": True, "stall_threshold_ms": 250, "log_level": "INFO"},
+    # http_port = 0: tắt endpoint; textfile rỗng: không ghi snapshot
+    "metrics": {"http_port": 0, "textfile": "", "textfile_interval": 15},
+    # Trang chặn HTTP trên 127.0.0.1 cho website bị chặn (cổng 80 cần quyền root)
+    "sinkhole": {"enabled": False, "port": 80, "flush_interval": 30},
+    # Lấy mẫu thời gian CPU của các ứng dụng trong phiên (interval: giây giữa hai lần mẫu)
+    "usage_sampling": {"enabled": True, "interval": 10},
+    # Chu kỳ Pomodoro: cycles = số pha tập trung mỗi phiên (1 = đếm ngược đơn), nghỉ ngắn dài break_duration
+    "pomodoro": {"cycles": 1, "long_break_duration": 15, "long_break_every": 4, "block_during_breaks": False},
+    # Lịch chặn tự động, vd {"name": "Giờ làm", "days": ["mon", "tue", "wed", "thu", "fri"],
+    # "start": "09:00", "end": "12:00", "websites": [], "enabled": true}; websites rỗng: dùng blocked_websites
+    "schedules": [],
+    # Hồ sơ chặn theo tên, chọn khi bắt đầu phiên, vd {"name": "deep work", "websites": ["youtube.com"]};
+    # hồ sơ "default" là blocked_websites
+    "profiles": [],
+    # Hạn mức mỗi ngày cho website được mở có giới hạn, vd {"website": "youtube.com", "minutes": 20};
+    # website có hạn mức bị chặn trừ lúc được mở, hết hạn mức thì chặn tới nửa đêm
+    "quotas": [],
+    # Danh sách chặn theo dõi từ URL (định dạng hosts hoặc mỗi dòng một tên miền), vd
+    # {"url": "https://example.org/hosts.txt", "refresh_hours": 24}; tên miền được chặn trong mọi phiên có chặn
+    "subscriptions": []
+}
+
+THEMES = ("light", "dark")
+APP_ACTIONS = ("kill", "suspend")
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DEFAULT_PROFILE = "default"
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+class ConfigError(ValueError):
+    """Giá trị cấu hình không hợp lệ"""
+    
+    def __init__(self, key: str, message: str):
+        super().__init__(f"{key}: {message}")
+        self.key = key
+
+def websites_version(websites) -> str:
+    """Phiên bản của một danh sách website (hash nội dung, đổi khi danh sách hoặc thứ tự đổi)"""
+    return hashlib.sha256("\n".join(websites).encode("utf-8")).hexdigest()[:12]
+
+# === KIỂM TRA GIÁ TRỊ ===
+
+def _check_bool(key: str, value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise ConfigError(key, f"cần giá trị true/false, nhận {value!r}")
+    return value
+
+def _check_int(key: str, value: Any, minimum: int = None, maximum: int = None) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ConfigError(key, f"cần số nguyên, nhận {value!r}")
+    if minimum is not None and value < minimum:
+        raise ConfigError(key, f"phải >= {minimum}, nhận {value}")
+    if maximum is not None and value > maximum:
+        raise ConfigError(key, f"phải <= {maximum}, nhận {value}")
+    return value
+
+def _check_mapping(key: str, value: Any) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        raise ConfigError(key, f"cần object, nhận {value!r}")
+    return value
+
+def _check_websites(key: str, value: Any) -> Tuple[str, ...]:
+    if not isinstance(value, (list, tuple)):
+        raise ConfigError(key, f"cần danh sách, nhận {value!r}")
+    
+    websites = []
+    seen = set()
+    for item in value:
+        if not isinstance(item, str) or not item.strip() or any(c.isspace() for c in item.strip()):
+            raise ConfigError(key, f"tên website không hợp lệ: {item!r}")
+        website = item.strip().lower()
+        if website not in seen:
+            seen.add(website)
+            websites.append(website)
+    return tuple(websites)
+
+def _check_apps(key: str, value: Any) -> Tuple[str, ...]:
+    if not isinstance(value, (list, tuple)):
+        raise ConfigError(key, f"cần danh sách, nhận {value!r}")
+    
+    apps = []
+    for item in value:
+        if not isinstance(item, str) or not item.strip() or "/" in item:
+            raise ConfigError(key, f"tên ứng dụng không hợp lệ: {item!r}")
+        app = item.strip().lower()
+        if app not in apps:
+            apps.append(app)
+    return tuple(apps)
+
+def _check_app_action(key: str, value: Any) -> str:
+    if value not in APP_ACTIONS:
+        raise ConfigError(key, f"cách chặn ứng dụng phải là một trong {APP_ACTIONS}, nhận {value!r}")
+    return value
+
+def _check_str(key: str, value: Any) -> str:
+    if not isinstance(value, str):
+        raise ConfigError(key, f"cần chuỗi, nhận {value!r}")
+    return value
+
+def _check_theme(key: str, value: Any) -> str:
+    if value not in THEMES:
+        raise ConfigError(key, f"theme phải là một trong {THEMES}, nhận {value!r}")
+    return value
+
+def _check_clock_time(key: str, value: Any) -> int:
+    """"HH:MM" -> số phút từ nửa đêm ("24:00" là cuối ngày)"""
+    if isinstance(value, str) and len(value) == 5 and value[2] == ":" and (value[:2] + value[3:]).isdigit():
+        hours, minutes = int(value[:2]), int(value[3:])
+        if (hours < 24 and minutes < 60) or (hours == 24 and minutes == 0):
+            return hours * 60 + minutes
+    raise ConfigError(key, f"cần giờ dạng HH:MM, nhận {value!r}")
+
+def _check_weekdays(key: str, value: Any) -> Tuple[int, ...]:
+    """Danh sách tên ngày (mon..sun) -> tuple số thứ tự theo date.weekday()"""
+    if not isinstance(value, (list, tuple)) or not value:
+        raise ConfigError(key, f"cần danh sách ngày khác rỗng, nhận {value!r}")
+    days = set()
+    for item in value:
+        if not isinstance(item, str) or item.lower() not in WEEKDAYS:
+            raise ConfigError(key, f"ngày phải là một trong {WEEKDAYS}, nhận {item!r}")
+        days.add(WEEKDAYS.index(item.lower()))
+    return tuple(sorted(days))
+
+def _check_log_level(key: str, value: Any) -> str:
+    if not isinstance(value, str) or value.upper() not in LOG_LEVELS:
+        raise ConfigError(key, f"mức log phải là một trong {LOG_LEVELS}, nhận {value!r}")
+    return value.upper()
+
+# === CÁC SECTION LỒNG NHAU ===
+
+@dataclass(frozen=True)
+class WindowPosition:
+    """Vị trí cửa sổ"""
+    __slots__ = ("x", "y")
+    x: int
+    y: int
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "WindowPosition":
+        data = _check_mapping(key, data)
+        return cls(
+            x=_check_int(f"{key}.x", data.get("x")),
+            y=_check_int(f"{key}.y", data.get("y"))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"x": self.x, "y": self.y}
+
+@dataclass(frozen=True)
+class WindowSize:
+    """Kích thước cửa sổ"""
+    __slots__ = ("width", "height")
+    width: int
+    height: int
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "WindowSize":
+        data = _check_mapping(key, data)
+        return cls(
+            width=_check_int(f"{key}.width", data.get("width"), 1, 10000),
+            height=_check_int(f"{key}.height", data.get("height"), 1, 10000)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"width": self.width, "height": self.height}
+
+@dataclass(frozen=True)
+class Diagnostics:
+    """Cài đặt chẩn đoán hiệu năng"""
+    __slots__ = ("stall_watchdog", "stall_threshold_ms", "log_level")
+    stall_watchdog: bool
+    stall_threshold_ms: int
+    log_level: str
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Diagnostics":
+        data = _check_mapping(key, data)
+        return cls(
+            stall_watchdog=_check_bool(f"{key}.stall_watchdog", data.get("stall_watchdog")),
+            stall_threshold_ms=_check_int(f"{key}.stall_threshold_ms", data.get("stall_threshold_ms"), 50, 60000),
+            log_level=_check_log_level(f"{key}.log_level", data.get("log_level"))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stall_watchdog": self.stall_watchdog,
+            "stall_threshold_ms": self.stall_threshold_ms,
+            "log_level": self.log_level
+        }
+
+@dataclass(frozen=True)
+class Metrics:
+    """Cài đặt xuất metric (Prometheus)"""
+    __slots__ = ("http_port", "textfile", "textfile_interval")
+    http_port: int
+    textfile: str
+    textfile_interval: int
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Metrics":
+        data = _check_mapping(key, data)
+        return cls(
+            http_port=_check_int(f"{key}.http_port", data.get("http_port"), 0, 65535),
+            textfile=_check_str(f"{key}.textfile", data.get("textfile")).strip(),
+            textfile_interval=_check_int(f"{key}.textfile_interval", data.get("textfile_interval"), 1, 3600)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"http_port": self.http_port, "textfile": self.textfile, "textfile_interval": self.textfile_interval}
+
+@dataclass(frozen=True)
+class Sinkhole:
+    """Cài đặt trang chặn HTTP cho các website bị chặn"""
+    __slots__ = ("enabled", "port", "flush_interval")
+    enabled: bool
+    port: int
+    flush_interval: int  # giây giữa hai lần ghi lượt truy cập
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Sinkhole":
+        data = _check_mapping(key, data)
+        return cls(
+            enabled=_check_bool(f"{key}.enabled", data.get("enabled")),
+            port=_check_int(f"{key}.port", data.get("port"), 1, 65535),
+            flush_interval=_check_int(f"{key}.flush_interval", data.get("flush_interval"), 1, 3600)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "port": self.port, "flush_interval": self.flush_interval}
+
+@dataclass(frozen=True)
+class UsageSampling:
+    """Cài đặt lấy mẫu ứng dụng đang chạy trong phiên"""
+    __slots__ = ("enabled", "interval")
+    enabled: bool
+    interval: int  # giây
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "UsageSampling":
+        data = _check_mapping(key, data)
+        return cls(
+            enabled=_check_bool(f"{key}.enabled", data.get("enabled")),
+            interval=_check_int(f"{key}.interval", data.get("interval"), 1, 3600)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "interval": self.interval}
+
+@dataclass(frozen=True)
+class Pomodoro:
+    """Cài đặt chu kỳ làm việc/nghỉ"""
+    __slots__ = ("cycles", "long_break_duration", "long_break_every", "block_during_breaks")
+    cycles: int
+    long_break_duration: int
+    long_break_every: int
+    block_during_breaks: bool
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Pomodoro":
+        data = _check_mapping(key, data)
+        return cls(
+            cycles=_check_int(f"{key}.cycles", data.get("cycles"), 1, 24),
+            long_break_duration=_check_int(f"{key}.long_break_duration", data.get("long_break_duration"), 1, 999),
+            long_break_every=_check_int(f"{key}.long_break_every", data.get("long_break_every"), 1, 24),
+            block_during_breaks=_check_bool(f"{key}.block_during_breaks", data.get("block_during_breaks"))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cycles": self.cycles,
+            "long_break_duration": self.long_break_duration,
+            "long_break_every": self.long_break_every,
+            "block_during_breaks": self.block_during_breaks
+        }
+
+@dataclass(frozen=True)
+class ScheduleRule:
+    """Quy tắc chặn lặp lại theo ngày trong tuần; end <= start là khung qua nửa đêm"""
+    __slots__ = ("name", "days", "start", "end", "websites", "enabled")
+    name: str
+    days: Tuple[int, ...]  # 0 = thứ Hai
+    start: int  # phút từ nửa đêm
+    end: int  # phút từ nửa đêm
+    websites: Tuple[str, ...]  # rỗng: dùng blocked_websites
+    enabled: bool
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "ScheduleRule":
+        data = _check_mapping(key, data)
+        start = _check_clock_time(f"{key}.start", data.get("start"))
+        end = _check_clock_time(f"{key}.end", data.get("end"))
+        if start == 1440:
+            raise ConfigError(f"{key}.start", "giờ bắt đầu phải trước 24:00")
+        if start == end:
+            # Chặn cả ngày: dùng "00:00"-"24:00"
+            raise ConfigError(f"{key}.end", "giờ kết thúc phải khác giờ bắt đầu")
+        return cls(
+            name=_check_str(f"{key}.name", data.get("name", "")).strip(),
+            days=_check_weekdays(f"{key}.days", data.get("days")),
+            start=start,
+            end=end,
+            websites=_check_websites(f"{key}.websites", data.get("websites", [])),
+            enabled=_check_bool(f"{key}.enabled", data.get("enabled", True))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "days": [WEEKDAYS[day] for day in self.days],
+            "start": f"{self.start // 60:02d}:{self.start % 60:02d}",
+            "end": f"{self.end // 60:02d}:{self.end % 60:02d}",
+            "websites": list(self.websites),
+            "enabled": self.enabled
+        }
+
+def _check_schedules(key: str, value: Any) -> Tuple[ScheduleRule, ...]:
+    if not isinstance(value, (list, tuple)):
+        raise ConfigError(key, f"cần danh sách, nhận {value!r}")
+    return tuple(ScheduleRule.from_dict(f"{key}[{index}]", item) for index, item in enumerate(value))
+
+@dataclass(frozen=True)
+class Profile:
+    """Hồ sơ chặn: một danh sách website có tên"""
+    __slots__ = ("name", "websites")
+    name: str
+    websites: Tuple[str, ...]
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Profile":
+        data = _check_mapping(key, data)
+        name = _check_str(f"{key}.name", data.get("name")).strip()
+        if not name or name == DEFAULT_PROFILE:
+            raise ConfigError(f"{key}.name", f"tên hồ sơ phải khác rỗng và khác {DEFAULT_PROFILE!r}, nhận {name!r}")
+        return cls(name=name, websites=_check_websites(f"{key}.websites", data.get("websites")))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "websites": list(self.websites)}
+    
+    @property
+    def version(self) -> str:
+        return websites_version(self.websites)
+
+def _check_profiles(key: str, value: Any) -> Tuple[Profile, ...]:
+    if not isinstance(value, (list, tuple)):
+        raise ConfigError(key, f"cần danh sách, nhận {value!r}")
+    profiles = []
+    names = set()
+    for index, item in enumerate(value):
+        profile = Profile.from_dict(f"{key}[{index}]", item)
+        if profile.name in names:
+            raise ConfigError(f"{key}[{index}].name", f"trùng tên hồ sơ {profile.name!r}")
+        names.add(profile.name)
+        profiles.append(profile)
+    return tuple(profiles)
+
+@dataclass(frozen=True)
+class Quota:
+    """Hạn mức thời gian mở một website mỗi ngày"""
+    __slots__ = ("website", "minutes")
+    website: str
+    minutes: int
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Quota":
+        data = _check_mapping(key, data)
+        websites = _check_websites(f"{key}.website", [data.get("website")])
+        return cls(website=websites[0], minutes=_check_int(f"{key}.minutes", data.get("minutes"), 1, 1440))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"website": self.website, "minutes": self.minutes}
+
+def _check_quotas(key: str, value: Any) -> Tuple[Quota, ...]:
+    if not isinstance(value, (list, tuple)):
+        raise ConfigError(key, f"cần danh sách, nhận {value!r}")
+    quotas = []
+    websites = set()
+    for index, item in enumerate(value):
+        quota = Quota.from_dict(f"{key}[{index}]", item)
+        if quota.website in websites:
+            raise ConfigError(f"{key}[{index}].website", f"trùng hạn mức cho {quota.website!r}")
+        websites.add(quota.website)
+        quotas.append(quota)
+    return tuple(quotas)
+
+@dataclass(frozen=True)
+class Subscription:
+    """Một danh sách chặn theo dõi từ URL, tải lại mỗi refresh_hours giờ"""
+    __slots__ = ("url", "refresh_hours")
+    url: str
+    refresh_hours: int
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "Subscription":
+        data = _check_mapping(key, data)
+        url = _check_str(f"{key}.url", data.get("url")).strip()
+        if not url.startswith(("http://", "https://")) or any(c.isspace() for c in url):
+            raise ConfigError(f"{key}.url", f"cần URL http(s), nhận {url!r}")
+        return cls(url=url, refresh_hours=_check_int(f"{key}.refresh_hours", data.get("refresh_hours", 24), 1, 720))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"url": self.url, "refresh_hours": self.refresh_hours}
+
+def _check_subscriptions(key: str, value: Any) -> Tuple[Subscription, ...]:
+    if not isinstance(value, (list, tuple)):
+        raise ConfigError(key, f"cần danh sách, nhận {value!r}")
+    subscriptions = []
+    urls = set()
+    for index, item in enumerate(value):
+        subscription = Subscription.from_dict(f"{key}[{index}]", item)
+        if subscription.url in urls:
+            raise ConfigError(f"{key}[{index}].url", f"trùng danh sách {subscription.url!r}")
+        urls.add(subscription.url)
+        subscriptions.append(subscription)
+    return tuple(subscriptions)
+
+# Bộ parse cho từng key cấp cao nhất
+_FIELD_PARSERS: Dict[str, Callable[[str, Any], Any]] = {
+    "blocked_websites": _check_websites,
+    "blocked_apps": _check_apps,
+    "app_block_action": _check_app_action,
+    "default_focus_duration": lambda k, v: _check_int(k, v, 1, 999),
+    "strict_mode": _check_bool,
+    "auto_start_break": _check_bool,
+    "break_duration": lambda k, v: _check_int(k, v, 1, 999),
+    "unblock_during_pause": _check_bool,
+    "notification_enabled": _check_bool,
+    "sound_enabled": _check_bool,
+    "theme": _check_theme,
+    "window_position": WindowPosition.from_dict,
+    "window_size": WindowSize.from_dict,
+    "diagnostics": Diagnostics.from_dict,
+    "metrics": Metrics.from_dict,
+    "sinkhole": Sinkhole.from_dict,
+    "usage_sampling": UsageSampling.from_dict,
+    "pomodoro": Pomodoro.from_dict,
+    "schedules": _check_schedules,
+    "profiles": _check_profiles,
+    "quotas": _check_quotas,
+    "subscriptions": _check_subscriptions,
+}
+
+def _salvage(key: str, parser: Callable[[str, Any], Any], value: Any, error: ConfigError,
+             errors: Optional[List[ConfigError]]) -> Any:
+    """Giá trị thay thế cho key sai ở chế độ không nghiêm
+    
+    Danh sách chỉ bỏ các phần tử sai (một website gõ nhầm không được làm mất cả danh sách, vì lần ghi sau sẽ
+    ghi đè lên file); giá trị khác thay bằng mặc định.
+    """
+    if isinstance(value, (list, tuple)):
+        valid = []
+        dropped = []
+        for index, item in enumerate(value):
+            try:
+                parser(key, [item])
+                valid.append(item)
+            except ConfigError as e:
+                dropped.append(ConfigError(f"{key}[{index}]", f"bỏ phần tử không hợp lệ ({e})"))
+        try:
+            salvaged = parser(key, valid)
+        except ConfigError:
+            # Lỗi giữa các phần tử (vd trùng nhau): giữ phần tử đầu tiên, bỏ các phần tử sau gây lỗi
+            kept = []
+            for item in valid:
+                try:
+                    parser(key, kept + [item])
+                    kept.append(item)
+                except ConfigError as e:
+                    dropped.append(ConfigError(key, f"bỏ phần tử {item!r} ({e})"))
+            salvaged = parser(key, kept)
+        if errors is not None:
+            errors.extend(dropped)
+        return salvaged
+    
+    if errors is not None:
+        errors.append(error)
+    return parser(key, DEFAULT_CONFIG[key])
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge đệ quy: giữ các key mặc định lồng nhau còn thiếu trong override"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+@dataclass(frozen=True)
+class AppConfig:
+    """Cấu hình ứng dụng đã được kiểm tra hợp lệ (bất biến)"""
+    __slots__ = tuple(_FIELD_PARSERS) + ("extras",)
+    blocked_websites: Tuple[str, ...]
+    blocked_apps: Tuple[str, ...]
+    app_block_action: str
+    default_focus_duration: int
+    strict_mode: bool
+    auto_start_break: bool
+    break_duration: int
+    unblock_during_pause: bool
+    notification_enabled: bool
+    sound_enabled: bool
+    theme: str
+    window_position: WindowPosition
+    window_size: WindowSize
+    diagnostics: Diagnostics
+    metrics: Metrics
+    sinkhole: Sinkhole
+    usage_sampling: UsageSampling
+    pomodoro: Pomodoro
+    schedules: Tuple[ScheduleRule, ...]
+    profiles: Tuple[Profile, ...]
+    quotas: Tuple[Quota, ...]
+    subscriptions: Tuple[Subscription, ...]
+    extras: Dict[str, Any]  # Các key không biết, giữ nguyên khi ghi lại
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], strict: bool = True,
+                  errors: List[ConfigError] = None) -> "AppConfig":
+        """Parse dict (đã merge với mặc định) thành AppConfig
+        
+        strict=True: ném ConfigError với giá trị sai đầu tiên.
+        strict=False: thay giá trị sai bằng mặc định và ghi lỗi vào `errors`.
+        """
+        merged = deep_merge(DEFAULT_CONFIG, data)
+        values = {}
+        for key, parser in _FIELD_PARSERS.items():
+            try:
+                values[key] = parser(key, merged[key])
+            except ConfigError as e:
+                if strict:
+                    raise
+                values[key] = _salvage(key, parser, merged[key], e, errors)
+        
+        extras = {k: v for k, v in merged.items() if k not in _FIELD_PARSERS}
+        return cls(extras=extras, **values)
+    
+    @classmethod
+    def default(cls) -> "AppConfig":
+        return cls.from_dict({})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Chuyển về dạng dict để lưu JSON"""
+        data = copy.deepcopy(self.extras)
+        for key in _FIELD_PARSERS:
+            data[key] = self.raw_value(key)
+        return data
+    
+    def raw_value(self, key: str) -> Any:
+        """Giá trị của một key ở dạng lưu JSON"""
+        if key not in _FIELD_PARSERS:
+            return copy.deepcopy(self.extras.get(key))
+        value = getattr(self, key)
+        if hasattr(value, "to_dict"):
+            return value.to_dict()
+        if isinstance(value, tuple):
+            return [item.to_dict() if hasattr(item, "to_dict") else item for item in value]
+        return value
+    
+    def profile_websites(self, name: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Danh sách website của hồ sơ (None/"default": blocked_websites); None nếu không có hồ sơ này"""
+        if name is None or name == DEFAULT_PROFILE:
+            return self.blocked_websites
+        for profile in self.profiles:
+            if profile.name == name:
+                return profile.websites
+        return None
+    
+    def with_value(self, key: str, value: Any) -> "AppConfig":
+        """Tạo bản cấu hình mới với một key thay đổi (chỉ kiểm tra hợp lệ key này, các key khác dùng chung)"""
+        parser = _FIELD_PARSERS.get(key)
+        if parser is None:
+            extras = dict(self.extras)
+            extras[key] = copy.deepcopy(value)
+            return dataclasses.replace(self, extras=extras)
+        # Section thiếu key lồng nhau thì lấy mặc định, như khi load
+        value = deep_merge({key: DEFAULT_CONFIG[key]}, {key: value})[key]
+        return dataclasses.replace(self, **{key: parser(key, value)})
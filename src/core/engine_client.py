@@ -0,0 +1,109 @@
+"""
+Client của FocusEngine qua Unix socket
+Cùng giao diện với FocusEngine để GUI dùng được cả engine trong process lẫn daemon
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.engine_protocol import ENGINE_CHANNEL, EngineError
+from src.core.ipc import send_request
+
+class EngineClient:
+    """Proxy gọi FocusEngine ở process khác"""
+    
+    def __init__(self, timeout: float = 30.0):
+        # Timeout dài vì lệnh start/stop có thể chờ sudo
+        self.timeout = timeout
+    
+    def _call(self, command: str, **kwargs) -> Any:
+        reply = send_request(ENGINE_CHANNEL, dict(kwargs, command=command), self.timeout)
+        if reply is None:
+            raise EngineError("Không kết nối được tới FocusGuard engine", "not_running")
+        if not reply.get("ok"):
+            raise EngineError(reply.get("error") or "Lỗi không xác định", reply.get("code", "error"))
+        return reply.get("result")
+    
+    def is_running(self) -> bool:
+        """Kiểm tra engine có đang lắng nghe không"""
+        try:
+            self._call("ping")
+            return True
+        except EngineError:
+            return False
+    
+    def status(self) -> Dict[str, Any]:
+        return self._call("status")
+    
+    def has_sudo_access(self) -> bool:
+        return self._call("has_sudo")
+    
+    def start_session(self, duration: int, websites: Optional[List[str]] = None, block: bool = True,
+                      cycles: Optional[int] = None, profile: Optional[str] = None) -> Dict[str, Any]:
+        return self._call("start", duration=duration, websites=websites, block=block, cycles=cycles,
+                          profile=profile)
+    
+    def continue_plan(self) -> Dict[str, Any]:
+        return self._call("continue")
+    
+    def stop_session(self, password: Optional[str] = None, authorized: bool = False, **kwargs) -> Dict[str, Any]:
+        # Engine ở process khác luôn tự xác thực mật khẩu, bỏ qua `authorized`
+        return self._call("stop", password=password)
+    
+    def pause_session(self, password: Optional[str] = None, authorized: bool = False) -> Dict[str, Any]:
+        return self._call("pause", password=password)
+    
+    def unpause_session(self) -> Dict[str, Any]:
+        return self._call("unpause")
+    
+    def poll(self) -> Dict[str, Any]:
+        return self._call("poll")
+    
+    def find_unfinished_session(self) -> Optional[Dict[str, Any]]:
+        return self._call("find_unfinished")
+    
+    def resume_session(self, session_id: int) -> Dict[str, Any]:
+        return self._call("resume", session_id=session_id)
+    
+    def discard_session(self, session_id: int) -> Dict[str, Any]:
+        return self._call("discard", session_id=session_id)
+    
+    def refresh_schedules(self):
+        return self._call("refresh_schedules")
+    
+    def refresh_quotas(self):
+        return self._call("refresh_quotas")
+    
+    def open_site(self, website: str) -> Dict[str, Any]:
+        return self._call("open_site", website=website)
+    
+    def close_site(self, website: str) -> Dict[str, Any]:
+        return self._call("close_site", website=website)
+    
+    def refresh_subscriptions(self, force: bool = False) -> Dict[str, Any]:
+        return self._call("refresh_subscriptions", force=force)
+    
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """Không có sự kiện đẩy qua socket; GUI đồng bộ bằng status()"""
+    
+    def cleanup_leftover_blocks(self):
+        """Daemon tự quản lý file hosts"""
+    
+    def start_schedules(self):
+        """Daemon tự chạy lịch chặn"""
+    
+    def start_quotas(self):
+        """Daemon tự áp hạn mức website"""
+    
+    def start_sinkhole(self) -> bool:
+        """Daemon tự mở trang chặn"""
+        return False
+    
+    def start_subscriptions(self):
+        """Daemon tự tải lại các danh sách chặn theo dõi"""
+    
+    def prepare_profiles(self) -> int:
+        """Daemon tự biên dịch khối chặn của các hồ sơ"""
+        return 0
+    
+    def shutdown(self, notes: str = ""):
+        """Phiên tiếp tục chạy trong daemon khi GUI thoát"""
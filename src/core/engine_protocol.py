@@ -0,0 +1,14 @@
+"""
+Phần dùng chung giữa FocusEngine, server và client của nó
+Không import gì nặng: CLI chỉ cần module này và ipc để nói chuyện với engine
+"""
+
+# Tên kênh IPC của engine
+ENGINE_CHANNEL = "engine"
+
+class EngineError(Exception):
+    """Lỗi khi điều khiển phiên (kèm mã lỗi để client xử lý)"""
+    
+    def __init__(self, message: str, code: str = "error"):
+        super().__init__(message)
+        self.code = code
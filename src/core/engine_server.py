@@ -0,0 +1,129 @@
+"""
+Server JSON qua Unix socket cho FocusEngine và chế độ daemon không giao diện
+GUI, CLI và các công cụ tự động hóa đều là client của cùng một API
+"""
+
+import logging
+import os
+import signal
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+from src.core.config_manager import ConfigManager
+from src.core.engine_protocol import ENGINE_CHANNEL, EngineError
+from src.core.focus_engine import FocusEngine
+from src.core.ipc import IpcServer
+from src.core.logs import pipeline
+from src.core.metrics import start_exporters
+from src.core.password_manager import PasswordManager
+
+logger = logging.getLogger(__name__)
+
+class EngineServer:
+    """Nhận lệnh qua socket và chuyển cho FocusEngine"""
+    
+    def __init__(self):
+        self.engine: Optional[FocusEngine] = None
+        self._server = IpcServer(ENGINE_CHANNEL)
+        self._commands: Dict[str, Callable[[FocusEngine, Dict[str, Any]], Any]] = {
+            "ping": lambda engine, req: {"pid": os.getpid()},
+            "status": lambda engine, req: engine.status(),
+            "start": lambda engine, req: engine.start_session(
+                int(req["duration"]), req.get("websites"), bool(req.get("block", True)), req.get("cycles"),
+                req.get("profile")
+            ),
+            "continue": lambda engine, req: engine.continue_plan(),
+            # Không tin cờ `authorized` từ client: luôn xác thực mật khẩu tại engine
+            "stop": lambda engine, req: engine.stop_session(password=req.get("password")),
+            "pause": lambda engine, req: engine.pause_session(password=req.get("password")),
+            "unpause": lambda engine, req: engine.unpause_session(),
+            "poll": lambda engine, req: engine.poll(),
+            "has_sudo": lambda engine, req: engine.has_sudo_access(),
+            "find_unfinished": lambda engine, req: engine.find_unfinished_session(),
+            "resume": lambda engine, req: engine.resume_session(int(req["session_id"])),
+            "discard": lambda engine, req: engine.discard_session(int(req["session_id"])),
+            "refresh_schedules": lambda engine, req: engine.refresh_schedules(),
+            "refresh_quotas": lambda engine, req: engine.refresh_quotas(),
+            "open_site": lambda engine, req: engine.open_site(str(req["website"])),
+            "close_site": lambda engine, req: engine.close_site(str(req["website"])),
+            "refresh_subscriptions": lambda engine, req: engine.refresh_subscriptions(bool(req.get("force", False))),
+        }
+    
+    def bind(self) -> bool:
+        """Chiếm kênh engine; False nếu đã có engine khác (daemon hoặc GUI) đang chạy"""
+        return self._server.bind()
+    
+    def serve(self, engine: FocusEngine):
+        """Bắt đầu nhận lệnh cho engine trên thread nền (gọi sau bind)"""
+        self.engine = engine
+        self._server.serve(self.handle_request)
+    
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Xử lý một request: {"command": ..., ...} -> {"ok": bool, "result"/"error": ...}"""
+        handler = self._commands.get(request.get("command"))
+        if handler is None:
+            return {"ok": False, "error": f"Lệnh không hỗ trợ: {request.get('command')}", "code": "unknown_command"}
+        
+        try:
+            # Cấu hình có thể vừa được CLI khác sửa: đọc lại trước khi xử lý, thay đổi được báo cho các listener
+            self.engine.config_manager.reload_if_changed()
+            return {"ok": True, "result": handler(self.engine, request)}
+        except EngineError as e:
+            return {"ok": False, "error": str(e), "code": e.code}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"Tham số không hợp lệ: {e}", "code": "bad_request"}
+    
+    def apply_config_changes(self, changed: Set[str]):
+        """Áp cấu hình bị sửa từ bên ngoài vào engine (listener của ConfigManager trong daemon)"""
+        if changed & {"profiles", "schedules", "blocked_websites"}:
+            self.engine.prepare_profiles()
+        if changed & {"schedules", "blocked_websites"}:
+            self.engine.refresh_schedules()
+        if "quotas" in changed:
+            self.engine.refresh_quotas()
+        if "subscriptions" in changed:
+            self.engine.refresh_subscriptions()
+    
+    def close(self):
+        """Đóng kênh"""
+        self._server.close()
+
+def run_daemon() -> int:
+    """Chạy engine không giao diện cho tới khi nhận SIGTERM/SIGINT"""
+    server = EngineServer()
+    if not server.bind():
+        print("FocusGuard engine đã đang chạy!")
+        return 1
+    
+    config_manager = ConfigManager()
+    # Daemon chạy tách khỏi terminal: log chủ yếu nằm trong file ở thư mục cấu hình
+    pipeline.start(config_manager.config_dir, config_manager.settings.diagnostics.log_level)
+    engine = FocusEngine(config_manager, PasswordManager())
+    exporters = start_exporters(config_manager.settings.metrics, "daemon")
+    
+    stop_event = threading.Event()
+    
+    def handle_signal(signum, frame):
+        logger.info("Nhận signal %s, đang thoát...", signum)
+        stop_event.set()
+    
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    
+    # Khôi phục trước khi nhận lệnh để không tranh chấp với client
+    engine.recover()
+    server.serve(engine)
+    # Daemon không có GUI: tự theo dõi file cấu hình (GUI trong process áp thay đổi qua MainWindow)
+    config_manager.add_listener(server.apply_config_changes)
+    config_manager.start_watching()
+    logger.info("FocusGuard daemon đang chạy (pid %d)", os.getpid())
+    
+    while not stop_event.wait(3600):
+        pass
+    
+    config_manager.stop_watching()
+    engine.shutdown(notes="Daemon dừng")
+    server.close()
+    for exporter in exporters:
+        exporter.close()
+    return 0
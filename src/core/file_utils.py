@@ -0,0 +1,46 @@
+"""
+Tiện ích ghi file an toàn cho FocusGuard
+Ghi ra file tạm, fsync rồi rename để không bao giờ để lại file bị cắt dở
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+def atomic_write_bytes(path: Path, data: bytes, mode: Optional[int] = None):
+    """Ghi dữ liệu vào file theo kiểu nguyên tử (write-temp + fsync + rename)"""
+    path = Path(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    # Đồng bộ thư mục để rename được ghi xuống đĩa
+    try:
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def atomic_write_text(path: Path, text: str, mode: Optional[int] = None, encoding: str = 'utf-8'):
+    """Ghi chuỗi vào file theo kiểu nguyên tử"""
+    atomic_write_bytes(path, text.encode(encoding), mode)
@@ -0,0 +1,960 @@
+"""
+Lõi điều khiển phiên tập trung của FocusGuard (không phụ thuộc giao diện)
+Quản lý phiên theo kế hoạch chu kỳ (làm việc/nghỉ), tạm dừng/tiếp tục, hẹn giờ chuyển pha, lịch chặn tự động,
+hạn mức theo website, chặn website và ứng dụng; dùng chung cho GUI, daemon và CLI
+"""
+
+import logging
+import threading
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from src.core.clock import Clock, SYSTEM_CLOCK
+from src.core.config_manager import ConfigManager
+from src.core.config_model import DEFAULT_PROFILE, ConfigError, _check_websites, websites_version
+from src.core.engine_protocol import EngineError
+from src.core.hosts_regions import HostsRegionCache
+from src.core.metrics import SESSION_ACTIVE
+from src.core.password_manager import PasswordManager
+from src.core.process_blocker import ProcessBlocker
+from src.core.profiler import profiler
+from src.core.scheduler import DeadlineScheduler, ScheduledCall
+from src.core.schedules import BlockSchedule
+from src.core.session_manager import SessionManager
+from src.core.session_plan import PHASE_WORK, Phase, SessionPlan
+from src.core.sinkhole import SinkholeServer
+from src.core.subscriptions import SubscriptionUpdater
+from src.core.usage_sampler import UsageSampler
+from src.core.website_blocker import WebsiteBlocker
+
+logger = logging.getLogger(__name__)
+
+# Số website thay đổi tối đa để sửa tại chỗ khối chặn trong hosts thay vì thay cả khối
+# (khối lớn, vd có danh sách theo dõi: tới 1/8 số website của khối)
+INCREMENTAL_HOSTS_CHANGES = 16
+# Chu kỳ kiểm tra các danh sách chặn theo dõi tới hạn tải lại (giây)
+SUBSCRIPTION_CHECK_INTERVAL = 900.0
+
+class FocusEngine:
+    """Điều khiển phiên tập trung, an toàn khi gọi từ nhiều thread"""
+    
+    def __init__(self, config_manager: ConfigManager, password_manager: Optional[PasswordManager] = None,
+                 session_manager: Optional[SessionManager] = None, website_blocker: Optional[WebsiteBlocker] = None,
+                 clock: Clock = SYSTEM_CLOCK):
+        self.config_manager = config_manager
+        self.password_manager = password_manager
+        self.clock = clock
+        self.website_blocker = website_blocker or WebsiteBlocker(config_manager.get_backup_hosts_path())
+        if session_manager is None:
+            with profiler.span("session_manager.init_database"):
+                session_manager = SessionManager(config_manager.get_data_dir(), clock)
+        self.session_manager = session_manager
+        # Khối chặn hosts của các hồ sơ, biên dịch sẵn và lưu trên đĩa
+        self.regions = HostsRegionCache(config_manager.get_data_dir() / "hosts_regions", self.website_blocker)
+        
+        self._lock = threading.RLock()
+        # Một thread hẹn giờ cho mọi lần chuyển pha (đồng hồ ảo: không có thread, gọi poll())
+        self._scheduler = DeadlineScheduler(clock, name="focus-deadline")
+        self._deadline_call: Optional[ScheduledCall] = None
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        
+        # Trạng thái phiên
+        self.current_session_id: Optional[int] = None
+        self.plan: Optional[SessionPlan] = None
+        self.phases: Tuple[Phase, ...] = ()
+        self.phase_index = 0
+        self.planned_duration = 0  # phút, của pha hiện tại
+        self.deadline = 0.0  # epoch giây, hạn của pha hiện tại
+        self.waiting = False  # hết pha làm việc, chờ người dùng bắt đầu nghỉ (auto_start_break tắt)
+        self.paused = False
+        self.paused_remaining = 0.0  # giây còn lại của pha lúc tạm dừng
+        self.websites: List[str] = []
+        self.profile: Optional[str] = None
+        self.block_enabled = False
+        self.session_blocklist: FrozenSet[str] = frozenset()
+        # Hosts file chứa hợp của danh sách chặn của phiên và của lịch chặn
+        self.applied_blocklist: FrozenSet[str] = frozenset()
+        self.blocking_active = False
+        self.blocking_error: Optional[str] = None
+        # Chặn ứng dụng (blocked_apps) trong các pha chặn website của phiên
+        self.process_blocker: Optional[ProcessBlocker] = None
+        # Lấy mẫu ứng dụng đang chạy trong phiên (usage_sampling), ghi vào database khi phiên kết thúc
+        self.usage_sampler: Optional[UsageSampler] = None
+        # Trang chặn HTTP cho website bị chặn (section sinkhole), bật bởi start_sinkhole()
+        self.sinkhole: Optional[SinkholeServer] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        
+        # Lịch chặn tự động (section schedules của cấu hình), bật bởi start_schedules()
+        self.schedules_enabled = False
+        self._schedule_call: Optional[ScheduledCall] = None
+        self.scheduled_blocklist: FrozenSet[str] = frozenset()
+        self.scheduled_session_id: Optional[int] = None
+        self.scheduled_until = 0.0  # epoch giây, cuối khoảng chặn theo lịch đang diễn ra
+        
+        # Hạn mức theo website (section quotas), bật bởi start_quotas()
+        self.quotas_enabled = False
+        self._quota_call: Optional[ScheduledCall] = None
+        self.quota_day: Optional[date] = None
+        self.quota_used: Dict[str, float] = {}  # giây đã mở trong ngày, không tính lần mở đang diễn ra
+        self.quota_open: Dict[str, float] = {}  # website đang mở -> epoch lúc mở
+        
+        # Danh sách chặn theo dõi (section subscriptions), bật bởi start_subscriptions(); tải trên thread riêng
+        self.subscriptions_enabled = False
+        self.subscription_updater = SubscriptionUpdater(self.session_manager, clock)
+        self.subscribed_domains: FrozenSet[str] = frozenset()  # hợp tên miền của các danh sách, chặn cùng phiên
+        self.subscription_errors: Dict[str, str] = {}  # url -> lỗi của lần tải gần nhất
+        self._subscription_wake = threading.Event()
+        self._subscription_force = False
+        self._subscription_update_lock = threading.Lock()
+    
+    # === TRẠNG THÁI ===
+    
+    def is_active(self) -> bool:
+        """Có phiên đang chạy không"""
+        return self.current_session_id is not None
+    
+    def status(self) -> Dict[str, Any]:
+        """Trạng thái hiện tại (dạng JSON được)"""
+        with self._lock:
+            running = self.is_active() and not self.waiting and not self.paused
+            if running:
+                remaining = max(0, int(round(self.deadline - self.clock.time())))
+            else:
+                remaining = max(0, int(round(self.paused_remaining))) if self.paused else 0
+            return {
+                "active": self.is_active(),
+                "session_id": self.current_session_id,
+                "planned_duration": self.planned_duration,
+                "remaining_seconds": remaining,
+                "phase_index": self.phase_index,
+                "phase_count": len(self.phases),
+                "phase_kind": self.phases[self.phase_index].kind if self.is_active() else None,
+                "waiting": self.waiting,
+                "paused": self.paused,
+                "websites": list(self.websites),
+                "profile": self.profile,
+                "blocking": self.blocking_active,
+                "blocking_error": self.blocking_error,
+                "app_blocking": self.process_blocker.mode if self.process_blocker else None,
+                "app_hits": sum(self.process_blocker.hits.values()) if self.process_blocker else 0,
+                "strict_mode": self.config_manager.is_strict_mode(),
+                "scheduled_websites": sorted(self.scheduled_blocklist),
+                "scheduled_until": self.scheduled_until if self.scheduled_blocklist else None,
+                "quotas": self._quota_status(),
+                "subscribed_domains": len(self.subscribed_domains),
+                "subscription_errors": dict(self.subscription_errors),
+                "last_result": self.last_result,
+            }
+    
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """Đăng ký nhận sự kiện (started/phase/paused/resumed/stopped/finished/quota); callback chạy trên thread gây ra sự kiện"""
+        self._listeners.append(callback)
+    
+    def _notify(self, event: str):
+        status = self.status()
+        for callback in list(self._listeners):
+            try:
+                callback(event, status)
+            except Exception as e:
+                logger.exception("Lỗi xử lý sự kiện %s: %s", event, e)
+    
+    def has_sudo_access(self) -> bool:
+        """Kiểm tra có quyền sudo để sửa hosts không"""
+        return self.website_blocker.has_sudo_access()
+    
+    # === ĐIỀU KHIỂN PHIÊN ===
+    
+    def start_session(self, duration: int, websites: Optional[List[str]] = None, block: bool = True,
+                      cycles: Optional[int] = None, profile: Optional[str] = None) -> Dict[str, Any]:
+        """Bắt đầu phiên tập trung mới
+        
+        cycles: số pha tập trung xen kẽ nghỉ (mặc định theo pomodoro.cycles của cấu hình).
+        profile: hồ sơ chặn (mặc định: blocked_websites), dùng khi không truyền websites.
+        """
+        if not isinstance(duration, int) or isinstance(duration, bool) or not 1 <= duration <= 999:
+            raise EngineError("Thời lượng phải từ 1 đến 999 phút", "invalid_duration")
+        
+        with self._lock:
+            if self.is_active():
+                raise EngineError("Đang có phiên tập trung chạy", "session_active")
+            
+            settings = self.config_manager.settings
+            try:
+                plan = SessionPlan.from_settings(settings, duration, settings.pomodoro.cycles if cycles is None else cycles)
+            except ConfigError as e:
+                raise EngineError(f"Kế hoạch phiên không hợp lệ: {e}", "invalid_plan")
+            if websites is None:
+                profile_websites = settings.profile_websites(profile)
+                if profile_websites is None:
+                    raise EngineError(f"Không có hồ sơ chặn {profile!r}", "unknown_profile")
+                websites = profile_websites
+                profile = profile or DEFAULT_PROFILE
+            # Danh sách từ client (socket) được ghi thẳng vào hosts file: kiểm tra như blocked_websites
+            try:
+                websites = list(_check_websites("websites", websites))
+            except ConfigError as e:
+                raise EngineError(f"Danh sách website không hợp lệ: {e}", "invalid_websites")
+            
+            # Tạo phiên mới, ghi lại phiên bản danh sách website của hồ sơ
+            session_id = self.session_manager.start_session(plan.total_work, websites, plan.to_dict(),
+                                                            profile=profile, profile_version=websites_version(websites))
+            if session_id == -1:
+                raise EngineError("Không thể bắt đầu phiên tập trung!", "database_error")
+            
+            self._begin(session_id, plan, websites, block, profile)
+            self._enter_phase(0, self.clock.time())
+            
+            # Lưu thời lượng mặc định
+            self.config_manager.set_focus_duration(duration)
+        
+        self._notify("started")
+        return self.status()
+    
+    def _begin(self, session_id: int, plan: SessionPlan, websites: List[str], block: bool,
+               profile: Optional[str] = None):
+        """Đặt trạng thái phiên (pha đầu tiên do _enter_phase bắt đầu)"""
+        self.current_session_id = session_id
+        self.plan = plan
+        self.phases = plan.phases()
+        self.websites = websites
+        self.profile = profile
+        self.block_enabled = block
+        self.blocking_error = None
+        sampling = self.config_manager.settings.usage_sampling
+        if sampling.enabled:
+            self.usage_sampler = UsageSampler(sampling.interval)
+            self.usage_sampler.start()
+        SESSION_ACTIVE.set(1)
+    
+    def _enter_phase(self, index: int, start: float):
+        """Bắt đầu pha `index` tại thời điểm `start` và ghi vào database"""
+        phase = self.phases[index]
+        self.session_manager.start_phase(self.current_session_id, index, phase.kind, phase.duration,
+                                         datetime.fromtimestamp(start))
+        self._set_phase(index, start + phase.duration * 60)
+    
+    def _set_phase(self, index: int, deadline: float):
+        """Chạy pha `index` tới hạn `deadline`, đổi chặn website nếu cần và hẹn giờ kết thúc pha"""
+        self.phase_index = index
+        self.planned_duration = self.phases[index].duration
+        self.deadline = deadline
+        self.waiting = False
+        self.paused = False
+        self.paused_remaining = 0.0
+        self._apply_blocklist(self._phase_blocklist())
+        self._set_app_blocking(self.block_enabled and self.phases[index].block)
+        self._schedule_deadline()
+    
+    def _phase_blocklist(self) -> FrozenSet[str]:
+        """Danh sách chặn của pha hiện tại (kèm tên miền của các danh sách theo dõi)"""
+        if not self.block_enabled or not self.phases[self.phase_index].block:
+            return frozenset()
+        return self.phases[self.phase_index].blocklist(self.websites) | self.subscribed_domains
+    
+    def _set_app_blocking(self, active: bool):
+        """Bật/tắt chặn ứng dụng của phiên; mỗi lần chặn được ghi vào database theo phiên"""
+        settings = self.config_manager.settings
+        active = active and bool(settings.blocked_apps)
+        if active and self.process_blocker is None:
+            session_id = self.current_session_id
+            self.process_blocker = ProcessBlocker(
+                settings.blocked_apps, settings.app_block_action,
+                on_hit=lambda app, pid: self.session_manager.record_app_hit(session_id, app)
+            )
+            self.process_blocker.start()
+        elif not active and self.process_blocker is not None:
+            self.process_blocker.stop()
+            self.process_blocker = None
+    
+    def _apply_blocklist(self, blocklist: FrozenSet[str]):
+        """Đặt danh sách chặn của phiên và đưa hosts file về hợp với lịch chặn và hạn mức; không ghi lại khi không đổi"""
+        self.session_blocklist = blocklist
+        blocklist = blocklist | self.scheduled_blocklist
+        # Website có hạn mức bị phiên hoặc lịch chặn thì đóng lại: chỉ tính giờ khi thật sự được mở
+        for website in self.quota_open.keys() & blocklist:
+            self._close_quota(website, self.clock.time())
+        blocklist = blocklist | self._quota_blocklist()
+        if blocklist == self.applied_blocklist:
+            return
+        
+        if not blocklist:
+            self.website_blocker.remove_block_entries()
+            self.applied_blocklist = frozenset()
+            self.blocking_active = False
+            return
+        
+        added = blocklist - self.applied_blocklist
+        removed = self.applied_blocklist - blocklist
+        if not self.website_blocker.has_sudo_access():
+            self.blocking_error = "Không có quyền sudo để chặn website"
+            return
+        if self.applied_blocklist and len(added) + len(removed) <= max(INCREMENTAL_HOSTS_CHANGES,
+                                                                        len(self.applied_blocklist) // 8):
+            # Ít thay đổi (vd một website hết hạn mức, danh sách theo dõi đổi vài tên miền): sửa tại chỗ khối chặn
+            applied = self.website_blocker.update_block_entries(sorted(added), sorted(removed),
+                                                                blocklist & self.applied_blocklist)
+        else:
+            # Thay cả khối (giữ thứ tự của danh sách gốc, website chỉ có trong lịch chặn hoặc hạn mức xếp sau)
+            ordered = [w for w in self.websites if w in blocklist] + sorted(blocklist.difference(self.websites))
+            applied = self.website_blocker.apply_block_region(self.regions.get(ordered), len(ordered))
+        if applied:
+            self.applied_blocklist = blocklist
+            self.blocking_active = True
+            self.blocking_error = None
+        else:
+            self.blocking_error = "Không thể chặn website"
+    
+    def _schedule_deadline(self):
+        """Hẹn một lần gọi poll() tại hạn của pha hiện tại (thay cho lần hẹn trước)"""
+        self._cancel_deadline()
+        if self.is_active() and not self.waiting and not self.paused:
+            self._deadline_call = self._scheduler.schedule(self.deadline, self.poll)
+    
+    def _cancel_deadline(self):
+        if self._deadline_call is not None:
+            self._deadline_call.cancel()
+            self._deadline_call = None
+    
+    def stop_session(self, password: Optional[str] = None, authorized: bool = False,
+                     notes: str = "Dừng sớm bởi người dùng") -> Dict[str, Any]:
+        """Dừng phiên sớm (chế độ nghiêm khắc cần mật khẩu)"""
+        with self._lock:
+            if not self.is_active():
+                raise EngineError("Không có phiên tập trung nào đang chạy", "no_session")
+            
+            if self.config_manager.is_strict_mode() and not authorized:
+                self._check_password(password)
+            
+            self._end(completed=False, notes=notes)
+        
+        self._notify("stopped")
+        return self.status()
+    
+    def pause_session(self, password: Optional[str] = None, authorized: bool = False) -> Dict[str, Any]:
+        """Tạm dừng pha đang chạy (chế độ nghiêm khắc cần mật khẩu)
+        
+        Thời gian tạm dừng không tính vào thời gian tập trung; website được bỏ chặn nếu bật unblock_during_pause.
+        """
+        with self._lock:
+            if not self.is_active():
+                raise EngineError("Không có phiên tập trung nào đang chạy", "no_session")
+            if self.waiting:
+                raise EngineError("Phiên đang chờ chuyển pha", "not_running")
+            if self.paused:
+                raise EngineError("Phiên đã tạm dừng", "already_paused")
+            
+            if self.config_manager.is_strict_mode() and not authorized:
+                self._check_password(password, "tạm dừng phiên")
+            
+            now = self.clock.time()
+            if not self.session_manager.start_pause(self.current_session_id, self.phase_index,
+                                                    datetime.fromtimestamp(now)):
+                raise EngineError("Không thể tạm dừng phiên!", "database_error")
+            self._pause(self.deadline - now)
+        
+        self._notify("paused")
+        return self.status()
+    
+    def _pause(self, remaining: float):
+        """Giữ pha hiện tại với `remaining` giây còn lại cho tới khi unpause_session()"""
+        self.paused = True
+        self.paused_remaining = max(0.0, remaining)
+        self.deadline = 0.0
+        self._cancel_deadline()
+        unblock = self.config_manager.settings.unblock_during_pause
+        self._apply_blocklist(frozenset() if unblock else self._phase_blocklist())
+        self._set_app_blocking(not unblock and self.block_enabled and self.phases[self.phase_index].block)
+    
+    def unpause_session(self) -> Dict[str, Any]:
+        """Tiếp tục pha đang tạm dừng với thời gian còn lại lúc tạm dừng"""
+        with self._lock:
+            if not self.is_active():
+                raise EngineError("Không có phiên tập trung nào đang chạy", "no_session")
+            if not self.paused:
+                raise EngineError("Phiên không tạm dừng", "not_paused")
+            
+            now = self.clock.time()
+            if not self.session_manager.end_pause(self.current_session_id, datetime.fromtimestamp(now)):
+                raise EngineError("Không thể tiếp tục phiên!", "database_error")
+            self._set_phase(self.phase_index, now + self.paused_remaining)
+        
+        self._notify("resumed")
+        return self.status()
+    
+    def _check_password(self, password: Optional[str], action: str = "dừng phiên"):
+        """Xác thực mật khẩu cho thao tác bị chế độ nghiêm khắc bảo vệ"""
+        if self.password_manager is None:
+            raise EngineError("Chế độ nghiêm khắc: không thể xác thực mật khẩu", "password_required")
+        if self.password_manager.is_locked_out():
+            remaining = self.password_manager.get_lockout_remaining()
+            raise EngineError(f"Tài khoản bị khóa, thử lại sau {remaining} giây", "locked_out")
+        if not password:
+            raise EngineError(f"Chế độ nghiêm khắc: cần mật khẩu để {action}", "password_required")
+        if not self.password_manager.verify_password(password):
+            remaining = self.password_manager.get_remaining_attempts()
+            raise EngineError(f"Mật khẩu không đúng! Còn {remaining} lần thử.", "wrong_password")
+    
+    def poll(self) -> Dict[str, Any]:
+        """Chuyển pha/kết thúc phiên nếu đã tới hạn (gọi bởi scheduler hoặc khi GUI đếm ngược xong)
+        
+        Máy ngủ qua nhiều pha thì các pha được nối tiếp nhau theo hạn, không theo lúc thức dậy.
+        """
+        events = []
+        with self._lock:
+            while (self.is_active() and not self.waiting and not self.paused
+                   and self.clock.time() >= self.deadline - 0.5):
+                boundary = self.deadline
+                next_index = self.phase_index + 1
+                if next_index >= len(self.phases):
+                    self._end(completed=True, notes="Hoàn thành đầy đủ", end_time=datetime.fromtimestamp(boundary))
+                    events.append("finished")
+                    break
+                
+                if self.phases[next_index].kind != PHASE_WORK and not self.plan.auto_start_break:
+                    # Chờ người dùng bắt đầu nghỉ (continue_plan); không chặn trong lúc chờ
+                    self.session_manager.end_phase(self.current_session_id, self.phase_index,
+                                                   datetime.fromtimestamp(boundary))
+                    self._wait_for_phase(next_index)
+                else:
+                    self._enter_phase(next_index, boundary)
+                events.append("phase")
+        
+        for event in events:
+            self._notify(event)
+        return self.status()
+    
+    def _wait_for_phase(self, index: int):
+        """Dừng ở ranh giới trước pha `index` cho tới khi continue_plan()"""
+        self.phase_index = index
+        self.planned_duration = self.phases[index].duration
+        self.deadline = 0.0
+        self.waiting = True
+        self._cancel_deadline()
+        self._apply_blocklist(frozenset())
+        self._set_app_blocking(False)
+    
+    def continue_plan(self) -> Dict[str, Any]:
+        """Bắt đầu pha đang chờ (khi auto_start_break tắt)"""
+        with self._lock:
+            if not self.is_active():
+                raise EngineError("Không có phiên tập trung nào đang chạy", "no_session")
+            if not self.waiting:
+                raise EngineError("Phiên không chờ chuyển pha", "not_waiting")
+            self._enter_phase(self.phase_index, self.clock.time())
+        
+        self._notify("phase")
+        return self.status()
+    
+    def _end(self, completed: bool, notes: str, end_time: Optional[datetime] = None):
+        """Kết thúc phiên hiện tại và bỏ chặn website"""
+        self._cancel_deadline()
+        
+        session_id = self.current_session_id
+        self.session_manager.end_session(session_id, completed=completed, notes=notes, end_time=end_time)
+        # Lượt truy cập bị chặn còn trong bộ đếm thuộc về phiên này
+        if self.sinkhole is not None:
+            self.sinkhole.flush()
+        
+        # Tắt chặn website (không ghi hosts nếu đang ở pha nghỉ không chặn) và chặn ứng dụng
+        self._apply_blocklist(frozenset())
+        self._set_app_blocking(False)
+        if self.usage_sampler is not None:
+            self.usage_sampler.stop()
+            self.session_manager.record_app_usage(session_id, self.usage_sampler.flush())
+            self.usage_sampler = None
+        
+        self.last_result = {"session_id": session_id, "completed": completed, "notes": notes}
+        self.current_session_id = None
+        self.plan = None
+        self.phases = ()
+        self.phase_index = 0
+        self.planned_duration = 0
+        self.deadline = 0.0
+        self.waiting = False
+        self.paused = False
+        self.paused_remaining = 0.0
+        self.websites = []
+        self.profile = None
+        self.block_enabled = False
+        self.blocking_error = None
+        SESSION_ACTIVE.set(0)
+    
+    # === HỒ SƠ CHẶN ===
+    
+    def prepare_profiles(self) -> int:
+        """Biên dịch trước khối chặn hosts của mọi hồ sơ (chạy nền lúc khởi động và khi hồ sơ đổi)"""
+        settings = self.config_manager.settings
+        lists = [settings.blocked_websites] + [profile.websites for profile in settings.profiles]
+        # Lịch chặn không kèm phiên dùng danh sách đã sắp xếp (xem _apply_blocklist)
+        lists += [sorted(rule.websites or settings.blocked_websites) for rule in settings.schedules if rule.enabled]
+        count = self.regions.prepare(lists)
+        logger.debug("Đã chuẩn bị %d khối chặn hosts", count)
+        return count
+    
+    # === LỊCH CHẶN TỰ ĐỘNG ===
+    
+    def start_schedules(self):
+        """Bật lịch chặn: đóng các phiên theo lịch còn mở từ lần chạy trước rồi áp lịch hiện tại"""
+        with self._lock:
+            now = self.clock.time()
+            for session in self.session_manager.get_open_sessions("schedule"):
+                planned_end = session['start_time'].timestamp() + session['planned_duration'] * 60
+                self.session_manager.end_session(session['id'], completed=now >= planned_end,
+                                                 notes="Lịch chặn (app dừng giữa chừng)",
+                                                 end_time=datetime.fromtimestamp(min(now, planned_end)))
+            self.schedules_enabled = True
+            self._update_schedule()
+    
+    def refresh_schedules(self):
+        """Tính lại lịch chặn sau khi quy tắc hoặc danh sách website thay đổi"""
+        with self._lock:
+            if self.schedules_enabled:
+                self._update_schedule()
+    
+    def _on_schedule_deadline(self):
+        with self._lock:
+            if self.schedules_enabled:
+                self._update_schedule()
+    
+    def _update_schedule(self):
+        """Áp danh sách chặn theo lịch tại thời điểm hiện tại và hẹn lần đổi tiếp theo
+        
+        Lịch được dựng lại từ cấu hình mỗi lần (theo giờ địa phương, đúng cả khi đổi giờ DST). Máy ngủ qua
+        ranh giới thì trạng thái được tính lại theo giờ lúc thức dậy, phiên theo lịch đóng tại hạn của nó.
+        """
+        now = self.clock.time()
+        settings = self.config_manager.settings
+        schedule = BlockSchedule.build(settings.schedules, settings.blocked_websites, now)
+        websites, next_change = schedule.at(now)
+        period_end = schedule.period_end(now)
+        
+        # Mỗi khoảng chặn liên tục là một phiên trong database
+        if self.scheduled_session_id is not None and (period_end is None or now >= self.scheduled_until):
+            completed = now >= self.scheduled_until - 0.5
+            end_time = min(now, self.scheduled_until)
+            self.session_manager.end_session(self.scheduled_session_id, completed=completed, notes="Lịch chặn",
+                                             end_time=datetime.fromtimestamp(end_time))
+            self.scheduled_session_id = None
+        if period_end is not None:
+            if self.scheduled_session_id is None:
+                session_id = self.session_manager.start_session(
+                    max(1, int(round((period_end - now) / 60))), sorted(websites), source="schedule")
+                self.scheduled_session_id = session_id if session_id != -1 else None
+            self.scheduled_until = period_end
+        else:
+            self.scheduled_until = 0.0
+        
+        self.scheduled_blocklist = websites
+        self._apply_blocklist(self.session_blocklist)
+        
+        if self._schedule_call is not None:
+            self._schedule_call.cancel()
+        self._schedule_call = self._scheduler.schedule(next_change, self._on_schedule_deadline)
+        logger.debug("Lịch chặn: %d website, đổi tiếp lúc %s", len(websites), datetime.fromtimestamp(next_change))
+    
+    def _stop_schedules(self, notes: str):
+        """Tắt lịch chặn khi thoát: đóng phiên theo lịch và bỏ các website chỉ bị chặn theo lịch"""
+        self.schedules_enabled = False
+        if self._schedule_call is not None:
+            self._schedule_call.cancel()
+            self._schedule_call = None
+        if self.scheduled_session_id is not None:
+            now = self.clock.time()
+            end_time = datetime.fromtimestamp(min(now, self.scheduled_until))
+            self.session_manager.end_session(self.scheduled_session_id, completed=now >= self.scheduled_until - 0.5,
+                                             notes=notes, end_time=end_time)
+            self.scheduled_session_id = None
+        self.scheduled_until = 0.0
+        self.scheduled_blocklist = frozenset()
+        self._apply_blocklist(self.session_blocklist)
+    
+    # === HẠN MỨC THEO WEBSITE ===
+    
+    def _quota_limits(self) -> Dict[str, float]:
+        """Hạn mức mỗi ngày (giây) theo website"""
+        return {quota.website: quota.minutes * 60.0 for quota in self.config_manager.settings.quotas}
+    
+    def _quota_blocklist(self) -> FrozenSet[str]:
+        """Website có hạn mức đang không được mở (bị chặn cả khi không có phiên)"""
+        if not self.quotas_enabled:
+            return frozenset()
+        return frozenset(self._quota_limits()).difference(self.quota_open)
+    
+    def _quota_status(self) -> List[Dict[str, Any]]:
+        if not self.quotas_enabled:
+            return []
+        now = self.clock.time()
+        quotas = []
+        for quota in self.config_manager.settings.quotas:
+            used = self.quota_used.get(quota.website, 0.0)
+            opened = self.quota_open.get(quota.website)
+            if opened is not None:
+                used += max(0.0, now - opened)
+            used = min(used, quota.minutes * 60.0)
+            quotas.append({
+                "website": quota.website,
+                "minutes": quota.minutes,
+                "used_seconds": int(round(used)),
+                "remaining_seconds": int(round(quota.minutes * 60 - used)),
+                "open": opened is not None,
+            })
+        return quotas
+    
+    def start_quotas(self):
+        """Bật hạn mức: chặn lại các website còn mở từ lần chạy trước rồi áp hạn mức hôm nay"""
+        with self._lock:
+            now = self.clock.time()
+            limits = self._quota_limits()
+            # App bị dừng khi website đang mở: tính giờ mở tới lúc này (tối đa hết ngày đó, hết hạn mức)
+            for usage in self.session_manager.get_open_sites():
+                opened = usage['opened_at'].timestamp()
+                day_end = datetime.combine(usage['date'] + timedelta(days=1), dtime()).timestamp()
+                used = usage['used_seconds'] + max(0.0, min(now, day_end) - opened)
+                used = min(used, limits.get(usage['website'], used))
+                self.session_manager.record_site_usage(usage['date'], usage['website'], used, None)
+            
+            self.quota_day = datetime.fromtimestamp(now).date()
+            self.quota_used = {website: usage['used_seconds']
+                               for website, usage in self.session_manager.get_site_usage(self.quota_day).items()}
+            self.quota_open = {}
+            self.quotas_enabled = True
+            self._update_quotas()
+    
+    def refresh_quotas(self):
+        """Áp lại hạn mức sau khi cấu hình thay đổi"""
+        with self._lock:
+            if self.quotas_enabled:
+                self._update_quotas()
+    
+    def open_site(self, website: str) -> Dict[str, Any]:
+        """Mở (bỏ chặn) một website có hạn mức; thời gian mở được trừ vào hạn mức hôm nay"""
+        website = website.strip().lower()
+        with self._lock:
+            limits = self._quota_limits() if self.quotas_enabled else {}
+            if website not in limits:
+                raise EngineError(f"{website} không có hạn mức", "no_quota")
+            
+            if website not in self.quota_open:
+                now = self.clock.time()
+                self._roll_quota_day(now)
+                if website in self.session_blocklist | self.scheduled_blocklist:
+                    raise EngineError(f"{website} đang bị chặn bởi phiên tập trung hoặc lịch chặn", "site_blocked")
+                used = self.quota_used.get(website, 0.0)
+                if used >= limits[website]:
+                    raise EngineError(f"Đã hết hạn mức hôm nay của {website}", "quota_exhausted")
+                
+                self.quota_open[website] = now
+                self.session_manager.record_site_usage(self.quota_day, website, used, datetime.fromtimestamp(now))
+                self._update_quotas()
+        
+        self._notify("quota")
+        return self.status()
+    
+    def close_site(self, website: str) -> Dict[str, Any]:
+        """Chặn lại website có hạn mức đang mở (không làm gì nếu đang bị chặn)"""
+        website = website.strip().lower()
+        with self._lock:
+            if website not in self.quota_open:
+                return self.status()
+            self._close_quota(website, self.clock.time())
+            self._update_quotas()
+        
+        self._notify("quota")
+        return self.status()
+    
+    def _close_quota(self, website: str, end: float):
+        """Đóng lần mở website tại thời điểm `end`: cộng thời gian đã mở và ghi vào database"""
+        opened = self.quota_open.pop(website)
+        used = self.quota_used.get(website, 0.0) + max(0.0, end - opened)
+        used = min(used, self._quota_limits().get(website, used))
+        self.quota_used[website] = used
+        self.session_manager.record_site_usage(self.quota_day, website, used, None)
+    
+    def _roll_quota_day(self, now: float):
+        """Sang ngày mới (theo giờ địa phương): hạn mức đặt lại, website đang mở tính sang ngày mới từ nửa đêm"""
+        today = datetime.fromtimestamp(now).date()
+        if today == self.quota_day:
+            return
+        midnight = datetime.combine(today, dtime()).timestamp()
+        limits = self._quota_limits()
+        still_open = []
+        for website, opened in list(self.quota_open.items()):
+            self._close_quota(website, max(opened, midnight))
+            # Hết hạn mức trước nửa đêm (máy ngủ qua hạn) thì không mở lại
+            if self.quota_used[website] < limits.get(website, 0.0):
+                still_open.append(website)
+        
+        self.quota_day = today
+        self.quota_used = {}
+        for website in still_open:
+            self.quota_open[website] = midnight
+            self.session_manager.record_site_usage(today, website, 0.0, datetime.fromtimestamp(midnight))
+    
+    def _on_quota_deadline(self):
+        with self._lock:
+            if not self.quotas_enabled:
+                return
+            self._update_quotas()
+        self._notify("quota")
+    
+    def _update_quotas(self):
+        """Chặn website hết hạn mức, đưa hosts file về đúng trạng thái và hẹn hạn gần nhất
+        
+        Chỉ có một lần hẹn: lúc website đang mở sớm nhất hết hạn mức hoặc nửa đêm (đặt lại hạn mức).
+        Máy ngủ qua hạn thì thời gian mở chỉ được tính tới lúc hết hạn mức.
+        """
+        now = self.clock.time()
+        self._roll_quota_day(now)
+        limits = self._quota_limits()
+        for website, opened in list(self.quota_open.items()):
+            exhausted_at = opened + limits.get(website, 0.0) - self.quota_used.get(website, 0.0)
+            if now >= exhausted_at - 0.5:
+                self._close_quota(website, min(now, exhausted_at))
+                logger.info("Hết hạn mức hôm nay của %s", website)
+        
+        self._apply_blocklist(self.session_blocklist)
+        
+        if self._quota_call is not None:
+            self._quota_call.cancel()
+            self._quota_call = None
+        if limits:
+            deadline = datetime.combine(self.quota_day + timedelta(days=1), dtime()).timestamp()
+            for website, opened in self.quota_open.items():
+                deadline = min(deadline, opened + limits[website] - self.quota_used.get(website, 0.0))
+            self._quota_call = self._scheduler.schedule(deadline, self._on_quota_deadline)
+    
+    def _stop_quotas(self):
+        """Tắt hạn mức khi thoát: đóng các website đang mở và bỏ chặn theo hạn mức"""
+        now = self.clock.time()
+        for website in list(self.quota_open):
+            self._close_quota(website, now)
+        self.quotas_enabled = False
+        if self._quota_call is not None:
+            self._quota_call.cancel()
+            self._quota_call = None
+        self._apply_blocklist(self.session_blocklist)
+    
+    # === TRANG CHẶN ===
+    
+    def start_sinkhole(self) -> bool:
+        """Mở trang chặn HTTP trên 127.0.0.1 nếu được bật trong cấu hình"""
+        settings = self.config_manager.settings.sinkhole
+        if not settings.enabled or self.sinkhole is not None:
+            return False
+        sinkhole = SinkholeServer(self.status, self._record_block_hits, settings.port,
+                                  flush_interval=settings.flush_interval)
+        try:
+            sinkhole.start()
+        except OSError as e:
+            logger.warning("Không mở được trang chặn trên cổng %d: %s", settings.port, e)
+            return False
+        self.sinkhole = sinkhole
+        return True
+    
+    def _record_block_hits(self, counts: Dict[str, int]):
+        """Ghi một lô lượt truy cập bị chặn cho phiên đang chạy (hoặc phiên theo lịch)"""
+        session_id = self.current_session_id or self.scheduled_session_id
+        if session_id is None:
+            logger.debug("Bỏ qua %d lượt truy cập bị chặn ngoài phiên", sum(counts.values()))
+            return
+        self.session_manager.record_block_hits(session_id, counts)
+    
+    # === DANH SÁCH CHẶN THEO DÕI ===
+    
+    def start_subscriptions(self):
+        """Nạp tên miền đã lưu của các danh sách theo dõi và tải lại định kỳ trên thread nền"""
+        with self._lock:
+            if self.subscriptions_enabled:
+                return
+            self.subscriptions_enabled = True
+            self._load_subscriptions()
+        threading.Thread(target=self._run_subscriptions, name="subscriptions", daemon=True).start()
+    
+    def refresh_subscriptions(self, force: bool = False) -> Dict[str, Any]:
+        """Nạp lại sau khi cấu hình đổi và kiểm tra ngay các danh sách tới hạn (force: tải lại tất cả)
+        
+        Không chờ tải xong: việc tải chạy trên thread nền.
+        """
+        with self._lock:
+            if self.subscriptions_enabled:
+                self._load_subscriptions()
+                self._subscription_force = self._subscription_force or force
+                self._subscription_wake.set()
+        return self.status()
+    
+    def _subscription_urls(self) -> List[str]:
+        return [subscription.url for subscription in self.config_manager.settings.subscriptions]
+    
+    def _load_subscriptions(self):
+        """Đọc lại hợp tên miền của các danh sách trong cấu hình; xóa danh sách đã bỏ khỏi cấu hình"""
+        urls = self._subscription_urls()
+        for url in set(self.session_manager.get_subscription_urls()).difference(urls):
+            self.session_manager.delete_subscription(url)
+            self.subscription_errors.pop(url, None)
+        self._set_subscribed(frozenset(self.session_manager.get_subscribed_domains(urls)))
+    
+    def _set_subscribed(self, domains: FrozenSet[str]):
+        """Đổi tên miền theo dõi; phiên đang chặn thì sửa hosts file theo phần thay đổi"""
+        if domains == self.subscribed_domains:
+            return
+        self.subscribed_domains = domains
+        unblocked = self.paused and self.config_manager.settings.unblock_during_pause
+        if self.is_active() and not self.waiting and not unblocked:
+            self._apply_blocklist(self._phase_blocklist())
+    
+    def _run_subscriptions(self):
+        while self.subscriptions_enabled:
+            self.update_subscriptions()
+            self._subscription_wake.wait(SUBSCRIPTION_CHECK_INTERVAL)
+            self._subscription_wake.clear()
+    
+    def update_subscriptions(self, force: bool = False) -> int:
+        """Tải lại các danh sách tới hạn (chờ tải xong, không giữ khóa engine lúc tải); trả về số danh sách đổi"""
+        changed = 0
+        with self._subscription_update_lock:
+            force = force or self._subscription_force
+            self._subscription_force = False
+            for subscription in self.config_manager.settings.subscriptions:
+                if not self.subscriptions_enabled:
+                    break
+                if not force and not self.subscription_updater.is_due(subscription, self.clock.time()):
+                    continue
+                delta = self.subscription_updater.refresh(subscription.url)
+                with self._lock:
+                    if delta is None:
+                        self.subscription_errors[subscription.url] = "Không tải được danh sách"
+                        continue
+                    self.subscription_errors.pop(subscription.url, None)
+                    if delta[0] or delta[1]:
+                        self._apply_subscription_delta(subscription.url, *delta)
+                        changed += 1
+        return changed
+    
+    def _apply_subscription_delta(self, url: str, added: FrozenSet[str], removed: FrozenSet[str]):
+        """Áp phần thay đổi của một danh sách vào hợp tên miền theo dõi"""
+        urls = self._subscription_urls()
+        if url not in urls:
+            # Danh sách bị bỏ khỏi cấu hình trong lúc tải
+            self.session_manager.delete_subscription(url)
+            return
+        if removed:
+            # Tên miền vẫn có trong danh sách khác thì vẫn chặn
+            removed = set(removed).difference(self.session_manager.get_subscribed_domains(urls, among=removed))
+        self._set_subscribed(self.subscribed_domains.difference(removed).union(added))
+    
+    # === KHÔI PHỤC SAU KHI KHỞI ĐỘNG LẠI ===
+    
+    def cleanup_leftover_blocks(self, blocking_active: Optional[bool] = None):
+        """Xóa các entry chặn còn sót lại từ lần chạy trước
+        
+        blocking_active: kết quả kiểm tra file hosts đã có sẵn (khởi động song song), None để tự đọc.
+        """
+        try:
+            if blocking_active is None:
+                blocking_active = self.website_blocker.is_blocking_active()
+            if blocking_active:
+                logger.info("Cleaning up leftover website blocks from previous session...")
+                self.website_blocker.remove_block_entries()
+        except Exception as e:
+            logger.error("Error cleaning up hosts file: %s", e)
+    
+    def find_unfinished_session(self) -> Optional[Dict[str, Any]]:
+        """Tìm phiên chưa kết thúc trong database (không tính phiên đang chạy)"""
+        with self._lock:
+            if self.is_active():
+                return None
+            session = self.session_manager.get_current_session()
+            if not session:
+                return None
+            return {
+                "id": session['id'],
+                "start_time": session['start_time'].isoformat(),
+                "planned_duration": session['planned_duration'],
+                "websites_blocked": session['websites_blocked'],
+                "paused": session['paused_since'] is not None,
+            }
+    
+    def resume_session(self, session_id: int) -> Dict[str, Any]:
+        """Tiếp tục phiên chưa kết thúc sau khi khởi động lại, đúng pha của chu kỳ"""
+        with self._lock:
+            if self.is_active():
+                raise EngineError("Đang có phiên tập trung chạy", "session_active")
+            
+            session = self.session_manager.get_current_session()
+            if not session or session['id'] != session_id:
+                raise EngineError(f"Không tìm thấy phiên {session_id}", "no_session")
+            
+            try:
+                plan = SessionPlan.from_dict("plan", session['plan']) if session['plan'] else None
+            except ConfigError as e:
+                logger.warning("Kế hoạch của phiên %s không hợp lệ (%s), coi như phiên đơn", session_id, e)
+                plan = None
+            # Phiên tạo trước khi có Pomodoro: một pha làm việc từ lúc bắt đầu phiên
+            plan = plan or SessionPlan.single(session['planned_duration'])
+            phase = session['phase']
+            self._begin(session_id, plan, session['websites_blocked'], True, session['profile'])
+            
+            if phase is None:
+                self._enter_phase(0, session['start_time'].timestamp())
+            elif phase['end_time'] is None and phase['index'] < len(self.phases):
+                # Pha đang chạy dở: thời gian còn lại do database tính (đã trừ các lần tạm dừng)
+                remaining = session['remaining_seconds']
+                if session['paused_since'] is not None:
+                    self.phase_index = phase['index']
+                    self.planned_duration = phase['planned_duration']
+                    self._pause(remaining)
+                else:
+                    self._set_phase(phase['index'], self.clock.time() + remaining)
+            elif phase['index'] + 1 < len(self.phases):
+                self._wait_for_phase(phase['index'] + 1)
+            else:
+                # Pha cuối đã xong nhưng phiên chưa được đóng
+                self._end(completed=True, notes="Hoàn thành đầy đủ", end_time=phase['end_time'])
+                self._notify("finished")
+                return self.status()
+        
+        self._notify("started")
+        # Các pha đã hết hạn trong lúc app không chạy được chuyển tiếp ngay
+        return self.poll()
+    
+    def discard_session(self, session_id: int, notes: str = "Bị gián đoạn do khởi động lại app") -> Dict[str, Any]:
+        """Đánh dấu phiên chưa kết thúc là bị gián đoạn"""
+        with self._lock:
+            if self.current_session_id == session_id:
+                raise EngineError("Không thể hủy phiên đang chạy", "session_active")
+            self.session_manager.end_session(session_id, completed=False, notes=notes)
+        return self.status()
+    
+    def recover(self):
+        """Khôi phục tự động khi chạy không có giao diện (daemon)"""
+        self.cleanup_leftover_blocks()
+        self.prepare_profiles()
+        self.start_schedules()
+        self.start_quotas()
+        self.start_sinkhole()
+        self.start_subscriptions()
+        session = self.find_unfinished_session()
+        if session:
+            logger.info("Tiếp tục phiên %s chưa kết thúc", session['id'])
+            self.resume_session(session['id'])
+    
+    def shutdown(self, notes: str = "Thoát ứng dụng"):
+        """Dừng phiên đang chạy (nếu có) trước khi thoát"""
+        stopped = False
+        with self._lock:
+            if self.is_active():
+                self._end(completed=False, notes=notes)
+                stopped = True
+            if self.schedules_enabled:
+                self._stop_schedules(notes)
+            if self.quotas_enabled:
+                self._stop_quotas()
+            self.subscriptions_enabled = False
+            self._subscription_wake.set()
+        if stopped:
+            self._notify("stopped")
+        if self.sinkhole is not None:
+            self.sinkhole.stop()
+            self.sinkhole = None
+        self.config_manager.flush()
+        self._scheduler.close()
@@ -0,0 +1,88 @@
+"""
+Bộ đệm khối chặn hosts đã biên dịch sẵn cho FocusGuard
+Mỗi hồ sơ chặn được biên dịch một lần thành khối văn bản giữa hai marker và giữ trong bộ nhớ theo phiên bản,
+nên bắt đầu phiên chỉ là thay khối chặn trong hosts file
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+from src.core.config_model import websites_version
+from src.core.website_blocker import WebsiteBlocker
+
+logger = logging.getLogger(__name__)
+
+# Số khối của danh sách ghép tạm thời (hồ sơ + lịch chặn, hạn mức, danh sách theo dõi) được giữ lại
+ADHOC_REGIONS = 2
+
+class HostsRegionCache:
+    """Khối chặn theo phiên bản danh sách website, chỉ giữ trong bộ nhớ
+    
+    Khối của các hồ sơ (prepare) được giữ tới lần prepare sau; các danh sách khác chỉ giữ vài khối dùng gần nhất.
+    """
+    
+    def __init__(self, cache_dir: Path, blocker: WebsiteBlocker, adhoc_limit: int = ADHOC_REGIONS):
+        # Thư mục các bản sao trên đĩa của phiên bản trước, chỉ còn dùng để dọn
+        self.cache_dir = Path(cache_dir)
+        self.blocker = blocker
+        self.adhoc_limit = adhoc_limit
+        self._prepared: Dict[str, str] = {}
+        self._adhoc: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._legacy_removed = False
+    
+    def _lookup(self, version: str) -> Optional[str]:
+        with self._lock:
+            region = self._prepared.get(version)
+            if region is None:
+                region = self._adhoc.get(version)
+                if region is not None:
+                    self._adhoc.move_to_end(version)
+            return region
+    
+    def get(self, websites: Sequence[str]) -> str:
+        """Khối chặn cho danh sách website (biên dịch nếu chưa có trong bộ đệm)"""
+        version = websites_version(websites)
+        region = self._lookup(version)
+        if region is not None:
+            return region
+        
+        region = self.blocker.build_region(list(websites))
+        with self._lock:
+            self._adhoc[version] = region
+            while len(self._adhoc) > self.adhoc_limit:
+                self._adhoc.popitem(last=False)
+        return region
+    
+    def prepare(self, lists: Iterable[Sequence[str]]) -> int:
+        """Biên dịch trước các danh sách (các hồ sơ) thay cho bộ đã chuẩn bị trước đó; trả về số khối"""
+        prepared = {}
+        for websites in lists:
+            version = websites_version(websites)
+            if version in prepared:
+                continue
+            region = self._lookup(version)
+            prepared[version] = region if region is not None else self.blocker.build_region(list(websites))
+        
+        with self._lock:
+            self._prepared = prepared
+            for version in prepared:
+                self._adhoc.pop(version, None)
+        self._remove_legacy_files()
+        return len(prepared)
+    
+    def _remove_legacy_files(self):
+        """Xóa các file <version>.hosts do phiên bản trước ghi (khối chặn không còn lưu trên đĩa)"""
+        if self._legacy_removed:
+            return
+        self._legacy_removed = True
+        try:
+            for path in self.cache_dir.glob("*.hosts"):
+                path.unlink()
+            if self.cache_dir.is_dir():
+                self.cache_dir.rmdir()
+        except OSError as e:
+            logger.warning("Không dọn được bộ đệm khối chặn cũ: %s", e)
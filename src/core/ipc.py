@@ -0,0 +1,192 @@
+"""
+Giao tiếp giữa các process FocusGuard qua Unix socket
+Mỗi kết nối gửi một request JSON trên một dòng và nhận một reply JSON
+"""
+
+import fcntl
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+def _runtime_dir() -> Path:
+    """Thư mục runtime của user (XDG_RUNTIME_DIR hoặc /tmp)"""
+    return Path(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir())
+
+def owner_uid() -> int:
+    """UID của người dùng sở hữu kênh: chạy bằng root qua sudo/pkexec thì là người gọi"""
+    if os.getuid() == 0:
+        for variable in ("SUDO_UID", "PKEXEC_UID"):
+            try:
+                return int(os.environ[variable])
+            except (KeyError, ValueError):
+                continue
+    return os.getuid()
+
+def socket_address(name: str) -> str:
+    """Địa chỉ socket cho một kênh (abstract socket trên Linux)"""
+    if sys.platform.startswith("linux"):
+        return f"\0focusguard-{name}-{owner_uid()}"
+    return str(_runtime_dir() / f"focusguard-{name}-{owner_uid()}.sock")
+
+def _peer_uid(conn: socket.socket) -> Optional[int]:
+    """UID của process ở đầu kia kết nối (SO_PEERCRED); None nếu nền tảng không hỗ trợ"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = struct.Struct("3i")  # pid, uid, gid
+    return credentials.unpack(conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size))[1]
+
+def _read_message(conn: socket.socket) -> Optional[Dict[str, Any]]:
+    """Đọc một message JSON kết thúc bằng xuống dòng"""
+    chunks = []
+    size = 0
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if chunk.endswith(b"\n") or size > MAX_MESSAGE_SIZE:
+            break
+    
+    data = b"".join(chunks).strip()
+    if not data:
+        return None
+    message = json.loads(data.decode("utf-8"))
+    return message if isinstance(message, dict) else None
+
+def _write_message(conn: socket.socket, message: Dict[str, Any]):
+    """Gửi một message JSON kết thúc bằng xuống dòng"""
+    conn.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+class IpcServer:
+    """Server Unix socket; bind thành công nghĩa là process này sở hữu kênh"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.address = socket_address(name)
+        self.is_abstract = self.address.startswith("\0")
+        # Abstract socket không có quyền file: chỉ nhận kết nối của chính user này (và root)
+        self.allowed_uids = {os.getuid(), owner_uid()}
+        self._socket: Optional[socket.socket] = None
+        self._lock_fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._handler: Optional[Handler] = None
+        self._closed = False
+    
+    def bind(self) -> bool:
+        """Chiếm kênh; trả về False nếu đã có process khác giữ"""
+        if not self.is_abstract and not self._acquire_file_lock():
+            return False
+        
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if not self.is_abstract and os.path.exists(self.address):
+                # Socket cũ còn sót lại (đã giữ lock nên chắc chắn không ai dùng)
+                os.unlink(self.address)
+            sock.bind(self.address)
+            if not self.is_abstract:
+                os.chmod(self.address, 0o600)
+                if os.getuid() != owner_uid():
+                    os.chown(self.address, owner_uid(), -1)
+            sock.listen(16)
+        except OSError:
+            sock.close()
+            return False
+        
+        self._socket = sock
+        return True
+    
+    def _acquire_file_lock(self) -> bool:
+        """Khóa fcntl đi kèm socket dạng file (nền tảng không có abstract socket)"""
+        fd = os.open(f"{self.address}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+    
+    def serve(self, handler: Handler):
+        """Bắt đầu nhận request trên thread nền"""
+        self._handler = handler
+        self._thread = threading.Thread(target=self._serve_forever, name=f"ipc-{self.name}", daemon=True)
+        self._thread.start()
+    
+    def _serve_forever(self):
+        """Vòng lặp nhận kết nối (mỗi kết nối một request)"""
+        while not self._closed:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                break
+            
+            with conn:
+                try:
+                    uid = _peer_uid(conn)
+                    if uid is not None and uid not in self.allowed_uids:
+                        logger.warning("Từ chối kết nối IPC từ uid %d", uid)
+                        continue
+                    conn.settimeout(2.0)
+                    request = _read_message(conn)
+                    if request is None:
+                        continue
+                    conn.settimeout(None)
+                    reply = self._handler(request)
+                    _write_message(conn, reply if reply is not None else {"ok": True})
+                except (OSError, ValueError) as e:
+                    logger.warning("Lỗi xử lý yêu cầu IPC: %s", e)
+                except Exception as e:
+                    try:
+                        _write_message(conn, {"ok": False, "error": str(e)})
+                    except OSError:
+                        pass
+    
+    def close(self):
+        """Đóng kênh"""
+        self._closed = True
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+            if not self.is_abstract:
+                try:
+                    os.unlink(self.address)
+                except OSError:
+                    pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+def send_request(name: str, request: Dict[str, Any], timeout: Optional[float] = 2.0) -> Optional[Dict[str, Any]]:
+    """Gửi request tới process đang giữ kênh; None nếu không có ai lắng nghe"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_address(name))
+    except OSError:
+        sock.close()
+        return None
+    
+    with sock:
+        try:
+            _write_message(sock, request)
+            return _read_message(sock) or {"ok": False, "error": "Không nhận được phản hồi"}
+        except socket.timeout:
+            return {"ok": False, "error": "Hết thời gian chờ phản hồi"}
@@ -0,0 +1,242 @@
+"""
+Các thuật toán dẫn xuất khóa (KDF) cho mật khẩu FocusGuard
+bcrypt (nếu có cài), scrypt và PBKDF2 từ thư viện chuẩn, với định dạng hash có phiên bản
+"""
+
+import base64
+import hashlib
+import hmac
+import importlib.util
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+# Định dạng: fg1$<kdf>$<k=v,k=v>$<payload>
+HASH_FORMAT_VERSION = "fg1"
+
+Params = Dict[str, int]
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+def _time_ms(func, repeat: int = 3) -> float:
+    """Đo thời gian chạy ngắn nhất (ms) của func"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return max(min(samples), 0.001)
+
+class KdfBackend(ABC):
+    """Giao diện chung cho một thuật toán KDF"""
+    name = ""
+    
+    def is_available(self) -> bool:
+        """Kiểm tra thuật toán dùng được trên máy này không"""
+        return True
+    
+    @abstractmethod
+    def default_params(self) -> Params:
+        """Tham số mặc định"""
+    
+    @abstractmethod
+    def hash(self, password: bytes, params: Params) -> str:
+        """Tạo payload hash cho mật khẩu"""
+    
+    @abstractmethod
+    def verify(self, password: bytes, params: Params, payload: str) -> bool:
+        """Kiểm tra mật khẩu với payload đã lưu"""
+    
+    @abstractmethod
+    def calibrate(self, target_ms: float) -> Params:
+        """Chọn tham số sao cho một lần xác thực mất khoảng target_ms"""
+    
+    def estimated_memory(self, params: Params) -> int:
+        """Bộ nhớ lý thuyết cần cho một lần dẫn xuất (byte)"""
+        return 0
+
+class BcryptKdf(KdfBackend):
+    """bcrypt (cần gói bcrypt đã biên dịch, chỉ import khi dùng tới)"""
+    name = "bcrypt"
+    min_cost = 10
+    max_cost = 16
+    calibration_cost = 8  # Cost dùng để đo, đủ nhanh để không làm chậm app
+    
+    def is_available(self) -> bool:
+        return importlib.util.find_spec("bcrypt") is not None
+    
+    def default_params(self) -> Params:
+        return {"cost": 12}
+    
+    def hash(self, password: bytes, params: Params) -> str:
+        import bcrypt
+        return bcrypt.hashpw(password, bcrypt.gensalt(rounds=params["cost"])).decode('ascii')
+    
+    def verify(self, password: bytes, params: Params, payload: str) -> bool:
+        # Cost nằm trong chính payload, hash bị sửa với cost quá lớn sẽ treo luồng xác thực
+        cost = self.cost_from_hash(payload)
+        if cost is None or cost > self.max_cost:
+            raise ValueError(f"Tham số bcrypt vượt giới hạn: cost={cost}")
+        import bcrypt
+        return bcrypt.checkpw(password, payload.encode('ascii'))
+    
+    def calibrate(self, target_ms: float) -> Params:
+        import bcrypt
+        
+        # Đo ở cost thấp rồi ngoại suy (mỗi bậc cost tăng gấp đôi thời gian)
+        salt = bcrypt.gensalt(rounds=self.calibration_cost)
+        measured_ms = _time_ms(lambda: bcrypt.hashpw(b"focusguard-calibration", salt))
+        cost = self.calibration_cost + int(math.floor(math.log2(target_ms / measured_ms)))
+        return {"cost": max(self.min_cost, min(self.max_cost, cost))}
+    
+    @staticmethod
+    def cost_from_hash(payload: str) -> Optional[int]:
+        """Đọc cost từ chuỗi hash bcrypt ($2b$12$...)"""
+        try:
+            return int(payload.split('$')[2])
+        except (IndexError, ValueError):
+            return None
+
+class ScryptKdf(KdfBackend):
+    """scrypt từ hashlib (cần OpenSSL >= 1.1)"""
+    name = "scrypt"
+    min_log_n = 14
+    # 2^17 với r=8: 128 MiB mỗi lần dẫn xuất; tham số (kể cả tham số lưu trong hash) vượt mức này bị từ chối
+    max_log_n = 17
+    max_memory = 128 * 2 ** 17 * 8
+    calibration_log_n = 12
+    
+    def is_available(self) -> bool:
+        return hasattr(hashlib, "scrypt")
+    
+    def default_params(self) -> Params:
+        return {"n": 2 ** 15, "r": 8, "p": 1}
+    
+    def _derive(self, password: bytes, salt: bytes, params: Params) -> bytes:
+        n, r, p = params["n"], params["r"], params["p"]
+        if not 2 <= n <= 2 ** self.max_log_n or r < 1 or p < 1 or self.estimated_memory(params) > self.max_memory:
+            raise ValueError(f"Tham số scrypt vượt giới hạn: n={n}, r={r}, p={p}")
+        return hashlib.scrypt(
+            password, salt=salt, n=n, r=r, p=p,
+            maxmem=self.estimated_memory(params) + 1024 * 1024, dklen=32
+        )
+    
+    def hash(self, password: bytes, params: Params) -> str:
+        salt = os.urandom(16)
+        return f"{_b64encode(salt)}${_b64encode(self._derive(password, salt, params))}"
+    
+    def verify(self, password: bytes, params: Params, payload: str) -> bool:
+        salt_text, digest_text = payload.split('$', 1)
+        digest = self._derive(password, _b64decode(salt_text), params)
+        return hmac.compare_digest(digest, _b64decode(digest_text))
+    
+    def calibrate(self, target_ms: float) -> Params:
+        # Thời gian scrypt tăng tuyến tính theo n
+        params = {"n": 2 ** self.calibration_log_n, "r": 8, "p": 1}
+        measured_ms = _time_ms(lambda: self._derive(b"focusguard-calibration", b"0" * 16, params))
+        log_n = self.calibration_log_n + int(math.floor(math.log2(target_ms / measured_ms)))
+        log_n = max(self.min_log_n, min(self.max_log_n, log_n))
+        return {"n": 2 ** log_n, "r": 8, "p": 1}
+    
+    def estimated_memory(self, params: Params) -> int:
+        return 128 * params["n"] * params["r"] * params["p"]
+
+class Pbkdf2Kdf(KdfBackend):
+    """PBKDF2-HMAC-SHA256 - luôn có sẵn, không cần thư viện ngoài"""
+    name = "pbkdf2_sha256"
+    min_iterations = 200_000
+    # Giới hạn cả số vòng đọc từ hash đã lưu
+    max_iterations = 10_000_000
+    calibration_iterations = 20_000
+    
+    def default_params(self) -> Params:
+        return {"i": 600_000}
+    
+    def _derive(self, password: bytes, salt: bytes, params: Params) -> bytes:
+        iterations = params["i"]
+        if not 1 <= iterations <= self.max_iterations:
+            raise ValueError(f"Tham số PBKDF2 vượt giới hạn: i={iterations}")
+        return hashlib.pbkdf2_hmac("sha256", password, salt, iterations)
+    
+    def hash(self, password: bytes, params: Params) -> str:
+        salt = os.urandom(16)
+        return f"{_b64encode(salt)}${_b64encode(self._derive(password, salt, params))}"
+    
+    def verify(self, password: bytes, params: Params, payload: str) -> bool:
+        salt_text, digest_text = payload.split('$', 1)
+        digest = self._derive(password, _b64decode(salt_text), params)
+        return hmac.compare_digest(digest, _b64decode(digest_text))
+    
+    def calibrate(self, target_ms: float) -> Params:
+        params = {"i": self.calibration_iterations}
+        measured_ms = _time_ms(lambda: self._derive(b"focusguard-calibration", b"0" * 16, params))
+        iterations = int(self.calibration_iterations * target_ms / measured_ms)
+        # Làm tròn xuống bội số 10000 để tham số ổn định giữa các lần hiệu chỉnh
+        iterations = iterations // 10_000 * 10_000
+        return {"i": max(self.min_iterations, min(self.max_iterations, iterations))}
+
+BACKENDS: Dict[str, KdfBackend] = {
+    backend.name: backend for backend in (BcryptKdf(), ScryptKdf(), Pbkdf2Kdf())
+}
+
+def get_backend(name: str) -> KdfBackend:
+    """Lấy backend theo tên (ValueError nếu không biết hoặc không có sẵn)"""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Thuật toán mã hóa không hỗ trợ: {name}")
+    if not backend.is_available():
+        raise ValueError(f"Thuật toán mã hóa không có sẵn trên máy này: {name}")
+    return backend
+
+def available_backends() -> List[KdfBackend]:
+    """Danh sách backend dùng được trên máy này"""
+    return [backend for backend in BACKENDS.values() if backend.is_available()]
+
+def default_backend_name() -> str:
+    """Backend mặc định: bcrypt nếu có, không thì scrypt, cuối cùng là PBKDF2"""
+    for name in ("bcrypt", "scrypt", "pbkdf2_sha256"):
+        if BACKENDS[name].is_available():
+            return name
+    return "pbkdf2_sha256"
+
+def encode_hash(name: str, params: Params, payload: str) -> str:
+    """Ghép hash theo định dạng có phiên bản"""
+    param_text = ",".join(f"{key}={value}" for key, value in sorted(params.items()))
+    return f"{HASH_FORMAT_VERSION}${name}${param_text}${payload}"
+
+def decode_hash(text: str) -> Tuple[str, Params, str]:
+    """Tách hash đã lưu thành (kdf, params, payload)
+    
+    File auth.hash cũ (bcrypt thô, không có header) vẫn được chấp nhận.
+    """
+    text = text.strip()
+    if text.startswith("$2"):
+        cost = BcryptKdf.cost_from_hash(text)
+        return "bcrypt", {"cost": cost} if cost is not None else {}, text
+    
+    parts = text.split('$', 3)
+    if len(parts) != 4 or parts[0] != HASH_FORMAT_VERSION:
+        raise ValueError("Định dạng hash không hợp lệ")
+    
+    _, name, param_text, payload = parts
+    params = {}
+    for item in filter(None, param_text.split(',')):
+        key, value = item.split('=', 1)
+        params[key] = int(value)
+    return name, params, payload
+
+def hash_password(password: str, name: str, params: Params) -> str:
+    """Mã hóa mật khẩu thành chuỗi hash có header"""
+    backend = get_backend(name)
+    return encode_hash(name, params, backend.hash(password.encode('utf-8'), params))
+
+def verify_password(password: str, stored: str) -> bool:
+    """Kiểm tra mật khẩu với chuỗi hash đã lưu"""
+    name, params, payload = decode_hash(stored)
+    return get_backend(name).verify(password.encode('utf-8'), params, payload)
@@ -0,0 +1,146 @@
+"""
+Pipeline ghi log không chặn cho FocusGuard
+Luồng gọi chỉ đẩy record vào hàng đợi (QueueHandler); một thread riêng (QueueListener) ghi ra
+file JSON-lines xoay vòng theo dung lượng, console và bộ đệm vòng cho màn hình Chẩn đoán
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+LOG_FILE_NAME = "focusguard.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+RING_CAPACITY = 1000
+
+def _record_to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+    entry = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+        "level": record.levelname,
+        "logger": record.name,
+        "thread": record.threadName,
+        "msg": record.getMessage(),
+    }
+    if record.exc_text:
+        entry["exc"] = record.exc_text
+    return entry
+
+class JsonLinesFormatter(logging.Formatter):
+    """Mỗi record là một dòng JSON"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(_record_to_dict(record), ensure_ascii=False)
+
+class RingBufferHandler(logging.Handler):
+    """Giữ N record gần nhất trong bộ nhớ (cho màn hình Chẩn đoán)"""
+    
+    def __init__(self, capacity: int = RING_CAPACITY):
+        super().__init__()
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+    
+    def emit(self, record: logging.LogRecord):
+        self._entries.append(_record_to_dict(record))
+    
+    def entries(self, min_level: int = logging.NOTSET) -> List[Dict[str, Any]]:
+        """Bản sao các record, cũ nhất trước"""
+        with self.lock:
+            entries = list(self._entries)
+        if min_level <= logging.NOTSET:
+            return entries
+        return [entry for entry in entries if logging.getLevelName(entry["level"]) >= min_level]
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Định dạng message trên luồng gọi, giữ traceback tách riêng cho JSON"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+class LogPipeline:
+    """Cấu hình root logger qua hàng đợi và một thread ghi log"""
+    
+    def __init__(self):
+        self.ring = RingBufferHandler()
+        self.log_path: Optional[Path] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._queue_handler: Optional[logging.Handler] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def started(self) -> bool:
+        return self._listener is not None
+    
+    def start(self, log_dir: Path, level: str = "INFO", console: bool = True):
+        """Bật pipeline (gọi một lần, càng sớm càng tốt)"""
+        with self._lock:
+            if self._listener is not None:
+                return
+            
+            handlers: List[logging.Handler] = [self.ring]
+            try:
+                log_dir.mkdir(parents=True, exist_ok=True)
+                self.log_path = log_dir / LOG_FILE_NAME
+                file_handler = logging.handlers.RotatingFileHandler(
+                    self.log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+                )
+                file_handler.setFormatter(JsonLinesFormatter())
+                handlers.append(file_handler)
+            except OSError as e:
+                self.log_path = None
+                sys.stderr.write(f"Không mở được file log: {e}\n")
+            
+            if console:
+                # Ghi console cũng trên thread của listener: stdout/stderr chậm không chặn luồng gọi
+                console_handler = logging.StreamHandler(sys.stderr)
+                console_handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+                handlers.append(console_handler)
+            
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            self._queue_handler = _QueueHandler(log_queue)
+            self._listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            
+            root = logging.getLogger()
+            root.addHandler(self._queue_handler)
+            self.set_level(level)
+            self._listener.start()
+            atexit.register(self.stop)
+    
+    def set_level(self, level: str):
+        """Đổi mức log lúc chạy; logger.debug() bị bỏ qua ngay tại chỗ khi mức cao hơn"""
+        logging.getLogger().setLevel(level)
+        # Log DEBUG của thư viện (matplotlib, PIL...) chỉ gây nhiễu
+        for name in ("matplotlib", "PIL"):
+            logging.getLogger(name).setLevel(max(logging.INFO, logging.getLogger().level))
+    
+    def stop(self):
+        """Ghi nốt các record còn trong hàng đợi và dừng thread"""
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()
+            logging.getLogger().removeHandler(self._queue_handler)
+            for handler in self._listener.handlers:
+                if handler is not self.ring:
+                    handler.close()
+            self._listener = None
+            self._queue_handler = None
+
+# Pipeline toàn cục của process
+pipeline = LogPipeline()
+
+def default_log_dir() -> Path:
+    """Thư mục cấu hình (cùng chỗ với config.json)"""
+    return Path.home() / ".config" / "focusguard"
@@ -0,0 +1,366 @@
+"""
+Registry metric trong process cho FocusGuard (counter, gauge, histogram bucket cố định)
+Xuất theo định dạng text của Prometheus qua HTTP 127.0.0.1 (tùy chọn) và file snapshot cho textfile collector
+"""
+
+import functools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from src.core.file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# Bucket mặc định cho độ trễ (giây)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+# === GIÁ TRỊ CỦA TỪNG BỘ NHÃN ===
+
+class _CounterValue:
+    __slots__ = ("_lock", "value")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class _GaugeValue:
+    __slots__ = ("_lock", "value")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+    
+    def set(self, value: float):
+        self.value = float(value)
+    
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+    
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+class _HistogramValue:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        # Mảng cấp phát sẵn, phần tử cuối là bucket +Inf
+        self.counts = array("Q", [0] * (len(bounds) + 1))
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+    
+    @contextmanager
+    def time(self):
+        """Đo thời gian chạy khối `with` (giây)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+# === METRIC ===
+
+class Metric(ABC):
+    """Một metric có tên, có thể có nhãn"""
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self._values[()] = self._new_value()
+    
+    @abstractmethod
+    def _new_value(self):
+        """Giá trị mới cho một bộ nhãn"""
+    
+    def labels(self, *values: str):
+        """Giá trị cho một bộ nhãn (nên giữ lại kết quả ở hot path)"""
+        key = tuple(str(value) for value in values)
+        value = self._values.get(key)
+        if value is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: cần nhãn {self.labelnames}, nhận {key}")
+            with self._lock:
+                value = self._values.setdefault(key, self._new_value())
+        return value
+    
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Các dòng mẫu theo định dạng text của Prometheus"""
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """Bộ đếm chỉ tăng"""
+    kind = "counter"
+    
+    def _new_value(self):
+        return _CounterValue()
+    
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+    
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value.value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Gauge(Metric):
+    """Giá trị tức thời"""
+    kind = "gauge"
+    
+    def _new_value(self):
+        return _GaugeValue()
+    
+    def set(self, value: float):
+        self._default.set(value)
+    
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+    
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+    
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value.value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Histogram(Metric):
+    """Histogram với bucket cố định"""
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+    
+    def observe(self, value: float):
+        self._default.observe(value)
+    
+    def time(self):
+        return self._default.time()
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, value in sorted(self._values.items()):
+            with value._lock:
+                counts, total, count = list(value.counts), value.sum, value.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    """Tập các metric của process"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+    
+    def _get_or_create(self, cls, name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} đã được đăng ký với kiểu khác")
+            return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+    
+    def render(self) -> str:
+        """Toàn bộ metric theo định dạng text của Prometheus"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+def timed(histogram: Histogram, *label_values: str) -> Callable:
+    """Decorator ghi thời gian chạy của hàm vào histogram"""
+    value = histogram.labels(*label_values) if label_values else histogram._default
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                value.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+# === METRIC CỦA FOCUSGUARD ===
+
+REGISTRY = Registry()
+
+SUDO_CALL_SECONDS = REGISTRY.histogram(
+    "focusguard_sudo_call_seconds", "Thời gian gọi sudo/helper", ("command",))
+HOSTS_WRITE_SECONDS = REGISTRY.histogram(
+    "focusguard_hosts_write_seconds", "Thời gian ghi file hosts (gồm sudo cp)")
+HOSTS_WRITE_BYTES = REGISTRY.counter(
+    "focusguard_hosts_write_bytes_total", "Tổng số byte đã ghi vào file hosts")
+SESSION_QUERY_SECONDS = REGISTRY.histogram(
+    "focusguard_session_query_seconds", "Thời gian truy vấn SQLite của SessionManager", ("query",))
+CHART_RENDER_SECONDS = REGISTRY.histogram(
+    "focusguard_chart_render_seconds", "Thời gian vẽ biểu đồ thống kê")
+PASSWORD_VERIFY_SECONDS = REGISTRY.histogram(
+    "focusguard_password_verify_seconds", "Thời gian xác thực mật khẩu (KDF)")
+TIMER_DRIFT_SECONDS = REGISTRY.histogram(
+    "focusguard_timer_drift_seconds", "Độ lệch của mỗi nhịp 1 giây của timer phiên",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+UI_STALL_SECONDS = REGISTRY.histogram(
+    "focusguard_ui_stall_seconds", "Thời lượng giao diện bị treo",
+    buckets=(0.25, 0.5, 1.0, 2.0, 5.0))
+SUBSCRIPTION_FETCH_SECONDS = REGISTRY.histogram(
+    "focusguard_subscription_fetch_seconds", "Thời gian tải và parse một danh sách chặn theo dõi", ("result",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+SINKHOLE_HITS = REGISTRY.counter(
+    "focusguard_sinkhole_hits_total", "Số lượt truy cập website bị chặn tới trang chặn")
+SESSION_ACTIVE = REGISTRY.gauge(
+    "focusguard_session_active", "1 nếu đang có phiên tập trung chạy")
+
+# === XUẤT METRIC ===
+
+class MetricsHttpServer:
+    """Endpoint /metrics trên 127.0.0.1 (chỉ bật khi cấu hình http_port)"""
+    
+    def __init__(self, port: int, registry: Registry = REGISTRY, host: str = "127.0.0.1"):
+        self.registry = registry
+        registry_ref = registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+    
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class TextfileExporter:
+    """Ghi snapshot metric ra file định kỳ (ghi nguyên tử cho node exporter textfile collector)"""
+    
+    def __init__(self, path: Path, interval: float = 15.0, registry: Registry = REGISTRY):
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+        self._thread.start()
+    
+    def write(self):
+        try:
+            atomic_write_text(self.path, self.registry.render())
+        except OSError as e:
+            logger.error("Lỗi ghi file metric: %s", e)
+    
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+    
+    def close(self):
+        """Dừng và ghi snapshot cuối cùng"""
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self.write()
+
+def start_exporters(settings, role: str) -> List[object]:
+    """Bật các kênh xuất metric theo section `metrics` của cấu hình
+    
+    role ("gui"/"daemon") thay cho {role} trong đường dẫn textfile để hai process không ghi đè nhau.
+    Trả về danh sách đối tượng có close().
+    """
+    exporters: List[object] = []
+    if settings.http_port:
+        try:
+            server = MetricsHttpServer(settings.http_port)
+            logger.info("Metric Prometheus tại http://127.0.0.1:%d/metrics", server.port)
+            exporters.append(server)
+        except OSError as e:
+            # Process khác (GUI hoặc daemon) có thể đã giữ cổng
+            logger.warning("Không mở được cổng metric %d: %s", settings.http_port, e)
+    if settings.textfile:
+        path = Path(settings.textfile.replace("{role}", role)).expanduser()
+        exporters.append(TextfileExporter(path, settings.textfile_interval))
+    return exporters
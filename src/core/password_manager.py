@@ -3,20 +3,31 @@ Quản lý mật khẩu bảo mật cho FocusGuard
 Mã hóa, xác thực và quản lý khóa tài khoản
 """
 
+import logging
 import os
-import bcrypt
-import time
+import json
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+from src.core.file_utils import atomic_write_text
+from src.core import kdf
+from src.core.clock import Clock, SYSTEM_CLOCK
+from src.core.metrics import PASSWORD_VERIFY_SECONDS
+
+logger = logging.getLogger(__name__)
 
 class PasswordManager:
     """Quản lý mật khẩu và bảo mật"""
     
-    def __init__(self):
+    def __init__(self, kdf_name: Optional[str] = None, clock: Clock = SYSTEM_CLOCK):
+        self.clock = clock
+        
         # Đường dẫn file lưu mật khẩu
         self.config_dir = Path.home() / ".config" / "focusguard"
         self.password_file = self.config_dir / "auth.hash"
         self.lockout_file = self.config_dir / "lockout.txt"
+        self.kdf_params_file = self.config_dir / "kdf.json"
         
         # Tạo thư mục nếu chưa tồn tại
         self.config_dir.mkdir(parents=True, exist_ok=True)
@@ -24,10 +35,22 @@ class PasswordManager:
         # Cấu hình bảo mật
         self.max_attempts = 3
         self.lockout_duration = 300  # 5 phút = 300 giây
+        self.target_verify_ms = 250  # Thời gian xác thực mong muốn trên máy hiện tại
         
-        # Trạng thái khóa
+        # Trạng thái khóa (giữ trong bộ nhớ, chỉ ghi file khi thay đổi)
         self._failed_attempts = 0
         self._lockout_until = 0
+        self._lockout_file_present = False
+        
+        # verify_password có thể chạy trên worker thread
+        self._lock = threading.RLock()
+        self._load_lockout_state()
+        
+        # Thuật toán mã hóa và tham số đã hiệu chỉnh cho máy này
+        self._kdf_settings = self._load_kdf_settings()
+        available = {backend.name for backend in kdf.available_backends()}
+        saved_kdf = self._kdf_settings.get("kdf")
+        self.kdf_name = kdf_name or (saved_kdf if saved_kdf in available else kdf.default_backend_name())
     
     def has_password(self) -> bool:
         """Kiểm tra đã có mật khẩu chưa"""
@@ -37,80 +60,158 @@ class PasswordManager:
         """Đặt mật khẩu mới"""
         try:
             # Mã hóa mật khẩu
-            password_bytes = password.encode('utf-8')
-            salt = bcrypt.gensalt()
-            hashed = bcrypt.hashpw(password_bytes, salt)
+            hashed = kdf.hash_password(password, self.kdf_name, self.get_target_params())
             
-            # Lưu vào file
-            with open(self.password_file, 'wb') as f:
-                f.write(hashed)
-            
-            # Đặt quyền chỉ owner đọc được
-            os.chmod(self.password_file, 0o600)
+            # Lưu vào file, chỉ owner đọc được
+            atomic_write_text(self.password_file, hashed, mode=0o600)
             
             return True
         except Exception as e:
-            print(f"Lỗi đặt mật khẩu: {e}")
+            logger.error("Lỗi đặt mật khẩu: %s", e)
             return False
     
+    def _load_kdf_settings(self) -> Dict:
+        """Đọc thuật toán và tham số đã hiệu chỉnh từ kdf.json"""
+        try:
+            with open(self.kdf_params_file, 'r') as f:
+                settings = json.load(f)
+            if isinstance(settings, dict) and settings.get("target_ms") == self.target_verify_ms:
+                settings.setdefault("params", {})
+                return settings
+        except (IOError, OSError, ValueError):
+            pass
+        return {"target_ms": self.target_verify_ms, "params": {}}
+    
+    def calibrate(self, target_ms: Optional[float] = None, kdf_name: Optional[str] = None) -> Dict[str, int]:
+        """Chọn tham số KDF sao cho một lần xác thực mất khoảng target_ms trên máy này"""
+        backend = kdf.get_backend(kdf_name or self.kdf_name)
+        return backend.calibrate(target_ms or self.target_verify_ms)
+    
+    def get_target_params(self) -> Dict[str, int]:
+        """Lấy tham số KDF đã hiệu chỉnh cho máy này (hiệu chỉnh một lần, lưu vào file)"""
+        with self._lock:
+            params = self._kdf_settings["params"].get(self.kdf_name)
+            if params:
+                return params
+            
+            params = self.calibrate()
+            self._kdf_settings["kdf"] = self.kdf_name
+            self._kdf_settings["params"][self.kdf_name] = params
+            try:
+                atomic_write_text(self.kdf_params_file, json.dumps(self._kdf_settings), mode=0o600)
+            except OSError as e:
+                logger.error("Lỗi lưu tham số mã hóa: %s", e)
+            
+            logger.info("Đã hiệu chỉnh %s: %s", self.kdf_name, params)
+            return params
+    
     def verify_password(self, password: str) -> bool:
-        """Xác thực mật khẩu"""
+        """Xác thực mật khẩu (an toàn khi gọi từ worker thread)"""
+        with self._lock:
+            return self._verify_password(password)
+    
+    def _verify_password(self, password: str) -> bool:
+        """Xác thực mật khẩu (gọi khi đã giữ lock)"""
         # Kiểm tra có bị khóa không
         if self.is_locked_out():
             return False
         
         try:
             # Đọc mật khẩu đã mã hóa
-            with open(self.password_file, 'rb') as f:
+            with open(self.password_file, 'r') as f:
                 stored_hash = f.read()
             
             # Kiểm tra mật khẩu
-            password_bytes = password.encode('utf-8')
-            is_correct = bcrypt.checkpw(password_bytes, stored_hash)
+            with PASSWORD_VERIFY_SECONDS.time():
+                is_correct = kdf.verify_password(password, stored_hash)
             
             if is_correct:
                 # Reset số lần thử sai
-                self._failed_attempts = 0
                 self._clear_lockout()
-                return True
-            else:
-                # Tăng số lần thử sai
-                self._failed_attempts += 1
                 
-                # Nếu đã thử sai quá nhiều lần
-                if self._failed_attempts >= self.max_attempts:
-                    self._lockout()
+                # Mã hóa lại nếu thuật toán/tham số đã lưu khác cấu hình cho máy này
+                name, params, _ = kdf.decode_hash(stored_hash)
+                if (name, params) != (self.kdf_name, self.get_target_params()):
+                    self.set_password(password)
                 
+                return True
+            else:
+                # Tăng số lần thử sai (được lưu lại qua các lần khởi động)
+                self._record_failed_attempt()
                 return False
                 
         except Exception as e:
-            print(f"Lỗi xác thực mật khẩu: {e}")
+            logger.error("Lỗi xác thực mật khẩu: %s", e)
             return False
     
+    def _load_lockout_state(self):
+        """Đọc trạng thái khóa đã lưu (chỉ một lần khi khởi tạo)"""
+        try:
+            with open(self.lockout_file, 'r') as f:
+                content = f.read().strip()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error("Lỗi đọc file khóa: %s", e)
+            return
+        
+        try:
+            if content.startswith('{'):
+                state = json.loads(content)
+                self._failed_attempts = int(state.get("failed_attempts", 0))
+                self._lockout_until = float(state.get("lockout_until", 0))
+            else:
+                # Định dạng cũ: chỉ có thời điểm hết khóa
+                self._lockout_until = float(content)
+            self._lockout_file_present = True
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("File khóa không hợp lệ, bỏ qua")
+    
+    def _save_lockout_state(self):
+        """Lưu trạng thái khóa (chỉ gọi khi trạng thái thay đổi)"""
+        try:
+            if self._failed_attempts == 0 and self._lockout_until == 0:
+                if self._lockout_file_present:
+                    os.remove(self.lockout_file)
+                    self._lockout_file_present = False
+                return
+            
+            atomic_write_text(
+                self.lockout_file,
+                json.dumps({
+                    "failed_attempts": self._failed_attempts,
+                    "lockout_until": self._lockout_until
+                }),
+                mode=0o600
+            )
+            self._lockout_file_present = True
+        except FileNotFoundError:
+            self._lockout_file_present = False
+        except OSError as e:
+            logger.error("Lỗi lưu file khóa: %s", e)
+    
     def is_locked_out(self) -> bool:
-        """Kiểm tra có bị khóa không"""
-        current_time = time.time()
+        """Kiểm tra có bị khóa không (chỉ đọc trạng thái trong bộ nhớ)"""
+        if not self._lockout_until:
+            return False
         
-        # Đọc thời gian khóa từ file
-        if self.lockout_file.exists():
-            try:
-                with open(self.lockout_file, 'r') as f:
-                    lockout_until = float(f.read().strip())
-                    if current_time < lockout_until:
-                        self._lockout_until = lockout_until
-                        return True
-                    else:
-                        # Hết thời gian khóa
-                        self._clear_lockout()
-            except:
-                pass
+        if self.clock.time() < self._lockout_until:
+            return True
         
+        # Hết thời gian khóa
+        with self._lock:
+            if self._lockout_until and self.clock.time() >= self._lockout_until:
+                self._clear_lockout()
         return False
     
+    def get_lockout_until(self) -> float:
+        """Lấy thời điểm hết khóa (epoch giây, 0 nếu không bị khóa)"""
+        return self._lockout_until if self.is_locked_out() else 0
+    
     def get_lockout_remaining(self) -> int:
         """Lấy thời gian còn lại của việc khóa (giây)"""
         if self.is_locked_out():
-            return max(0, int(self._lockout_until - time.time()))
+            return max(0, int(self._lockout_until - self.clock.time()))
         return 0
     
     def get_failed_attempts(self) -> int:
@@ -121,26 +222,29 @@ class PasswordManager:
         """Lấy số lần thử còn lại"""
         return max(0, self.max_attempts - self._failed_attempts)
     
+    def _record_failed_attempt(self):
+        """Ghi nhận một lần nhập sai"""
+        self._failed_attempts += 1
+        
+        # Nếu đã thử sai quá nhiều lần
+        if self._failed_attempts >= self.max_attempts:
+            self._lockout()
+        else:
+            self._save_lockout_state()
+    
     def _lockout(self):
         """Khóa tài khoản"""
-        self._lockout_until = time.time() + self.lockout_duration
-        
-        try:
-            with open(self.lockout_file, 'w') as f:
-                f.write(str(self._lockout_until))
-        except Exception as e:
-            print(f"Lỗi tạo file khóa: {e}")
+        self._lockout_until = self.clock.time() + self.lockout_duration
+        self._save_lockout_state()
     
     def _clear_lockout(self):
         """Xóa trạng thái khóa"""
+        if self._failed_attempts == 0 and self._lockout_until == 0:
+            return
+        
         self._failed_attempts = 0
         self._lockout_until = 0
-        
-        if self.lockout_file.exists():
-            try:
-                os.remove(self.lockout_file)
-            except Exception as e:
-                print(f"Lỗi xóa file khóa: {e}")
+        self._save_lockout_state()
     
     def change_password(self, old_password: str, new_password: str) -> bool:
         """Đổi mật khẩu"""
@@ -157,5 +261,5 @@ class PasswordManager:
             self._clear_lockout()
             return True
         except Exception as e:
-            print(f"Lỗi reset mật khẩu: {e}")
+            logger.error("Lỗi reset mật khẩu: %s", e)
             return False
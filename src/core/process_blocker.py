@@ -0,0 +1,249 @@
+"""
+Chặn ứng dụng gây xao nhãng (Discord, Steam, ...) trong phiên tập trung
+Nhận sự kiện exec từ netlink proc connector của Linux (cần CAP_NET_ADMIN); không có quyền thì quét /proc
+thưa và chỉ xét các PID mới xuất hiện
+"""
+
+import logging
+import os
+import select
+import signal
+import socket
+import struct
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Set
+
+from src.core.config_model import APP_ACTIONS
+
+logger = logging.getLogger(__name__)
+
+# Chu kỳ quét /proc khi không dùng được proc connector (giây)
+SCAN_INTERVAL = 2.0
+
+# Hằng số của linux/netlink.h, linux/connector.h, linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+
+_NLMSGHDR = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+_CN_MSG = struct.Struct("=IIIIHH")  # idx, val, seq, ack, len, flags
+_PROC_EVENT = struct.Struct("=IIQ")  # what, cpu, timestamp_ns
+_EXEC_EVENT = struct.Struct("=II")  # process_pid, process_tgid
+
+def process_names(pid: int) -> Set[str]:
+    """Các tên nhận diện tiến trình: comm, tên file thực thi và argv[0] (chữ thường; rỗng nếu đã thoát)"""
+    proc = Path("/proc") / str(pid)
+    names = set()
+    try:
+        stat = (proc / "stat").read_text()
+    except OSError:
+        return names
+    # "pid (comm) state ...": comm có thể chứa dấu cách và ngoặc; tiến trình zombie đã thoát
+    comm, _, rest = stat[stat.find("(") + 1:].rpartition(")")
+    if rest[1:2] in ("Z", "X"):
+        return names
+    names.add(comm.lower())
+    try:
+        names.add(os.path.basename(os.readlink(proc / "exe")).lower())
+    except OSError:
+        pass
+    try:
+        argv0 = (proc / "cmdline").read_bytes().split(b"\0", 1)[0]
+        if argv0:
+            names.add(os.path.basename(argv0.decode("utf-8", "replace")).lower())
+    except OSError:
+        pass
+    return names
+
+def list_pids() -> Set[int]:
+    """PID của mọi tiến trình đang chạy"""
+    return {int(name) for name in os.listdir("/proc") if name.isdigit()}
+
+class ProcConnector:
+    """Socket netlink nhận sự kiện tiến trình từ kernel; open() ném OSError nếu không có quyền"""
+    
+    def __init__(self):
+        self._sock: Optional[socket.socket] = None
+    
+    def open(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            sock.bind((0, CN_IDX_PROC))
+            self._control(sock, PROC_CN_MCAST_LISTEN)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+    
+    @staticmethod
+    def _control(sock: socket.socket, op: int):
+        payload = struct.pack("=I", op)
+        cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        sock.send(header + cn_msg)
+    
+    def fileno(self) -> int:
+        return self._sock.fileno()
+    
+    def read_exec_pids(self) -> List[int]:
+        """Đọc một gói tin, trả về TGID của các tiến trình vừa exec"""
+        data = self._sock.recv(65536)
+        pids = []
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length, msg_type = _NLMSGHDR.unpack_from(data, offset)[:2]
+            if length < _NLMSGHDR.size:
+                break
+            event = offset + _NLMSGHDR.size + _CN_MSG.size
+            if msg_type == NLMSG_DONE and event + _PROC_EVENT.size + _EXEC_EVENT.size <= offset + length:
+                what = _PROC_EVENT.unpack_from(data, event)[0]
+                if what == PROC_EVENT_EXEC:
+                    pids.append(_EXEC_EVENT.unpack_from(data, event + _PROC_EVENT.size)[1])
+            # Mỗi message căn theo 4 byte
+            offset += (length + 3) & ~3
+        return pids
+    
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._control(self._sock, PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+
+class ProcessBlocker:
+    """Kill (SIGKILL) hoặc tạm dừng (SIGSTOP) các tiến trình có tên trong danh sách khi chúng chạy
+    
+    on_hit(name, pid) được gọi trên thread của bộ chặn mỗi lần chặn một tiến trình.
+    """
+    
+    def __init__(self, names: Iterable[str], action: str = "kill",
+                 on_hit: Optional[Callable[[str, int], None]] = None, use_connector: bool = True,
+                 scan_interval: float = SCAN_INTERVAL):
+        if action not in APP_ACTIONS:
+            raise ValueError(f"action phải là một trong {APP_ACTIONS}, nhận {action!r}")
+        # Tên nhận diện -> tên trong cấu hình (comm bị kernel cắt còn 15 ký tự)
+        self.names = {}
+        for name in names:
+            name = name.lower()
+            self.names.setdefault(name[:15], name)
+            self.names[name] = name
+        self.action = action
+        self.on_hit = on_hit
+        self.use_connector = use_connector
+        self.scan_interval = scan_interval
+        self.hits: Counter = Counter()
+        self.mode: Optional[str] = None  # "netlink" / "scan" khi đang chạy
+        
+        self._lock = threading.Lock()
+        self._suspended: Set[int] = set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connector: Optional[ProcConnector] = None
+    
+    def start(self):
+        """Chặn các tiến trình đang chạy rồi theo dõi tiến trình mới trên thread nền"""
+        if self.use_connector:
+            connector = ProcConnector()
+            try:
+                connector.open()
+                self._connector = connector
+            except OSError as e:
+                logger.info("Không dùng được proc connector (%s), chuyển sang quét /proc", e)
+        self.mode = "netlink" if self._connector is not None else "scan"
+        
+        # Quét một lần sau khi đã đăng ký nhận sự kiện để không lọt tiến trình exec ở giữa
+        known = list_pids()
+        for pid in known:
+            self._check(pid)
+        
+        if self._connector is not None:
+            self._thread = threading.Thread(target=self._listen, name="process-blocker", daemon=True)
+        else:
+            self._thread = threading.Thread(target=self._scan, args=(known,), name="process-blocker", daemon=True)
+        self._thread.start()
+        logger.info("Chặn %d ứng dụng (%s, %s)", len(set(self.names.values())), self.action, self.mode)
+    
+    def stop(self):
+        """Dừng theo dõi và cho các tiến trình đã tạm dừng chạy tiếp"""
+        with self._lock:
+            self._stop_event.set()
+            suspended, self._suspended = self._suspended, set()
+        for pid in suspended:
+            try:
+                os.kill(pid, signal.SIGCONT)
+            except OSError:
+                pass
+        # Không chờ thread: nó tự thoát (và đóng socket) trong vòng một chu kỳ chờ
+        self._thread = None
+        self._connector = None
+        self.mode = None
+    
+    def _listen(self):
+        connector = self._connector
+        try:
+            self._listen_loop(connector)
+        finally:
+            connector.close()
+    
+    def _listen_loop(self, connector: ProcConnector):
+        while not self._stop_event.is_set():
+            try:
+                # Chờ có giới hạn để stop() không phải đóng socket từ thread khác
+                ready, _, _ = select.select([connector], [], [], 0.5)
+                if ready:
+                    for pid in connector.read_exec_pids():
+                        self._check(pid)
+            except OSError as e:
+                if self._stop_event.is_set():
+                    return
+                # Tràn buffer (ENOBUFS) làm mất sự kiện: quét bù một lần
+                logger.warning("Lỗi đọc proc connector: %s", e)
+                for pid in list_pids():
+                    self._check(pid)
+    
+    def _scan(self, known: Set[int]):
+        while not self._stop_event.wait(self.scan_interval):
+            try:
+                pids = list_pids()
+            except OSError as e:
+                logger.warning("Không đọc được /proc: %s", e)
+                continue
+            for pid in pids - known:
+                self._check(pid)
+            known = pids
+    
+    def _check(self, pid: int):
+        """Chặn tiến trình `pid` nếu tên của nó nằm trong danh sách"""
+        if pid <= 1 or pid == os.getpid():
+            return
+        matched = [self.names[alias] for alias in process_names(pid) if alias in self.names]
+        if not matched:
+            return
+        name = matched[0]
+        
+        with self._lock:
+            if self._stop_event.is_set() or pid in self._suspended:
+                return
+            try:
+                os.kill(pid, signal.SIGKILL if self.action == "kill" else signal.SIGSTOP)
+            except OSError as e:
+                logger.warning("Không chặn được %s (pid %d): %s", name, pid, e)
+                return
+            if self.action == "suspend":
+                self._suspended.add(pid)
+            self.hits[name] += 1
+        
+        logger.info("Đã chặn ứng dụng %s (pid %d)", name, pid)
+        if self.on_hit is not None:
+            try:
+                self.on_hit(name, pid)
+            except Exception as e:
+                logger.exception("Lỗi ghi lần chặn ứng dụng %s: %s", name, e)
@@ -0,0 +1,267 @@
+"""
+Đo thời gian các giai đoạn khởi động của FocusGuard
+Span lồng nhau rất nhẹ (tắt mặc định); bật bằng --profile-startup để in cây thời gian
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Biến môi trường dùng khi tự chạy lại interpreter với -X importtime
+IMPORTTIME_ENV = "FOCUSGUARD_IMPORTTIME_LOG"
+REEXEC_TIME_ENV = "FOCUSGUARD_REEXEC_TIME"
+STDERR_FD_ENV = "FOCUSGUARD_STDERR_FD"
+
+# Mã thoát khi vượt ngân sách thời gian tới lần vẽ đầu tiên
+EXIT_OVER_BUDGET = 3
+
+class Span:
+    """Một giai đoạn đã đo (thời gian tính bằng giây kể từ lúc bắt đầu process)"""
+    __slots__ = ("name", "start", "end", "children")
+    
+    def __init__(self, name: str, start: float, end: Optional[float] = None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.children: List["Span"] = []
+    
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+class ProfileOptions:
+    """Tùy chọn dòng lệnh của chế độ đo khởi động"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.imports = False
+        self.cprofile_path: Optional[str] = None
+        self.budget_ms: Optional[float] = None
+
+def parse_profile_args(argv: List[str]) -> ProfileOptions:
+    """Tách các tùy chọn --profile-startup khỏi argv (để Qt không nhận chúng)
+    
+    --profile-startup            in cây thời gian rồi thoát sau lần vẽ đầu tiên
+    --profile-imports            gộp dữ liệu -X importtime vào báo cáo
+    --profile-cprofile FILE      ghi kết quả cProfile ra FILE
+    --startup-budget-ms N        thoát với mã 3 nếu lần vẽ đầu tiên chậm hơn N ms
+    """
+    options = ProfileOptions()
+    rest = [argv[0]] if argv else []
+    args = iter(argv[1:])
+    for arg in args:
+        name, _, value = arg.partition("=")
+        if name == "--profile-startup":
+            options.enabled = True
+        elif name == "--profile-imports":
+            options.enabled = options.imports = True
+        elif name == "--profile-cprofile":
+            options.enabled = True
+            options.cprofile_path = value or next(args, None)
+        elif name == "--startup-budget-ms":
+            options.enabled = True
+            options.budget_ms = float(value or next(args, "0"))
+        else:
+            rest.append(arg)
+    argv[:] = rest
+    return options
+
+def _process_age() -> float:
+    """Thời gian (giây) từ lúc process được tạo tới giờ, 0 nếu không đọc được /proc"""
+    reexec_time = os.environ.get(REEXEC_TIME_ENV)
+    if reexec_time:
+        # Sau execv process giữ nguyên thời điểm tạo, tính từ lúc chạy lại
+        return max(0.0, time.time() - float(reexec_time))
+    try:
+        with open("/proc/self/stat") as f:
+            # Trường 22 là starttime (tick kể từ lúc boot); bỏ qua tên process có thể chứa dấu cách
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+def parse_importtime(text: str, limit: int = 15) -> List[Tuple[float, str]]:
+    """Lấy các module cấp cao nhất nặng nhất từ output -X importtime: [(ms, tên)]"""
+    pattern = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+    results = []
+    for line in text.splitlines():
+        match = pattern.match(line)
+        # Chỉ tính import cấp cao nhất (không thụt lề) để không cộng trùng
+        if match and len(match.group(3)) <= 1:
+            results.append((int(match.group(2)) / 1000.0, match.group(4)))
+    results.sort(reverse=True)
+    return results[:limit]
+
+class StartupProfiler:
+    """Ghi nhận cây span của quá trình khởi động"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.options = ProfileOptions()
+        self._origin = time.perf_counter()
+        self._process_age = 0.0
+        self.root = Span("startup", 0.0)
+        self._stack: List[Span] = [self.root]
+        self.marks: Dict[str, float] = {}
+        self._cprofile = None
+    
+    def enable(self, options: ProfileOptions):
+        """Bật đo (gọi càng sớm càng tốt trong main)"""
+        self.enabled = True
+        self.options = options
+        
+        stderr_fd = os.environ.pop(STDERR_FD_ENV, None)
+        if stderr_fd:
+            sys.stderr = open(int(stderr_fd), "w", buffering=1, encoding="utf-8", errors="replace")
+        
+        # Thời gian interpreter khởi động trước khi tới được đây
+        self._process_age = _process_age()
+        if self._process_age:
+            interpreter = Span("python_startup", -self._process_age, 0.0)
+            self.root.start = interpreter.start
+            self.root.children.append(interpreter)
+        
+        if options.cprofile_path:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+    
+    def now(self) -> float:
+        """Thời điểm hiện tại (giây) theo gốc của profiler"""
+        return time.perf_counter() - self._origin
+    
+    @contextmanager
+    def span(self, name: str):
+        """Đo một giai đoạn; các span lồng nhau tạo thành cây"""
+        if not self.enabled:
+            yield
+            return
+        
+        node = Span(name, self.now())
+        on_main_thread = threading.current_thread() is threading.main_thread()
+        if on_main_thread:
+            self._stack[-1].children.append(node)
+            self._stack.append(node)
+        else:
+            # Span từ thread khác được gắn thẳng vào gốc
+            node.name = f"{name} [{threading.current_thread().name}]"
+            self.root.children.append(node)
+        try:
+            yield
+        finally:
+            node.end = self.now()
+            if on_main_thread:
+                self._stack.pop()
+    
+    def mark(self, name: str):
+        """Ghi một mốc thời gian"""
+        if self.enabled:
+            self.marks[name] = self.now()
+    
+    def add_span(self, name: str, start: float, end: float):
+        """Thêm span đã đo sẵn vào gốc (ví dụ từ vòng lặp sự kiện tới lần vẽ đầu tiên)"""
+        if self.enabled:
+            span = Span(name, start, end)
+            self.root.children.append(span)
+    
+    def reexec_with_importtime(self, argv: List[str]):
+        """Chạy lại interpreter với -X importtime, stderr ghi ra file để gộp vào báo cáo"""
+        if os.environ.get(IMPORTTIME_ENV):
+            return
+        
+        import tempfile
+        fd, log_path = tempfile.mkstemp(prefix="focusguard-importtime-", suffix=".log")
+        os.environ[IMPORTTIME_ENV] = log_path
+        os.environ[REEXEC_TIME_ENV] = repr(time.time())
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Giữ stderr gốc cho traceback/log của Python, chỉ output importtime vào file
+        saved_fd = os.dup(2)
+        os.set_inheritable(saved_fd, True)
+        os.environ[STDERR_FD_ENV] = str(saved_fd)
+        os.dup2(fd, 2)
+        os.close(fd)
+        os.execv(sys.executable, [sys.executable, "-X", "importtime"] + argv)
+    
+    def _read_importtime(self) -> List[Tuple[float, str]]:
+        log_path = os.environ.get(IMPORTTIME_ENV)
+        if not log_path:
+            return []
+        try:
+            with open(log_path, encoding="utf-8", errors="replace") as f:
+                return parse_importtime(f.read())
+        except OSError:
+            return []
+    
+    def report(self) -> str:
+        """Cây thời gian dạng văn bản, các span cùng cấp sắp theo thời lượng giảm dần"""
+        end = self.marks.get("first_paint", self.now())
+        self.root.end = end
+        total = self.root.duration or 1e-9
+        
+        lines = [f"FocusGuard startup profile: {self.root.duration * 1000:.1f} ms"]
+        
+        def walk(span: Span, prefix: str, is_last: bool, depth: int):
+            branch = "" if depth == 0 else ("└─ " if is_last else "├─ ")
+            lines.append(
+                f"{span.duration * 1000:9.1f} ms {span.duration / total * 100:5.1f}%  {prefix}{branch}{span.name}"
+            )
+            children = sorted(span.children, key=lambda s: s.duration, reverse=True)
+            child_prefix = prefix if depth == 0 else prefix + ("   " if is_last else "│  ")
+            for index, child in enumerate(children):
+                walk(child, child_prefix, index == len(children) - 1, depth + 1)
+        
+        walk(self.root, "", True, 0)
+        
+        if self.marks:
+            lines.append("")
+            lines.append("Mốc thời gian:")
+            for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+                lines.append(f"{(at - self.root.start) * 1000:9.1f} ms  {name}")
+        
+        imports = self._read_importtime()
+        if imports:
+            lines.append("")
+            lines.append("Import nặng nhất (-X importtime, cộng dồn):")
+            for ms, module in imports:
+                lines.append(f"{ms:9.1f} ms  {module}")
+        
+        return "\n".join(lines)
+    
+    def finish(self) -> int:
+        """In báo cáo, ghi cProfile và kiểm tra ngân sách; trả về exit code"""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.options.cprofile_path)
+        
+        print(self.report())
+        if self._cprofile is not None:
+            print(f"Đã ghi cProfile: {self.options.cprofile_path}")
+        
+        log_path = os.environ.pop(IMPORTTIME_ENV, None)
+        if log_path:
+            try:
+                os.remove(log_path)
+            except OSError:
+                pass
+        
+        first_paint = self.marks.get("first_paint")
+        if first_paint is None:
+            print("Không ghi nhận được lần vẽ đầu tiên")
+            return 1
+        
+        elapsed_ms = (first_paint - self.root.start) * 1000
+        budget_ms = self.options.budget_ms
+        if budget_ms is not None and elapsed_ms > budget_ms:
+            print(f"Vượt ngân sách khởi động: {elapsed_ms:.1f} ms > {budget_ms:.0f} ms")
+            return EXIT_OVER_BUDGET
+        return 0
+
+# Profiler dùng chung cho cả process
+profiler = StartupProfiler()
@@ -0,0 +1,143 @@
+"""
+Bộ hẹn giờ theo hạn cho FocusGuard
+Một thread duy nhất chờ hạn gần nhất trong heap thay vì mỗi hạn một threading.Timer
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from src.core.clock import Clock, SYSTEM_CLOCK
+
+logger = logging.getLogger(__name__)
+
+class ScheduledCall:
+    """Một callback đã hẹn; cancel() để hủy"""
+    __slots__ = ("when", "seq", "callback", "pending", "_scheduler")
+    
+    def __init__(self, scheduler: "DeadlineScheduler", when: float, seq: int, callback: Callable[[], None]):
+        self._scheduler = scheduler
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        # False khi đã chạy hoặc đã hủy
+        self.pending = True
+    
+    def __lt__(self, other: "ScheduledCall") -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+    
+    def cancel(self):
+        """Hủy callback (không làm gì nếu đã chạy)"""
+        self._scheduler.cancel(self)
+
+class DeadlineScheduler:
+    """Chạy callback khi tới hạn (epoch giây theo clock), dùng chung một thread nền
+    
+    Với đồng hồ ảo (clock.realtime=False) không có thread: bên mô phỏng gọi run_due() sau khi tiến đồng hồ.
+    """
+    
+    def __init__(self, clock: Clock = SYSTEM_CLOCK, name: str = "deadline-scheduler", max_wait: float = 30.0):
+        self.clock = clock
+        self.name = name
+        # Thức dậy ít nhất mỗi max_wait giây: đồng hồ hệ thống có thể nhảy (chỉnh giờ, ngủ máy)
+        self.max_wait = max_wait
+        self._heap: List[ScheduledCall] = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+    
+    def schedule(self, when: float, callback: Callable[[], None]) -> ScheduledCall:
+        """Hẹn callback chạy tại thời điểm `when`"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler đã đóng")
+            call = ScheduledCall(self, when, next(self._counter), callback)
+            heapq.heappush(self._heap, call)
+            if self.clock.realtime and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            # Đánh thức thread nếu hạn mới sớm hơn hạn đang chờ
+            if self._heap[0] is call:
+                self._condition.notify()
+            return call
+    
+    def cancel(self, call: ScheduledCall):
+        """Hủy một callback; phần tử bị đánh dấu và bỏ qua khi lên đỉnh heap"""
+        with self._condition:
+            if not call.pending:
+                return
+            call.pending = False
+            self._cancelled += 1
+            # Dọn heap khi phần lớn là phần tử đã hủy
+            if self._cancelled > len(self._heap) // 2:
+                self._heap = [c for c in self._heap if c.pending]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+    
+    def next_deadline(self) -> Optional[float]:
+        """Hạn gần nhất còn hiệu lực (None nếu trống)"""
+        with self._condition:
+            self._drop_cancelled()
+            return self._heap[0].when if self._heap else None
+    
+    def _drop_cancelled(self):
+        while self._heap and not self._heap[0].pending:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+    
+    def _pop_due(self) -> Optional[ScheduledCall]:
+        self._drop_cancelled()
+        if self._heap and self._heap[0].when <= self.clock.time():
+            call = heapq.heappop(self._heap)
+            call.pending = False
+            return call
+        return None
+    
+    def _invoke(self, call: ScheduledCall):
+        try:
+            call.callback()
+        except Exception as e:
+            logger.exception("Lỗi callback hẹn giờ: %s", e)
+    
+    def run_due(self) -> int:
+        """Chạy mọi callback đã tới hạn trên thread gọi; trả về số callback đã chạy"""
+        count = 0
+        while True:
+            with self._condition:
+                call = self._pop_due()
+            if call is None:
+                return count
+            self._invoke(call)
+            count += 1
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    call = self._pop_due()
+                    if call is not None:
+                        break
+                    timeout = self.max_wait
+                    if self._heap:
+                        timeout = min(timeout, max(0.0, self._heap[0].when - self.clock.time()))
+                    self._condition.wait(timeout)
+            # Callback chạy ngoài khóa để nó có thể hẹn lại
+            self._invoke(call)
+    
+    def close(self):
+        """Dừng thread và bỏ mọi callback còn chờ"""
+        with self._condition:
+            self._closed = True
+            for call in self._heap:
+                call.pending = False
+            self._heap.clear()
+            self._cancelled = 0
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
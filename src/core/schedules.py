@@ -0,0 +1,124 @@
+"""
+Lịch chặn website theo giờ cho FocusGuard
+Mở rộng các quy tắc lặp lại thành khung giờ tuyệt đối theo giờ địa phương (đúng cả ngày đổi giờ DST)
+và gộp các khung chồng nhau thành dãy đoạn có danh sách chặn không đổi: mỗi lần ghi hosts là một ranh giới đoạn
+"""
+
+import bisect
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+from src.core.config_model import ScheduleRule
+
+# Số ngày tính trước; ranh giới cuối cùng là lúc dựng lại lịch
+HORIZON_DAYS = 7
+
+@dataclass(frozen=True)
+class Segment:
+    """Khoảng thời gian [start, end) với một danh sách chặn cố định"""
+    __slots__ = ("start", "end", "websites")
+    start: float  # epoch giây
+    end: float
+    websites: FrozenSet[str]
+
+def _local_timestamp(day: date, minute: int) -> float:
+    """Epoch của giờ địa phương `minute` phút sau nửa đêm ngày `day`
+    
+    Giờ không tồn tại (nhảy giờ mùa hè) tính theo độ lệch trước khi nhảy, tức rơi vào sau bước nhảy;
+    giờ lặp lại (lùi giờ) lấy lần đầu tiên.
+    """
+    day, minute = day + timedelta(days=minute // 1440), minute % 1440
+    return datetime.combine(day, dtime(minute // 60, minute % 60)).timestamp()
+
+def expand(rules: Iterable[ScheduleRule], default_websites: Iterable[str], start: float,
+           end: float) -> List[Tuple[float, float, FrozenSet[str]]]:
+    """Các khung chặn của quy tắc đang bật giao với [start, end)"""
+    default_websites = frozenset(default_websites)
+    rules = [rule for rule in rules if rule.enabled]
+    windows = []
+    # Bắt đầu từ hôm trước để lấy khung qua nửa đêm đang diễn ra
+    day = datetime.fromtimestamp(start).date() - timedelta(days=1)
+    last_day = datetime.fromtimestamp(end).date()
+    while day <= last_day:
+        for rule in rules:
+            if day.weekday() not in rule.days:
+                continue
+            window_start = _local_timestamp(day, rule.start)
+            window_end = _local_timestamp(day, rule.end if rule.end > rule.start else rule.end + 1440)
+            websites = frozenset(rule.websites) or default_websites
+            if window_end > start and window_start < end and websites:
+                windows.append((window_start, window_end, websites))
+        day += timedelta(days=1)
+    return windows
+
+def merge(windows: Iterable[Tuple[float, float, FrozenSet[str]]]) -> List[Segment]:
+    """Gộp các khung chồng nhau: đoạn liền kề có cùng danh sách chặn được nối lại"""
+    events = []
+    for window_start, window_end, websites in windows:
+        if window_end > window_start:
+            events.append((window_start, 1, websites))
+            events.append((window_end, -1, websites))
+    events.sort(key=lambda event: event[0])
+    
+    segments: List[Segment] = []
+    active: Counter = Counter()
+    index = 0
+    while index < len(events):
+        now = events[index][0]
+        # Áp mọi sự kiện cùng thời điểm trước khi xét danh sách mới
+        while index < len(events) and events[index][0] == now:
+            _, delta, websites = events[index]
+            active.update({website: delta for website in websites})
+            index += 1
+        if index == len(events):
+            break
+        
+        current = frozenset(website for website, count in active.items() if count > 0)
+        following = events[index][0]
+        if not current:
+            continue
+        if segments and segments[-1].end == now and segments[-1].websites == current:
+            segments[-1] = Segment(segments[-1].start, following, current)
+        else:
+            segments.append(Segment(now, following, current))
+    return segments
+
+class BlockSchedule:
+    """Lịch chặn đã gộp trong một khoảng thời gian, tra cứu bằng tìm kiếm nhị phân"""
+    
+    def __init__(self, segments: List[Segment], horizon: float):
+        self.segments = segments
+        self.horizon = horizon
+        self._starts = [segment.start for segment in segments]
+    
+    @classmethod
+    def build(cls, rules: Iterable[ScheduleRule], default_websites: Iterable[str], now: float,
+              days: int = HORIZON_DAYS) -> "BlockSchedule":
+        """Dựng lịch từ thời điểm `now` tới `days` ngày sau"""
+        horizon = now + days * 86400
+        return cls(merge(expand(rules, default_websites, now, horizon)), horizon)
+    
+    def _find(self, timestamp: float) -> int:
+        """Chỉ số đoạn cuối cùng bắt đầu không muộn hơn `timestamp` (-1 nếu không có)"""
+        return bisect.bisect_right(self._starts, timestamp) - 1
+    
+    def at(self, timestamp: float) -> Tuple[FrozenSet[str], float]:
+        """Danh sách chặn tại `timestamp` và thời điểm nó đổi tiếp theo (tối đa là horizon)"""
+        index = self._find(timestamp)
+        if index >= 0 and timestamp < self.segments[index].end:
+            return self.segments[index].websites, min(self.segments[index].end, self.horizon)
+        if index + 1 < len(self.segments):
+            return frozenset(), min(self.segments[index + 1].start, self.horizon)
+        return frozenset(), self.horizon
+    
+    def period_end(self, timestamp: float) -> Optional[float]:
+        """Cuối khoảng chặn liên tục chứa `timestamp` (qua các đoạn nối liền), None nếu đang không chặn"""
+        index = self._find(timestamp)
+        if index < 0 or timestamp >= self.segments[index].end:
+            return None
+        while index + 1 < len(self.segments) and self.segments[index + 1].start == self.segments[index].end:
+            index += 1
+        return self.segments[index].end
+
@@ -3,19 +3,27 @@ Quản lý lịch sử và thống kê thời gian tập trung
 Lưu trữ trong SQLite database
 """
 
+import logging
 import sqlite3
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Set, Tuple, Optional
+
+from src.core.clock import Clock, SYSTEM_CLOCK
+from src.core.metrics import SESSION_QUERY_SECONDS, timed
+
+logger = logging.getLogger(__name__)
 
 class SessionManager:
     """Quản lý phiên làm việc và thống kê"""
     
-    def __init__(self, data_dir: Path):
+    def __init__(self, data_dir: Path, clock: Clock = SYSTEM_CLOCK):
         self.db_path = data_dir / "sessions.db"
+        self.clock = clock
         self.init_database()
     
+    @timed(SESSION_QUERY_SECONDS, "init_database")
     def init_database(self):
         """Khởi tạo cơ sở dữ liệu"""
         try:
@@ -50,54 +58,257 @@ class SessionManager:
                 )
                 ''')
                 
+                # Kế hoạch chu kỳ (JSON), nguồn phiên (manual / schedule) và hồ sơ chặn kèm phiên bản,
+                # thêm vào database tạo trước đó
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(sessions)")}
+                if "plan" not in columns:
+                    cursor.execute("ALTER TABLE sessions ADD COLUMN plan TEXT")
+                if "source" not in columns:
+                    cursor.execute("ALTER TABLE sessions ADD COLUMN source TEXT NOT NULL DEFAULT 'manual'")
+                if "profile" not in columns:
+                    cursor.execute("ALTER TABLE sessions ADD COLUMN profile TEXT")
+                    cursor.execute("ALTER TABLE sessions ADD COLUMN profile_version TEXT")
+                # Lịch sử đọc các phiên mới nhất theo start_time, không quét cả bảng
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions (start_time)")
+                
+                # Các pha làm việc/nghỉ của từng phiên, để tiếp tục đúng chu kỳ sau khi khởi động lại
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS session_phases (
+                    session_id INTEGER NOT NULL REFERENCES sessions(id),
+                    phase_index INTEGER NOT NULL,
+                    kind TEXT NOT NULL,                -- work / break / long_break
+                    planned_duration INTEGER NOT NULL, -- phút
+                    start_time TIMESTAMP NOT NULL,
+                    end_time TIMESTAMP,
+                    completed BOOLEAN NOT NULL DEFAULT 0,
+                    PRIMARY KEY (session_id, phase_index)
+                )
+                ''')
+                
+                # Các lần tạm dừng; thời gian tập trung và thời gian còn lại trừ đi các khoảng này
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS session_pauses (
+                    session_id INTEGER NOT NULL REFERENCES sessions(id),
+                    phase_index INTEGER NOT NULL,
+                    start_time TIMESTAMP NOT NULL,
+                    end_time TIMESTAMP,                -- NULL: đang tạm dừng
+                    PRIMARY KEY (session_id, start_time)
+                )
+                ''')
+                
+                # Thời gian mở trong ngày của các website có hạn mức
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS site_usage (
+                    date DATE NOT NULL,
+                    website TEXT NOT NULL,
+                    used_seconds REAL NOT NULL DEFAULT 0,  -- không tính lần mở đang diễn ra
+                    opened_at TIMESTAMP,                   -- NULL: đang bị chặn
+                    PRIMARY KEY (date, website)
+                )
+                ''')
+                
+                # Số lần chặn ứng dụng (blocked_apps) trong từng phiên
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS app_hits (
+                    session_id INTEGER NOT NULL REFERENCES sessions(id),
+                    app TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    last_hit TIMESTAMP NOT NULL,
+                    PRIMARY KEY (session_id, app)
+                )
+                ''')
+                
+                # Lượt truy cập website bị chặn tới trang chặn (sinkhole), theo phiên
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS block_hits (
+                    session_id INTEGER NOT NULL REFERENCES sessions(id),
+                    domain TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (session_id, domain)
+                )
+                ''')
+                
+                # Thời gian CPU theo ứng dụng trong từng phiên (lấy mẫu, ghi một lần khi phiên kết thúc)
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS app_usage (
+                    session_id INTEGER NOT NULL REFERENCES sessions(id),
+                    app TEXT NOT NULL,
+                    cpu_seconds REAL NOT NULL DEFAULT 0,
+                    samples INTEGER NOT NULL DEFAULT 0,  -- số lần mẫu ứng dụng có dùng CPU
+                    PRIMARY KEY (session_id, app)
+                )
+                ''')
+                
+                # Danh sách chặn theo dõi: trạng thái tải (ETag/Last-Modified) và tên miền của từng URL
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    domain_count INTEGER NOT NULL DEFAULT 0
+                )
+                ''')
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS subscription_domains (
+                    url TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    PRIMARY KEY (url, domain)
+                ) WITHOUT ROWID
+                ''')
+                cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_subscription_domains_domain ON subscription_domains (domain)
+                ''')
+                
                 conn.commit()
-                print("Database initialized successfully")
+                logger.debug("Database initialized successfully")
                 
         except sqlite3.Error as e:
-            print(f"Lỗi khởi tạo database: {e}")
+            logger.error("Lỗi khởi tạo database: %s", e)
     
-    def start_session(self, planned_duration: int, websites_to_block: List[str]) -> int:
-        """Bắt đầu phiên tập trung mới"""
+    @timed(SESSION_QUERY_SECONDS, "start_session")
+    def start_session(self, planned_duration: int, websites_to_block: List[str], plan: Optional[Dict] = None,
+                      source: str = "manual", profile: Optional[str] = None,
+                      profile_version: Optional[str] = None) -> int:
+        """Bắt đầu phiên tập trung mới (planned_duration: tổng thời gian làm việc dự kiến)
+        
+        source: "manual" cho phiên người dùng bắt đầu, "schedule" cho khung chặn theo lịch.
+        profile/profile_version: hồ sơ chặn và phiên bản danh sách website lúc bắt đầu.
+        """
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
-                INSERT INTO sessions (start_time, planned_duration, websites_blocked)
-                VALUES (?, ?, ?)
+                INSERT INTO sessions (start_time, planned_duration, websites_blocked, plan, source,
+                                      profile, profile_version)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (
-                    datetime.now(),
+                    self.clock.now(),
                     planned_duration,
-                    json.dumps(websites_to_block)
+                    json.dumps(websites_to_block),
+                    json.dumps(plan) if plan is not None else None,
+                    source,
+                    profile,
+                    profile_version
                 ))
                 
                 session_id = cursor.lastrowid
                 conn.commit()
                 
-                print(f"Bắt đầu phiên {session_id}, dự kiến {planned_duration} phút")
+                logger.info("Bắt đầu phiên %d, dự kiến %d phút", session_id, planned_duration)
                 return session_id
                 
         except sqlite3.Error as e:
-            print(f"Lỗi bắt đầu phiên: {e}")
+            logger.error("Lỗi bắt đầu phiên: %s", e)
             return -1
     
-    def end_session(self, session_id: int, completed: bool = True, notes: str = ""):
-        """Kết thúc phiên tập trung"""
+    @timed(SESSION_QUERY_SECONDS, "start_phase")
+    def start_phase(self, session_id: int, phase_index: int, kind: str, planned_duration: int,
+                    start_time: datetime) -> bool:
+        """Ghi pha mới của phiên; pha trước còn mở được đóng (hoàn thành) tại start_time"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                UPDATE session_phases SET end_time = ?, completed = 1
+                WHERE session_id = ? AND end_time IS NULL
+                ''', (start_time, session_id))
+                conn.execute('''
+                INSERT OR REPLACE INTO session_phases (session_id, phase_index, kind, planned_duration, start_time)
+                VALUES (?, ?, ?, ?, ?)
+                ''', (session_id, phase_index, kind, planned_duration, start_time))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi ghi pha %s của phiên %s: %s", phase_index, session_id, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "end_phase")
+    def end_phase(self, session_id: int, phase_index: int, end_time: datetime, completed: bool = True):
+        """Đóng một pha (khi chờ người dùng trước lần nghỉ tiếp theo)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                UPDATE session_phases SET end_time = ?, completed = ?
+                WHERE session_id = ? AND phase_index = ? AND end_time IS NULL
+                ''', (end_time, completed, session_id, phase_index))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Lỗi kết thúc pha %s của phiên %s: %s", phase_index, session_id, e)
+    
+    @timed(SESSION_QUERY_SECONDS, "start_pause")
+    def start_pause(self, session_id: int, phase_index: int, start_time: datetime) -> bool:
+        """Ghi lần tạm dừng bắt đầu tại start_time trong pha `phase_index`"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                INSERT INTO session_pauses (session_id, phase_index, start_time) VALUES (?, ?, ?)
+                ''', (session_id, phase_index, start_time))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi tạm dừng phiên %s: %s", session_id, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "end_pause")
+    def end_pause(self, session_id: int, end_time: datetime) -> bool:
+        """Đóng lần tạm dừng đang mở của phiên"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                UPDATE session_pauses SET end_time = ? WHERE session_id = ? AND end_time IS NULL
+                ''', (end_time, session_id))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi tiếp tục phiên %s: %s", session_id, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "end_session")
+    def end_session(self, session_id: int, completed: bool = True, notes: str = "",
+                    end_time: Optional[datetime] = None):
+        """Kết thúc phiên tập trung (end_time: mặc định là bây giờ)"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 # Lấy thông tin phiên
-                cursor.execute('SELECT start_time FROM sessions WHERE id = ?', (session_id,))
+                cursor.execute('SELECT start_time, source FROM sessions WHERE id = ?', (session_id,))
                 result = cursor.fetchone()
                 
                 if not result:
-                    print(f"Không tìm thấy phiên {session_id}")
+                    logger.warning("Không tìm thấy phiên %s", session_id)
                     return
                 
                 start_time = datetime.fromisoformat(result[0])
-                end_time = datetime.now()
-                actual_duration = int((end_time - start_time).total_seconds() / 60)
+                end_time = end_time or self.clock.now()
+                
+                # Đóng pha và lần tạm dừng đang mở; thời gian tập trung chỉ tính các pha làm việc,
+                # trừ các lần tạm dừng và không vượt thời lượng dự kiến của pha
+                cursor.execute('''
+                UPDATE session_phases SET end_time = ?, completed = ?
+                WHERE session_id = ? AND end_time IS NULL
+                ''', (end_time, completed, session_id))
+                cursor.execute('''
+                UPDATE session_pauses SET end_time = ? WHERE session_id = ? AND end_time IS NULL
+                ''', (end_time, session_id))
+                cursor.execute('''
+                SELECT COUNT(*),
+                       SUM(CASE WHEN p.kind = 'work' THEN MIN(p.planned_duration,
+                           (julianday(p.end_time) - julianday(p.start_time)
+                            - COALESCE((SELECT SUM(julianday(q.end_time) - julianday(q.start_time))
+                                        FROM session_pauses q
+                                        WHERE q.session_id = p.session_id AND q.phase_index = p.phase_index), 0)
+                           ) * 1440) ELSE 0 END)
+                FROM session_phases p WHERE p.session_id = ?
+                ''', (session_id,))
+                phase_count, work_minutes = cursor.fetchone()
+                if phase_count:
+                    actual_duration = int(work_minutes + 1e-6)
+                else:
+                    # Phiên không có pha (tạo trước khi có Pomodoro)
+                    actual_duration = int((end_time - start_time).total_seconds() / 60)
                 
                 # Cập nhật phiên
                 cursor.execute('''
@@ -114,16 +325,18 @@ class SessionManager:
                     session_id
                 ))
                 
-                # Cập nhật thống kê hàng ngày
-                self._update_daily_stats(cursor, start_time.date(), actual_duration, completed)
+                # Cập nhật thống kê hàng ngày; khung chặn theo lịch chỉ nằm trong lịch sử
+                # (có thể trùng phiên người dùng, không tính hai lần)
+                if result[1] == "manual":
+                    self._update_daily_stats(cursor, start_time.date(), actual_duration, completed)
                 
                 conn.commit()
                 
                 status = "hoàn thành" if completed else "bị gián đoạn"
-                print(f"Kết thúc phiên {session_id} ({status}), thời gian thực: {actual_duration} phút")
+                logger.info("Kết thúc phiên %s (%s), thời gian thực: %s phút", session_id, status, actual_duration)
                 
         except sqlite3.Error as e:
-            print(f"Lỗi kết thúc phiên: {e}")
+            logger.error("Lỗi kết thúc phiên: %s", e)
     
     def _update_daily_stats(self, cursor, date, duration, completed):
         """Cập nhật thống kê hàng ngày"""
@@ -147,7 +360,7 @@ class SessionManager:
                     new_total_time,
                     new_completed,
                     new_interrupted,
-                    datetime.now(),
+                    self.clock.now(),
                     date
                 ))
             else:
@@ -163,39 +376,334 @@ class SessionManager:
                 ))
                 
         except sqlite3.Error as e:
-            print(f"Lỗi cập nhật thống kê hàng ngày: {e}")
+            logger.error("Lỗi cập nhật thống kê hàng ngày: %s", e)
     
+    @timed(SESSION_QUERY_SECONDS, "get_current_session")
     def get_current_session(self) -> Optional[Dict]:
-        """Lấy thông tin phiên hiện tại (chưa kết thúc)"""
+        """Lấy thông tin phiên người dùng hiện tại (chưa kết thúc)
+        
+        remaining_seconds: thời gian còn lại của pha mới nhất (trừ các lần tạm dừng, âm nếu đã quá hạn),
+        tính trong SQL; paused_since: lúc bắt đầu lần tạm dừng đang mở (None nếu không tạm dừng).
+        """
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                # Kèm pha mới nhất của phiên (nếu có) và các lần tạm dừng của pha trong cùng một truy vấn
                 cursor.execute('''
-                SELECT id, start_time, planned_duration, websites_blocked
-                FROM sessions 
-                WHERE end_time IS NULL 
-                ORDER BY start_time DESC 
-                LIMIT 1
-                ''')
+                WITH current AS (
+                    SELECT s.id, s.start_time, s.planned_duration, s.websites_blocked, s.plan, s.profile,
+                           p.phase_index, p.kind, p.planned_duration AS phase_duration,
+                           p.start_time AS phase_start, p.end_time AS phase_end
+                    FROM sessions s
+                    LEFT JOIN session_phases p ON p.session_id = s.id
+                         AND p.phase_index = (SELECT MAX(phase_index) FROM session_phases WHERE session_id = s.id)
+                    WHERE s.end_time IS NULL AND s.source = 'manual'
+                    ORDER BY s.start_time DESC
+                    LIMIT 1
+                )
+                SELECT c.id, c.start_time, c.planned_duration, c.websites_blocked, c.plan,
+                       c.phase_index, c.kind, c.phase_duration, c.phase_start, c.phase_end,
+                       o.start_time,
+                       COALESCE(c.phase_duration, c.planned_duration) * 60
+                       - (julianday(COALESCE(o.start_time, :now)) - julianday(COALESCE(c.phase_start, c.start_time))
+                          - COALESCE((SELECT SUM(julianday(q.end_time) - julianday(q.start_time))
+                                      FROM session_pauses q
+                                      WHERE q.session_id = c.id AND q.phase_index = COALESCE(c.phase_index, 0)
+                                        AND q.end_time IS NOT NULL), 0)) * 86400,
+                       c.profile
+                FROM current c
+                LEFT JOIN session_pauses o ON o.session_id = c.id AND o.end_time IS NULL
+                ''', {"now": self.clock.now()})
                 
                 result = cursor.fetchone()
                 if result:
+                    phase = None
+                    if result[5] is not None:
+                        phase = {
+                            'index': result[5],
+                            'kind': result[6],
+                            'planned_duration': result[7],
+                            'start_time': datetime.fromisoformat(result[8]),
+                            'end_time': datetime.fromisoformat(result[9]) if result[9] else None
+                        }
                     return {
                         'id': result[0],
                         'start_time': datetime.fromisoformat(result[1]),
                         'planned_duration': result[2],
-                        'websites_blocked': json.loads(result[3] or '[]')
+                        'websites_blocked': json.loads(result[3] or '[]'),
+                        'plan': json.loads(result[4]) if result[4] else None,
+                        'phase': phase,
+                        'paused_since': datetime.fromisoformat(result[10]) if result[10] else None,
+                        'remaining_seconds': result[11],
+                        'profile': result[12]
                     }
                 
         except sqlite3.Error as e:
-            print(f"Lỗi lấy phiên hiện tại: {e}")
+            logger.error("Lỗi lấy phiên hiện tại: %s", e)
         
         return None
     
+    @timed(SESSION_QUERY_SECONDS, "get_open_sessions")
+    def get_open_sessions(self, source: str) -> List[Dict]:
+        """Các phiên chưa kết thúc của một nguồn (vd phiên theo lịch còn mở sau khi app bị kill)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute('''
+                SELECT id, start_time, planned_duration FROM sessions
+                WHERE end_time IS NULL AND source = ?
+                ORDER BY start_time
+                ''', (source,)).fetchall()
+                return [
+                    {'id': row[0], 'start_time': datetime.fromisoformat(row[1]), 'planned_duration': row[2]}
+                    for row in rows
+                ]
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy phiên chưa kết thúc: %s", e)
+            return []
+    
+    @timed(SESSION_QUERY_SECONDS, "record_site_usage")
+    def record_site_usage(self, day: date, website: str, used_seconds: float,
+                          opened_at: Optional[datetime]) -> bool:
+        """Ghi thời gian đã dùng và trạng thái mở của website có hạn mức (một upsert mỗi lần đổi trạng thái)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                INSERT INTO site_usage (date, website, used_seconds, opened_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (date, website) DO UPDATE SET
+                    used_seconds = excluded.used_seconds, opened_at = excluded.opened_at
+                ''', (day, website, used_seconds, opened_at))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi ghi hạn mức của %s: %s", website, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "get_site_usage")
+    def get_site_usage(self, day: date) -> Dict[str, Dict]:
+        """Thời gian đã dùng trong ngày `day` của các website có hạn mức"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute('''
+                SELECT website, used_seconds, opened_at FROM site_usage WHERE date = ?
+                ''', (day,)).fetchall()
+                return {
+                    row[0]: {'used_seconds': row[1], 'opened_at': datetime.fromisoformat(row[2]) if row[2] else None}
+                    for row in rows
+                }
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy hạn mức website: %s", e)
+            return {}
+    
+    @timed(SESSION_QUERY_SECONDS, "get_open_sites")
+    def get_open_sites(self) -> List[Dict]:
+        """Các website có hạn mức còn ghi là đang mở (vd sau khi app bị kill)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute('''
+                SELECT date, website, used_seconds, opened_at FROM site_usage WHERE opened_at IS NOT NULL
+                ''').fetchall()
+                return [
+                    {'date': date.fromisoformat(row[0]), 'website': row[1], 'used_seconds': row[2],
+                     'opened_at': datetime.fromisoformat(row[3])}
+                    for row in rows
+                ]
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy website đang mở: %s", e)
+            return []
+    
+    @timed(SESSION_QUERY_SECONDS, "record_app_hit")
+    def record_app_hit(self, session_id: int, app: str) -> bool:
+        """Cộng một lần chặn ứng dụng `app` trong phiên"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                INSERT INTO app_hits (session_id, app, hits, last_hit) VALUES (?, ?, 1, ?)
+                ON CONFLICT (session_id, app) DO UPDATE SET hits = hits + 1, last_hit = excluded.last_hit
+                ''', (session_id, app, self.clock.now()))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi ghi lần chặn ứng dụng %s: %s", app, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "record_block_hits")
+    def record_block_hits(self, session_id: int, counts: Dict[str, int]) -> bool:
+        """Cộng một lô lượt truy cập bị chặn {tên miền: số lượt} của phiên (một transaction)"""
+        if not counts:
+            return True
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany('''
+                INSERT INTO block_hits (session_id, domain, hits) VALUES (?, ?, ?)
+                ON CONFLICT (session_id, domain) DO UPDATE SET hits = hits + excluded.hits
+                ''', [(session_id, domain, hits) for domain, hits in counts.items()])
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi ghi lượt truy cập bị chặn của phiên %s: %s", session_id, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "get_subscription")
+    def get_subscription(self, url: str) -> Optional[Dict]:
+        """Trạng thái tải của danh sách theo dõi (None nếu chưa tải lần nào)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute('''
+                SELECT etag, last_modified, checked_at, updated_at, domain_count FROM subscriptions WHERE url = ?
+                ''', (url,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy danh sách theo dõi %s: %s", url, e)
+            return None
+        if row is None:
+            return None
+        return {
+            'url': url,
+            'etag': row[0],
+            'last_modified': row[1],
+            'checked_at': datetime.fromisoformat(row[2]) if row[2] else None,
+            'updated_at': datetime.fromisoformat(row[3]) if row[3] else None,
+            'domains': row[4]
+        }
+    
+    @timed(SESSION_QUERY_SECONDS, "get_subscription_domains")
+    def get_subscription_domains(self, url: str) -> Set[str]:
+        """Tên miền đã lưu của một danh sách theo dõi"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return {row[0] for row in conn.execute(
+                    'SELECT domain FROM subscription_domains WHERE url = ?', (url,))}
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy tên miền của %s: %s", url, e)
+            return set()
+    
+    @timed(SESSION_QUERY_SECONDS, "get_subscribed_domains")
+    def get_subscribed_domains(self, urls: Iterable[str], among: Optional[Iterable[str]] = None) -> Set[str]:
+        """Hợp tên miền của các danh sách `urls` (among: chỉ xét các tên miền này)"""
+        urls = list(urls)
+        if not urls:
+            return set()
+        domains = set()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                url_marks = ",".join("?" * len(urls))
+                if among is None:
+                    for row in conn.execute(
+                            f'SELECT DISTINCT domain FROM subscription_domains WHERE url IN ({url_marks})', urls):
+                        domains.add(row[0])
+                    return domains
+                among = list(among)
+                # Chia lô để không vượt giới hạn số tham số của SQLite
+                for start in range(0, len(among), 500):
+                    chunk = among[start:start + 500]
+                    for row in conn.execute(f'''
+                    SELECT DISTINCT domain FROM subscription_domains
+                    WHERE url IN ({url_marks}) AND domain IN ({",".join("?" * len(chunk))})
+                    ''', urls + chunk):
+                        domains.add(row[0])
+                return domains
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy tên miền theo dõi: %s", e)
+            return domains
+    
+    @timed(SESSION_QUERY_SECONDS, "update_subscription")
+    def update_subscription(self, url: str, added: Iterable[str], removed: Iterable[str], etag: Optional[str],
+                            last_modified: Optional[str], checked_at: datetime) -> bool:
+        """Áp phần thay đổi của danh sách theo dõi và trạng thái tải mới (một transaction)"""
+        added = list(added)
+        removed = list(removed)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany('INSERT OR IGNORE INTO subscription_domains (url, domain) VALUES (?, ?)',
+                                 [(url, domain) for domain in added])
+                conn.executemany('DELETE FROM subscription_domains WHERE url = ? AND domain = ?',
+                                 [(url, domain) for domain in removed])
+                count = conn.execute('SELECT COUNT(*) FROM subscription_domains WHERE url = ?', (url,)).fetchone()[0]
+                conn.execute('''
+                INSERT INTO subscriptions (url, etag, last_modified, checked_at, updated_at, domain_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified, checked_at = excluded.checked_at,
+                    updated_at = COALESCE(excluded.updated_at, updated_at), domain_count = excluded.domain_count
+                ''', (url, etag, last_modified, checked_at, checked_at if added or removed else None, count))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi lưu danh sách theo dõi %s: %s", url, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "delete_subscription")
+    def delete_subscription(self, url: str) -> bool:
+        """Xóa danh sách theo dõi đã bỏ khỏi cấu hình"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('DELETE FROM subscription_domains WHERE url = ?', (url,))
+                conn.execute('DELETE FROM subscriptions WHERE url = ?', (url,))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi xóa danh sách theo dõi %s: %s", url, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "get_subscription_urls")
+    def get_subscription_urls(self) -> List[str]:
+        """URL của các danh sách theo dõi đã lưu"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return [row[0] for row in conn.execute('SELECT url FROM subscriptions')]
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy danh sách theo dõi: %s", e)
+            return []
+    
+    @timed(SESSION_QUERY_SECONDS, "record_app_usage")
+    def record_app_usage(self, session_id: int, usage: Dict[str, Tuple[float, int]]) -> bool:
+        """Cộng thời gian CPU theo ứng dụng {app: (giây CPU, số mẫu)} của phiên (một transaction)"""
+        if not usage:
+            return True
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany('''
+                INSERT INTO app_usage (session_id, app, cpu_seconds, samples) VALUES (?, ?, ?, ?)
+                ON CONFLICT (session_id, app) DO UPDATE SET
+                    cpu_seconds = cpu_seconds + excluded.cpu_seconds, samples = samples + excluded.samples
+                ''', [(session_id, app, cpu, samples) for app, (cpu, samples) in usage.items()])
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error("Lỗi ghi ứng dụng của phiên %s: %s", session_id, e)
+            return False
+    
+    @timed(SESSION_QUERY_SECONDS, "get_app_usage_summary")
+    def get_app_usage_summary(self, limit: int = 5) -> Dict:
+        """Các ứng dụng dùng nhiều CPU nhất hôm nay và trong phiên gần nhất có dữ liệu"""
+        summary = {'today': [], 'session_id': None, 'session': []}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute('''
+                SELECT u.app, SUM(u.cpu_seconds) AS cpu FROM app_usage u JOIN sessions s ON s.id = u.session_id
+                WHERE date(s.start_time) = ?
+                GROUP BY u.app ORDER BY cpu DESC LIMIT ?
+                ''', (self.clock.now().date().isoformat(), limit)).fetchall()
+                summary['today'] = [{'app': row[0], 'cpu_seconds': row[1]} for row in rows]
+                
+                row = conn.execute('''
+                SELECT u.session_id FROM app_usage u JOIN sessions s ON s.id = u.session_id
+                ORDER BY s.start_time DESC LIMIT 1
+                ''').fetchone()
+                if row:
+                    summary['session_id'] = row[0]
+                    rows = conn.execute('''
+                    SELECT app, cpu_seconds FROM app_usage WHERE session_id = ? ORDER BY cpu_seconds DESC LIMIT ?
+                    ''', (row[0], limit)).fetchall()
+                    summary['session'] = [{'app': row[0], 'cpu_seconds': row[1]} for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Lỗi lấy thống kê ứng dụng: %s", e)
+        return summary
+    
+    @timed(SESSION_QUERY_SECONDS, "get_today_stats")
     def get_today_stats(self) -> Dict:
         """Lấy thống kê hôm nay"""
-        today = datetime.now().date()
+        today = self.clock.now().date()
         
         try:
             with sqlite3.connect(self.db_path) as conn:
@@ -222,7 +730,7 @@ class SessionManager:
                     }
                     
         except sqlite3.Error as e:
-            print(f"Lỗi lấy thống kê hôm nay: {e}")
+            logger.error("Lỗi lấy thống kê hôm nay: %s", e)
             return {
                 'total_focus_time': 0,
                 'sessions_completed': 0,
@@ -230,9 +738,10 @@ class SessionManager:
                 'success_rate': 0
             }
     
+    @timed(SESSION_QUERY_SECONDS, "get_week_stats")
     def get_week_stats(self) -> List[Dict]:
         """Lấy thống kê 7 ngày gần nhất"""
-        end_date = datetime.now().date()
+        end_date = self.clock.now().date()
         start_date = end_date - timedelta(days=6)
         
         try:
@@ -276,22 +785,31 @@ class SessionManager:
                 return week_stats
                 
         except sqlite3.Error as e:
-            print(f"Lỗi lấy thống kê tuần: {e}")
+            logger.error("Lỗi lấy thống kê tuần: %s", e)
             return []
     
+    @timed(SESSION_QUERY_SECONDS, "get_recent_sessions")
     def get_recent_sessions(self, limit: int = 10) -> List[Dict]:
         """Lấy danh sách phiên gần nhất"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                # Chọn `limit` phiên trước rồi mới cộng số lần chặn cho các phiên đó
                 cursor.execute('''
-                SELECT id, start_time, end_time, planned_duration, actual_duration,
-                       completed, interrupted, notes
-                FROM sessions
-                WHERE end_time IS NOT NULL
-                ORDER BY start_time DESC
-                LIMIT ?
+                SELECT recent.id, recent.start_time, recent.end_time, recent.planned_duration,
+                       recent.actual_duration, recent.completed, recent.interrupted, recent.notes, recent.profile,
+                       (SELECT SUM(hits) FROM app_hits WHERE app_hits.session_id = recent.id),
+                       (SELECT SUM(hits) FROM block_hits WHERE block_hits.session_id = recent.id)
+                FROM (
+                    SELECT id, start_time, end_time, planned_duration, actual_duration,
+                           completed, interrupted, notes, profile
+                    FROM sessions
+                    WHERE end_time IS NOT NULL
+                    ORDER BY start_time DESC
+                    LIMIT ?
+                ) AS recent
+                ORDER BY recent.start_time DESC
                 ''', (limit,))
                 
                 results = cursor.fetchall()
@@ -306,11 +824,14 @@ class SessionManager:
                         'actual_duration': row[4] or 0,
                         'completed': bool(row[5]),
                         'interrupted': bool(row[6]),
-                        'notes': row[7] or ""
+                        'notes': row[7] or "",
+                        'profile': row[8],
+                        'app_hits': row[9] or 0,
+                        'blocked_attempts': row[10] or 0
                     })
                 
                 return sessions
                 
         except sqlite3.Error as e:
-            print(f"Lỗi lấy lịch sử phiên: {e}")
+            logger.error("Lỗi lấy lịch sử phiên: %s", e)
             return []
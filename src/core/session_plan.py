@@ -0,0 +1,115 @@
+"""
+Kế hoạch phiên theo chu kỳ Pomodoro cho FocusGuard
+Một phiên là dãy pha làm việc/nghỉ ngắn/nghỉ dài được mô tả khai báo bằng SessionPlan
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Tuple
+
+from src.core.config_model import AppConfig, ConfigError
+
+PHASE_WORK = "work"
+PHASE_BREAK = "break"
+PHASE_LONG_BREAK = "long_break"
+
+PHASE_LABELS = {
+    PHASE_WORK: "Tập trung",
+    PHASE_BREAK: "Nghỉ ngắn",
+    PHASE_LONG_BREAK: "Nghỉ dài",
+}
+
+@dataclass(frozen=True)
+class Phase:
+    """Một pha của phiên"""
+    __slots__ = ("kind", "duration", "block")
+    kind: str
+    duration: int  # phút
+    block: bool  # chặn website trong pha này
+    
+    def blocklist(self, websites: Iterable[str]) -> FrozenSet[str]:
+        """Tập website thực sự bị chặn trong pha"""
+        return frozenset(websites) if self.block else frozenset()
+
+@dataclass(frozen=True)
+class SessionPlan:
+    """Chu kỳ làm việc/nghỉ của một phiên; cycles=1 là phiên đếm ngược đơn như trước"""
+    __slots__ = ("work_duration", "break_duration", "long_break_duration", "cycles", "long_break_every",
+                 "block_during_breaks", "auto_start_break")
+    work_duration: int  # phút
+    break_duration: int  # phút
+    long_break_duration: int  # phút
+    cycles: int  # số pha làm việc
+    long_break_every: int  # nghỉ dài sau mỗi N pha làm việc
+    block_during_breaks: bool
+    auto_start_break: bool  # False: chờ người dùng trước mỗi lần nghỉ
+    
+    @classmethod
+    def single(cls, duration: int) -> "SessionPlan":
+        """Phiên một pha làm việc"""
+        return cls(duration, 0, 0, 1, 1, False, True)
+    
+    @classmethod
+    def from_settings(cls, settings: AppConfig, work_duration: int, cycles: int = 1) -> "SessionPlan":
+        """Kế hoạch theo cấu hình (break_duration, auto_start_break, section pomodoro)"""
+        if cycles == 1:
+            return cls.single(work_duration)
+        pomodoro = settings.pomodoro
+        return cls.from_dict("plan", {
+            "work_duration": work_duration,
+            "break_duration": settings.break_duration,
+            "long_break_duration": pomodoro.long_break_duration,
+            "cycles": cycles,
+            "long_break_every": pomodoro.long_break_every,
+            "block_during_breaks": pomodoro.block_during_breaks,
+            "auto_start_break": settings.auto_start_break,
+        })
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Any) -> "SessionPlan":
+        """Parse kế hoạch đã lưu (cột plan của bảng sessions); ConfigError nếu sai"""
+        if not isinstance(data, dict):
+            raise ConfigError(key, f"cần object, nhận {data!r}")
+        
+        def minutes(name: str, minimum: int, maximum: int) -> int:
+            value = data.get(name)
+            if isinstance(value, bool) or not isinstance(value, int) or not minimum <= value <= maximum:
+                raise ConfigError(f"{key}.{name}", f"cần số nguyên từ {minimum} đến {maximum}, nhận {value!r}")
+            return value
+        
+        def flag(name: str) -> bool:
+            value = data.get(name)
+            if not isinstance(value, bool):
+                raise ConfigError(f"{key}.{name}", f"cần giá trị true/false, nhận {value!r}")
+            return value
+        
+        cycles = minutes("cycles", 1, 24)
+        return cls(
+            work_duration=minutes("work_duration", 1, 999),
+            break_duration=minutes("break_duration", 0 if cycles == 1 else 1, 999),
+            long_break_duration=minutes("long_break_duration", 0 if cycles == 1 else 1, 999),
+            cycles=cycles,
+            long_break_every=minutes("long_break_every", 1, 24),
+            block_during_breaks=flag("block_during_breaks"),
+            auto_start_break=flag("auto_start_break"),
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @property
+    def total_work(self) -> int:
+        """Tổng thời gian làm việc dự kiến (phút)"""
+        return self.work_duration * self.cycles
+    
+    def phases(self) -> Tuple[Phase, ...]:
+        """Dãy pha: làm việc xen kẽ nghỉ, kết thúc bằng pha làm việc cuối"""
+        phases = []
+        for cycle in range(1, self.cycles + 1):
+            phases.append(Phase(PHASE_WORK, self.work_duration, True))
+            if cycle == self.cycles:
+                break
+            if cycle % self.long_break_every == 0:
+                phases.append(Phase(PHASE_LONG_BREAK, self.long_break_duration, self.block_during_breaks))
+            else:
+                phases.append(Phase(PHASE_BREAK, self.break_duration, self.block_during_breaks))
+        return tuple(phases)
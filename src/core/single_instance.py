@@ -0,0 +1,34 @@
+"""
+Đảm bảo chỉ có một instance FocusGuard GUI
+Dùng abstract Unix socket (O(1), không quét process); lần chạy thứ hai chuyển lệnh qua socket rồi thoát
+"""
+
+from typing import Any, Dict, Optional
+
+from src.core.ipc import Handler, IpcServer, send_request
+
+class SingleInstance:
+    """Khóa instance duy nhất kèm kênh nhận lệnh từ các lần chạy sau"""
+    
+    def __init__(self, name: str = "gui"):
+        self.name = name
+        self._server = IpcServer(name)
+        self.is_primary = False
+    
+    def acquire(self) -> bool:
+        """Chiếm quyền instance chính; False nếu đã có instance khác đang chạy"""
+        self.is_primary = self._server.bind()
+        return self.is_primary
+    
+    def listen(self, handler: Handler):
+        """Bắt đầu nhận lệnh (handler chạy trên thread nền)"""
+        self._server.serve(handler)
+    
+    def forward(self, command: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Gửi lệnh tới instance đang chạy"""
+        return send_request(self.name, dict(kwargs, command=command))
+    
+    def release(self):
+        """Giải phóng khóa"""
+        self._server.close()
+        self.is_primary = False
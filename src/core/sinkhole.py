@@ -0,0 +1,197 @@
+"""
+Máy chủ HTTP "hố đen" cho các tên miền bị chặn
+Tên miền bị chặn trỏ về 127.0.0.1: thay vì lỗi kết nối, trình duyệt nhận một trang chặn tĩnh kèm thời gian
+còn lại của phiên. Lượt truy cập được đếm trong bộ nhớ và ghi vào database theo lô
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from html import escape as html_escape
+from typing import Callable, Dict, Optional, Tuple
+
+from src.core.metrics import SINKHOLE_HITS
+
+logger = logging.getLogger(__name__)
+
+# Giới hạn phần đầu của một request; request lớn hơn bị đóng kết nối
+MAX_HEADER_BYTES = 8192
+# Kết nối keep-alive không gửi gì trong khoảng này thì bị đóng (giây)
+IDLE_TIMEOUT = 15.0
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>FocusGuard</title>
+<style>body{{font-family:sans-serif;text-align:center;margin-top:15%;color:#333}}h1{{color:#2196F3}}</style>
+</head><body><h1>🔒 Website đang bị chặn</h1><p>{message}</p></body></html>
+"""
+
+def _format_remaining(seconds: int) -> str:
+    minutes, seconds = divmod(max(0, seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def block_message(status: Dict) -> str:
+    """Dòng thông báo của trang chặn theo trạng thái engine"""
+    if status.get("active"):
+        if status.get("paused"):
+            return f"Phiên tập trung đang tạm dừng, còn {_format_remaining(status['remaining_seconds'])}."
+        return f"Phiên tập trung còn {_format_remaining(status['remaining_seconds'])}. Quay lại làm việc nhé!"
+    if status.get("scheduled_until"):
+        until = time.strftime("%H:%M", time.localtime(status["scheduled_until"]))
+        return f"Bị chặn theo lịch tới {until}."
+    return "Bị chặn bởi FocusGuard."
+
+class SinkholeServer:
+    """HTTP/1.1 tối giản trên 127.0.0.1 (asyncio, một thread): mọi Host, mọi đường dẫn đều nhận trang chặn
+    
+    status_provider() được gọi tối đa mỗi giây một lần để dựng lại trang; on_flush(counts) nhận số lượt
+    truy cập theo tên miền mỗi flush_interval giây (trên thread riêng, không chặn event loop).
+    """
+    
+    def __init__(self, status_provider: Callable[[], Dict], on_flush: Callable[[Dict[str, int]], None],
+                 port: int = 80, host: str = "127.0.0.1", flush_interval: float = 30.0):
+        self.status_provider = status_provider
+        self.on_flush = on_flush
+        self.port = port
+        self.host = host
+        self.flush_interval = flush_interval
+        
+        self._counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (giây, phần đầu + thân của response GET, phần đầu của response HEAD)
+        self._page: Tuple[int, bytes, bytes] = (-1, b"", b"")
+        
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Mở cổng và chạy event loop trên thread nền; ném OSError nếu không mở được cổng"""
+        loop = asyncio.new_event_loop()
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER_BYTES))
+        except OSError:
+            loop.close()
+            raise
+        self._loop = loop
+        self._thread = threading.Thread(target=self._run, name="sinkhole", daemon=True)
+        self._thread.start()
+        logger.info("Trang chặn phục vụ tại http://%s:%d", self.host, self.port)
+    
+    def _run(self):
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        flusher = loop.create_task(self._flush_periodically())
+        try:
+            loop.run_forever()
+        finally:
+            flusher.cancel()
+            self._server.close()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+    
+    def stop(self):
+        """Đóng cổng và ghi các lượt truy cập còn lại"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread is not None and self._thread is not threading.current_thread():
+                self._thread.join(timeout=2.0)
+            self._loop = None
+            self._thread = None
+        self.flush()
+    
+    async def _flush_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await loop.run_in_executor(None, self.flush)
+    
+    def flush(self) -> int:
+        """Ghi số lượt truy cập đã đếm (một lô); trả về tổng số lượt"""
+        with self._flush_lock:
+            with self._counts_lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return 0
+            total = sum(counts.values())
+            SINKHOLE_HITS.inc(total)
+            try:
+                self.on_flush(dict(counts))
+            except Exception as e:
+                logger.exception("Lỗi ghi lượt truy cập bị chặn: %s", e)
+            return total
+    
+    def _response(self) -> Tuple[bytes, bytes]:
+        """Response dựng sẵn, chỉ dựng lại khi sang giây mới (thời gian còn lại đổi)"""
+        second = int(time.monotonic())
+        page = self._page
+        if page[0] != second:
+            try:
+                message = block_message(self.status_provider())
+            except Exception as e:
+                logger.debug("Không lấy được trạng thái cho trang chặn: %s", e)
+                message = "Bị chặn bởi FocusGuard."
+            body = PAGE_TEMPLATE.format(message=html_escape(message)).encode("utf-8")
+            head = ("HTTP/1.1 403 Forbidden\r\n"
+                    "Content-Type: text/html; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Cache-Control: no-store\r\n"
+                    "Connection: keep-alive\r\n\r\n").encode("ascii")
+            page = self._page = (second, head + body, head)
+        return page[1], page[2]
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+                
+                method, host, length, close = self._parse(request)
+                if length:
+                    # Bỏ qua thân request (POST); Content-Length âm hoặc thân quá lớn thì đóng kết nối
+                    if not 0 < length <= MAX_HEADER_BYTES:
+                        break
+                    await reader.readexactly(length)
+                if host:
+                    with self._counts_lock:
+                        self._counts[host] += 1
+                
+                full, head_only = self._response()
+                writer.write(head_only if method == b"HEAD" else full)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    @staticmethod
+    def _parse(request: bytes) -> Tuple[bytes, str, int, bool]:
+        """(method, host chữ thường không kèm cổng, Content-Length, có đóng kết nối sau response không)"""
+        lines = request.split(b"\r\n")
+        parts = lines[0].split(b" ")
+        method = parts[0]
+        close = len(parts) > 2 and parts[2] == b"HTTP/1.0"
+        host = ""
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"host":
+                host = value.strip().decode("latin-1").lower()
+                if not host.startswith("["):
+                    host = host.rsplit(":", 1)[0]
+            elif name == b"content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    length = 0
+            elif name == b"connection":
+                close = value.strip().lower() == b"close"
+        return method, host, length, close
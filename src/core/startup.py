@@ -0,0 +1,71 @@
+"""
+Khởi tạo song song khi FocusGuard khởi động
+Các bước I/O (đọc cấu hình, DDL SQLite, đọc /etc/hosts, truy vấn thống kê) chạy trên thread pool
+trong lúc import PyQt5/matplotlib và dựng giao diện; kết quả được join ngay trước lần dùng đầu tiên
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.core.profiler import profiler
+
+class StartupTasks:
+    """Tập các future được đặt tên của quá trình khởi động"""
+    
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self._futures: Dict[str, Future] = {}
+    
+    def submit(self, name: str, func: Callable[..., Any], *args) -> Future:
+        """Chạy func trên thread pool dưới tên `name`"""
+        def run():
+            with profiler.span(name):
+                return func(*args)
+        
+        future = self._executor.submit(run)
+        self._futures[name] = future
+        return future
+    
+    def __contains__(self, name: str) -> bool:
+        """Đã submit task `name` chưa"""
+        return name in self._futures
+    
+    def future(self, name: str) -> Future:
+        """Lấy future theo tên (KeyError nếu chưa submit)"""
+        return self._futures[name]
+    
+    def result(self, name: str) -> Any:
+        """Chờ và lấy kết quả (ném lại ngoại lệ của task nếu có)"""
+        future = self._futures[name]
+        if future.done():
+            return future.result()
+        with profiler.span(f"wait:{name}"):
+            return future.result()
+    
+    def shutdown(self):
+        """Giải phóng thread pool (không chờ các task còn chạy)"""
+        self._executor.shutdown(wait=False)
+
+def start_background_init() -> StartupTasks:
+    """Bắt đầu các bước khởi tạo I/O càng sớm càng tốt (trước khi import PyQt5)"""
+    from src.core.config_manager import ConfigManager
+    from src.core.password_manager import PasswordManager
+    from src.core.session_manager import SessionManager
+    from src.core.website_blocker import WebsiteBlocker
+    
+    tasks = StartupTasks()
+    tasks.submit("config_manager", ConfigManager)
+    tasks.submit("password_manager", PasswordManager)
+    tasks.submit("has_password", lambda: tasks.result("password_manager").has_password())
+    
+    # DDL SQLite rồi các truy vấn thống kê cho cửa sổ chính
+    tasks.submit("session_manager", lambda: SessionManager(tasks.result("config_manager").get_data_dir()))
+    tasks.submit("today_stats", lambda: tasks.result("session_manager").get_today_stats())
+    tasks.submit("week_stats", lambda: tasks.result("session_manager").get_week_stats())
+    
+    # Kiểm tra entry chặn còn sót lại trong /etc/hosts
+    tasks.submit(
+        "hosts_check",
+        lambda: WebsiteBlocker(tasks.result("config_manager").get_backup_hosts_path()).is_blocking_active()
+    )
+    return tasks
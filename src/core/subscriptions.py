@@ -0,0 +1,149 @@
+"""
+Danh sách chặn theo dõi từ URL
+Tải lại có điều kiện (ETag / If-Modified-Since), parse từng dòng trong lúc tải rồi so với tập đã lưu:
+chỉ các tên miền thêm/bớt được ghi vào database và áp vào hosts file
+"""
+
+import http.client
+import logging
+import re
+import time
+import urllib.error
+import urllib.request
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+from src.core.clock import Clock, SYSTEM_CLOCK
+from src.core.config_model import Subscription
+from src.core.metrics import SUBSCRIPTION_FETCH_SECONDS
+from src.core.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 30.0
+# Dòng dài hơn bị bỏ qua (không phải danh sách chặn hợp lệ)
+MAX_LINE_BYTES = 4096
+# Giới hạn số tên miền của một danh sách
+MAX_DOMAINS = 1_000_000
+USER_AGENT = "FocusGuard"
+
+# Địa chỉ "hố đen" trong danh sách dạng hosts; dòng trỏ tới địa chỉ khác không phải luật chặn
+_SINK_ADDRESSES = {"0.0.0.0", "127.0.0.1", "0", "::", "::1"}
+_IGNORED_HOSTS = {"localhost", "localhost.localdomain", "local", "broadcasthost", "ip6-localhost",
+                  "ip6-loopback", "ip6-localnet", "ip6-mcastprefix", "ip6-allnodes", "ip6-allrouters"}
+# Nhãn cuối bắt đầu bằng chữ cái: loại địa chỉ IP
+_DOMAIN_RE = re.compile(r"^(?=.{1,253}$)(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?\.)+[a-z][a-z0-9-]{0,62}$")
+
+def parse_line(line: str) -> Iterator[str]:
+    """Tên miền trong một dòng: dạng hosts ("0.0.0.0 a.com"), mỗi dòng một tên miền, hoặc "||a.com^" """
+    line = line.split("#", 1)[0].strip().lower()
+    if not line or line.startswith(("!", "[")):
+        return
+    if line.startswith("||"):
+        # Luật adblock: chỉ nhận luật chặn cả tên miền, không có tùy chọn
+        if not line.endswith("^"):
+            return
+        line = line[2:-1]
+    
+    names = line.split()
+    if len(names) > 1:
+        if names[0] not in _SINK_ADDRESSES:
+            return
+        names = names[1:]
+    for name in names:
+        name = name.rstrip(".")
+        if name not in _IGNORED_HOSTS and _DOMAIN_RE.match(name):
+            yield name
+
+def parse_blocklist(lines: Iterable[str]) -> Iterator[str]:
+    """Tên miền trong các dòng của một danh sách chặn (có thể lặp lại)"""
+    for line in lines:
+        yield from parse_line(line)
+
+def _read_lines(response) -> Iterator[str]:
+    """Đọc từng dòng của response trong lúc tải, bỏ các dòng dài quá MAX_LINE_BYTES"""
+    previous_complete = True
+    while True:
+        raw = response.readline(MAX_LINE_BYTES)
+        if not raw:
+            return
+        complete = raw.endswith(b"\n")
+        if previous_complete and (complete or len(raw) < MAX_LINE_BYTES):
+            yield raw.decode("utf-8", "replace")
+        previous_complete = complete
+
+def fetch_blocklist(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                    timeout: float = FETCH_TIMEOUT) -> Optional[Tuple[Set[str], Optional[str], Optional[str]]]:
+    """Tải danh sách nếu đã đổi: (tên miền, ETag, Last-Modified); None nếu máy chủ trả 304
+    
+    Ném OSError/ValueError/http.client.HTTPException khi tải lỗi hoặc danh sách quá lớn.
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    if etag:
+        request.add_header("If-None-Match", etag)
+    if last_modified:
+        request.add_header("If-Modified-Since", last_modified)
+    
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            e.close()
+            return None
+        raise
+    
+    with response:
+        domains = set()
+        for domain in parse_blocklist(_read_lines(response)):
+            domains.add(domain)
+            if len(domains) > MAX_DOMAINS:
+                raise ValueError(f"danh sách có hơn {MAX_DOMAINS} tên miền")
+        return domains, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+class SubscriptionUpdater:
+    """Tải lại danh sách theo dõi và lưu phần thay đổi so với tập đã lưu vào database"""
+    
+    def __init__(self, session_manager: SessionManager, clock: Clock = SYSTEM_CLOCK, fetch=fetch_blocklist):
+        self.session_manager = session_manager
+        self.clock = clock
+        self.fetch = fetch
+    
+    def is_due(self, subscription: Subscription, now: float) -> bool:
+        """Đã tới lúc tải lại (chưa tải lần nào, hoặc lần kiểm tra trước đã quá refresh_hours)"""
+        state = self.session_manager.get_subscription(subscription.url)
+        if state is None or state['checked_at'] is None:
+            return True
+        return now - state['checked_at'].timestamp() >= subscription.refresh_hours * 3600
+    
+    def refresh(self, url: str) -> Optional[Tuple[Set[str], Set[str]]]:
+        """Tải lại một danh sách: (tên miền thêm, tên miền bỏ) đã lưu; None nếu tải hoặc lưu lỗi"""
+        state = self.session_manager.get_subscription(url) or {}
+        start = time.perf_counter()
+        try:
+            result = self.fetch(url, state.get('etag'), state.get('last_modified'))
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            SUBSCRIPTION_FETCH_SECONDS.labels("error").observe(time.perf_counter() - start)
+            logger.warning("Không tải được danh sách chặn %s: %s", url, e)
+            return None
+        
+        if result is None:
+            SUBSCRIPTION_FETCH_SECONDS.labels("not_modified").observe(time.perf_counter() - start)
+            logger.debug("Danh sách chặn %s không đổi", url)
+            if not self.session_manager.update_subscription(url, (), (), state.get('etag'),
+                                                            state.get('last_modified'), self.clock.now()):
+                return None
+            return set(), set()
+        
+        domains, etag, last_modified = result
+        SUBSCRIPTION_FETCH_SECONDS.labels("updated").observe(time.perf_counter() - start)
+        stored = self.session_manager.get_subscription_domains(url)
+        if not domains and stored:
+            # Máy chủ trả về trang rỗng/lỗi với mã 200: giữ danh sách cũ
+            logger.warning("Danh sách chặn %s rỗng, giữ %d tên miền đã lưu", url, len(stored))
+            return None
+        
+        added = domains - stored
+        removed = stored - domains
+        if not self.session_manager.update_subscription(url, added, removed, etag, last_modified, self.clock.now()):
+            return None
+        logger.info("Danh sách chặn %s: %d tên miền, +%d -%d", url, len(domains), len(added), len(removed))
+        return added, removed
@@ -0,0 +1,125 @@
+"""
+Lấy mẫu ứng dụng đang chạy trong phiên tập trung
+Đọc thời gian CPU trong /proc/<pid>/stat của các tiến trình của người dùng theo chu kỳ thưa,
+cộng dồn theo tên ứng dụng trong bộ nhớ; engine ghi vào database một lần khi phiên kết thúc
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+def _user_uid() -> int:
+    """UID của người dùng (daemon chạy qua sudo thì lấy SUDO_UID)"""
+    try:
+        return int(os.environ.get("SUDO_UID", os.getuid()))
+    except ValueError:
+        return os.getuid()
+
+class UsageSampler:
+    """Thời gian CPU theo ứng dụng của người dùng giữa start() và flush()
+    
+    Mỗi lần lấy mẫu chỉ là một stat() và một read() cho mỗi tiến trình; PID bị tái sử dụng được nhận ra
+    qua thời điểm bắt đầu của tiến trình.
+    """
+    
+    def __init__(self, interval: float = 10.0, uid: Optional[int] = None):
+        self.interval = interval
+        self.uid = _user_uid() if uid is None else uid
+        # pid -> (starttime, tên, tổng tick CPU ở lần mẫu trước)
+        self._previous: Dict[int, Tuple[int, str, int]] = {}
+        # tên -> [giây CPU, số lần mẫu có chạy]
+        self._usage: Dict[str, list] = {}
+        self.samples = 0
+        self.cost_seconds = 0.0  # thời gian CPU của chính bộ lấy mẫu
+        self._started = 0.0
+        
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Lấy mẫu trên thread nền (lần đầu chỉ ghi mốc)"""
+        self._started = time.monotonic()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Dừng lấy mẫu (không chờ thread, nó thoát ở lần thức tiếp theo)"""
+        self._stop_event.set()
+        self._thread = None
+    
+    def _run(self):
+        self.sample()
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+    
+    def sample(self):
+        """Một lần lấy mẫu: cộng phần CPU tăng thêm của từng tiến trình từ lần trước"""
+        cost_start = time.thread_time()
+        first = self.samples == 0
+        current: Dict[int, Tuple[int, str, int]] = {}
+        deltas: Dict[str, int] = {}
+        try:
+            names = os.listdir("/proc")
+        except OSError as e:
+            logger.warning("Không đọc được /proc: %s", e)
+            return
+        
+        for name in names:
+            if not name.isdigit():
+                continue
+            path = f"/proc/{name}/stat"
+            try:
+                if os.stat(path).st_uid != self.uid:
+                    continue
+                with open(path, "rb") as f:
+                    stat = f.read()
+            except OSError:
+                continue  # tiến trình vừa thoát
+            # "pid (comm) state ppid ...": comm có thể chứa dấu cách và ngoặc
+            close = stat.rfind(b")")
+            fields = stat[close + 2:].split()
+            if len(fields) < 20:
+                continue
+            pid = int(name)
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+            starttime = int(fields[19])
+            previous = self._previous.get(pid)
+            if previous is not None and previous[0] == starttime:
+                app, delta = previous[1], ticks - previous[2]
+            else:
+                # Tiến trình mới từ lần mẫu trước: toàn bộ CPU của nó nằm trong khoảng này
+                app = stat[stat.find(b"(") + 1:close].decode("utf-8", "replace").lower()
+                delta = 0 if first else ticks
+            current[pid] = (starttime, app, ticks)
+            if delta > 0:
+                deltas[app] = deltas.get(app, 0) + delta
+        
+        with self._lock:
+            self._previous = current
+            self.samples += 1
+            for app, delta in deltas.items():
+                usage = self._usage.setdefault(app, [0.0, 0])
+                usage[0] += delta / CLOCK_TICKS
+                usage[1] += 1
+            self.cost_seconds += time.thread_time() - cost_start
+    
+    def flush(self) -> Dict[str, Tuple[float, int]]:
+        """Lấy tổng đã cộng dồn {ứng dụng: (giây CPU, số mẫu có chạy)} và bắt đầu lại từ 0"""
+        with self._lock:
+            usage = {app: (cpu, samples) for app, (cpu, samples) in self._usage.items()}
+            elapsed = time.monotonic() - self._started
+            if elapsed > 0:
+                logger.debug("Lấy mẫu ứng dụng: %d mẫu, tốn %.3f s CPU (%.3f%%)", self.samples, self.cost_seconds,
+                             100 * self.cost_seconds / elapsed)
+            self._usage = {}
+            self.cost_seconds = 0.0
+            self._started = time.monotonic()
+            return usage
@@ -0,0 +1,158 @@
+"""
+Phát hiện luồng giao diện bị treo (stall)
+Luồng chính gửi nhịp tim đều đặn; thread giám sát đo độ trễ và chụp stack của luồng chính khi quá ngưỡng
+"""
+
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.core.metrics import UI_STALL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Biên trên (ms) của các bucket histogram thời lượng treo
+STALL_BUCKETS_MS = (250, 500, 1000, 2000, 5000, float("inf"))
+
+# Thư mục mã nguồn của FocusGuard, dùng để chọn frame "của mình" khi quy trách nhiệm
+_SOURCE_ROOT = str(Path(__file__).resolve().parent.parent)
+
+class StallWatchdog:
+    """Giám sát độ trễ của event loop trên luồng chính"""
+    
+    def __init__(self, threshold_ms: int = 250, interval_ms: int = 100, log_path: Optional[Path] = None):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.log_path = log_path
+        
+        self._main_thread_id = threading.main_thread().ident
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        self._last_beat = time.monotonic()
+        # Trạng thái của lần treo đang diễn ra (None nếu không treo)
+        self._stall_beat: Optional[float] = None
+        self._stall_sites: Counter = Counter()
+        self._stall_stacks: Dict[str, str] = {}
+        # Các lần treo đã kết thúc, chờ thread giám sát ghi nhận (không ghi file trên luồng chính)
+        self._finished: List[Tuple[float, Counter, Dict[str, str]]] = []
+        
+        # Thống kê tích lũy
+        self.histogram: List[int] = [0] * len(STALL_BUCKETS_MS)
+        self.sites: Dict[str, Tuple[int, float]] = {}  # call site -> (số lần, tổng ms)
+        self.max_stall_ms = 0.0
+    
+    def start(self):
+        """Bắt đầu thread giám sát"""
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._monitor, name="stall-watchdog", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Dừng thread giám sát và ghi nhận các lần treo còn chờ"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._record_finished()
+    
+    def beat(self):
+        """Nhịp tim, gọi từ luồng chính (ví dụ bởi QTimer mỗi interval_ms); chỉ đánh dấu, không ghi file"""
+        now = time.monotonic()
+        with self._lock:
+            if self._stall_beat is not None:
+                # Trừ đi khoảng nghỉ bình thường giữa hai nhịp
+                duration_ms = max(0.0, (now - self._stall_beat - self.interval) * 1000)
+                self._finished.append((duration_ms, self._stall_sites, self._stall_stacks))
+                self._stall_beat = None
+                self._stall_sites = Counter()
+                self._stall_stacks = {}
+            self._last_beat = now
+    
+    def _monitor(self):
+        """Vòng lặp của thread giám sát: ghi nhận các lần treo đã hết, lấy mẫu stack khi luồng chính trễ nhịp"""
+        while not self._stop_event.wait(self.interval):
+            self._record_finished()
+            with self._lock:
+                last_beat = self._last_beat
+                if time.monotonic() - last_beat < self.threshold:
+                    continue
+                self._stall_beat = last_beat
+                
+                site, stack = self._capture_main_stack()
+                if site:
+                    self._stall_sites[site] += 1
+                    self._stall_stacks.setdefault(site, stack)
+    
+    def _capture_main_stack(self) -> Tuple[str, str]:
+        """Chụp stack hiện tại của luồng chính: (call site, stack dạng văn bản)"""
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return "", ""
+        
+        entries = traceback.extract_stack(frame)
+        # Quy cho frame sâu nhất thuộc mã nguồn FocusGuard (thường là chỗ gọi sudo/sqlite/bcrypt)
+        site_entry = entries[-1]
+        for entry in reversed(entries):
+            if entry.filename.startswith(_SOURCE_ROOT):
+                site_entry = entry
+                break
+        site = f"{Path(site_entry.filename).name}:{site_entry.lineno} {site_entry.name}"
+        return site, "".join(traceback.format_list(entries))
+    
+    def _record_finished(self):
+        with self._lock:
+            finished, self._finished = self._finished, []
+        for stall in finished:
+            self._record_stall(*stall)
+    
+    def _record_stall(self, duration_ms: float, sites: Counter, stacks: Dict[str, str]):
+        """Ghi nhận một lần treo đã kết thúc"""
+        for index, bound in enumerate(STALL_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.histogram[index] += 1
+                break
+        self.max_stall_ms = max(self.max_stall_ms, duration_ms)
+        UI_STALL_SECONDS.observe(duration_ms / 1000.0)
+        
+        # Call site xuất hiện nhiều nhất trong các mẫu là thủ phạm chính
+        site = sites.most_common(1)[0][0] if sites else "không xác định"
+        count, total_ms = self.sites.get(site, (0, 0.0))
+        self.sites[site] = (count + 1, total_ms + duration_ms)
+        
+        message = f"Giao diện bị treo {duration_ms:.0f} ms tại {site}"
+        logger.warning(message)
+        self._write_log(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}\n{stacks.get(site, '')}\n")
+    
+    def _write_log(self, text: str):
+        if self.log_path is None:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            logger.error("Lỗi ghi log treo giao diện: %s", e)
+    
+    def total_stalls(self) -> int:
+        """Tổng số lần treo đã ghi nhận"""
+        return sum(self.histogram)
+    
+    def summary(self) -> str:
+        """Histogram thời lượng treo và các call site gây treo nhiều nhất"""
+        lines = [f"Giao diện bị treo {self.total_stalls()} lần (lâu nhất {self.max_stall_ms:.0f} ms)"]
+        lower = 0
+        for bound, count in zip(STALL_BUCKETS_MS, self.histogram):
+            label = f"> {lower} ms" if bound == float("inf") else f"{lower}-{bound} ms"
+            lines.append(f"  {label:>14}: {count}")
+            lower = bound
+        
+        for site, (count, total_ms) in sorted(self.sites.items(), key=lambda item: item[1][1], reverse=True)[:10]:
+            lines.append(f"  {total_ms:8.0f} ms  {count:4d} lần  {site}")
+        return "\n".join(lines)
@@ -3,30 +3,59 @@ Quản lý chặn website thông qua file /etc/hosts
 Backup và khôi phục file hosts gốc
 """
 
+import logging
 import os
 import shutil
 import subprocess
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Set
+
+from src.core.metrics import HOSTS_WRITE_BYTES, HOSTS_WRITE_SECONDS, SUDO_CALL_SECONDS
+
+logger = logging.getLogger(__name__)
 
 class WebsiteBlocker:
     """Quản lý chặn website"""
     
-    def __init__(self, backup_path: Path):
-        self.hosts_file = Path("/etc/hosts")
+    def __init__(self, backup_path: Path, hosts_file: Path = Path("/etc/hosts"), use_sudo: bool = True):
+        self.hosts_file = Path(hosts_file)
+        # use_sudo=False: ghi trực tiếp (hosts file tạm của user, dùng cho mô phỏng/benchmark)
+        self.use_sudo = use_sudo
         self.backup_path = backup_path
         self.block_marker_start = "# === FOCUSGUARD BLOCK START ==="
         self.block_marker_end = "# === FOCUSGUARD BLOCK END ==="
+    
+    def _sudo(self, *args: str, non_interactive: bool = False) -> subprocess.CompletedProcess:
+        """Chạy một lệnh qua sudo, ghi lại độ trễ theo tên lệnh"""
+        command = list(args)
+        if self.use_sudo:
+            command = ["sudo"] + (["-n"] if non_interactive else []) + command
+        with SUDO_CALL_SECONDS.labels(args[0]).time():
+            return subprocess.run(command, capture_output=True, text=True)
+    
+    def _write_hosts(self, content: str, temp_file: str) -> subprocess.CompletedProcess:
+        """Ghi nội dung mới cho hosts file qua file tạm và sudo cp"""
+        with HOSTS_WRITE_SECONDS.time():
+            with open(temp_file, 'w') as f:
+                f.write(content)
+            
+            result = self._sudo("cp", temp_file, str(self.hosts_file))
+            
+            # Xóa file temp
+            try:
+                os.remove(temp_file)
+            except:
+                pass
         
+        if result.returncode == 0:
+            HOSTS_WRITE_BYTES.inc(len(content.encode("utf-8")))
+        return result
+    
     def has_sudo_access(self) -> bool:
         """Kiểm tra có quyền sudo không"""
         try:
-            # Kiểm tra bằng cách thử ghi vào /etc/hosts
-            result = subprocess.run(
-                ["sudo", "-n", "test", "-w", "/etc/hosts"],
-                capture_output=True,
-                text=True
-            )
+            # Kiểm tra bằng cách thử ghi vào hosts file
+            result = self._sudo("test", "-w", str(self.hosts_file), non_interactive=True)
             return result.returncode == 0
         except:
             return False
@@ -36,10 +65,10 @@ class WebsiteBlocker:
         try:
             if not self.backup_path.exists():
                 shutil.copy2(self.hosts_file, self.backup_path)
-                print(f"Đã backup hosts file tới {self.backup_path}")
+                logger.info("Đã backup hosts file tới %s", self.backup_path)
             return True
         except Exception as e:
-            print(f"Lỗi backup hosts file: {e}")
+            logger.error("Lỗi backup hosts file: %s", e)
             return False
     
     def restore_hosts_file(self) -> bool:
@@ -47,27 +76,27 @@ class WebsiteBlocker:
         try:
             if self.backup_path.exists():
                 # Sử dụng sudo để copy file backup
-                result = subprocess.run(
-                    ["sudo", "cp", str(self.backup_path), str(self.hosts_file)],
-                    capture_output=True,
-                    text=True
-                )
+                result = self._sudo("cp", str(self.backup_path), str(self.hosts_file))
                 
                 if result.returncode == 0:
-                    print("Đã khôi phục hosts file từ backup")
+                    logger.info("Đã khôi phục hosts file từ backup")
                     return True
                 else:
-                    print(f"Lỗi khôi phục hosts file: {result.stderr}")
+                    logger.error("Lỗi khôi phục hosts file: %s", result.stderr)
                     return False
             else:
-                print("Không tìm thấy file backup")
+                logger.warning("Không tìm thấy file backup")
                 return self.remove_block_entries()
         except Exception as e:
-            print(f"Lỗi khôi phục hosts file: {e}")
+            logger.error("Lỗi khôi phục hosts file: %s", e)
             return False
     
     def add_block_entries(self, websites: List[str]) -> bool:
         """Thêm các entry chặn website vào hosts file"""
+        return self.apply_block_region(self.build_region(websites), len(websites))
+    
+    def apply_block_region(self, region: str, count: int) -> bool:
+        """Thay khối chặn trong hosts file bằng `region` đã biên dịch sẵn (xem build_region)"""
         try:
             # Backup trước khi sửa đổi
             if not self.backup_hosts_file():
@@ -77,51 +106,109 @@ class WebsiteBlocker:
             with open(self.hosts_file, 'r') as f:
                 content = f.read()
             
-            # Xóa các entry cũ nếu có
-            content = self._remove_existing_blocks(content)
-            
-            # Tạo các entry chặn mới
-            block_entries = [self.block_marker_start]
-            for website in websites:
-                # Chặn cả domain chính và www subdomain
-                block_entries.append(f"127.0.0.1 {website}")
-                if not website.startswith("www."):
-                    block_entries.append(f"127.0.0.1 www.{website}")
-            block_entries.append(self.block_marker_end)
-            
-            # Thêm vào cuối file
-            if not content.endswith('\n'):
-                content += '\n'
-            content += '\n'.join(block_entries) + '\n'
+            content = self.swap_region(content, region)
             
             # Ghi file với sudo
-            temp_file = "/tmp/focusguard_hosts"
-            with open(temp_file, 'w') as f:
-                f.write(content)
+            result = self._write_hosts(content, "/tmp/focusguard_hosts")
             
-            result = subprocess.run(
-                ["sudo", "cp", temp_file, str(self.hosts_file)],
-                capture_output=True,
-                text=True
-            )
+            if result.returncode == 0:
+                logger.info("Đã chặn %d website", count)
+                return True
+            else:
+                logger.error("Lỗi ghi hosts file: %s", result.stderr)
+                return False
+                
+        except Exception as e:
+            logger.error("Lỗi thêm entry chặn: %s", e)
+            return False
+    
+    def update_block_entries(self, add: Iterable[str], remove: Iterable[str], keep: Iterable[str]) -> bool:
+        """Thêm/bớt vài website trong khối chặn đang có của hosts file (keep: các website vẫn bị chặn)"""
+        try:
+            if not self.backup_hosts_file():
+                return False
             
-            # Xóa file temp
-            try:
-                os.remove(temp_file)
-            except:
-                pass
+            with open(self.hosts_file, 'r') as f:
+                content = f.read()
             
+            result = self._write_hosts(self.patch_region(content, add, remove, keep), "/tmp/focusguard_hosts")
             if result.returncode == 0:
-                print(f"Đã chặn {len(websites)} website")
+                logger.info("Đã cập nhật khối chặn website")
                 return True
             else:
-                print(f"Lỗi ghi hosts file: {result.stderr}")
+                logger.error("Lỗi ghi hosts file: %s", result.stderr)
                 return False
-                
+        
         except Exception as e:
-            print(f"Lỗi thêm entry chặn: {e}")
+            logger.error("Lỗi cập nhật entry chặn: %s", e)
             return False
     
+    def patch_region(self, content: str, add: Iterable[str], remove: Iterable[str], keep: Iterable[str]) -> str:
+        """Sửa tại chỗ khối chặn trong nội dung hosts: thêm dòng trước marker cuối, bỏ dòng của website bị gỡ
+        
+        Không dựng lại cả khối; dòng www. dùng chung với website trong keep được giữ nguyên.
+        """
+        start = content.find(self.block_marker_start)
+        end = content.find(self.block_marker_end, start) if start != -1 else -1
+        keep = set(keep)
+        if end == -1:
+            # Khối chặn bị xóa từ bên ngoài: dựng lại từ đầu
+            return self.swap_region(content, self.build_region(sorted(keep) + list(add)))
+        
+        drop = {f"127.0.0.1 {host}" for website in remove for host in self._hosts_for(website)
+                if not self._is_kept(host, keep)}
+        if drop:
+            body_start = start + len(self.block_marker_start)
+            body = '\n'.join(line for line in content[body_start:end].split('\n') if line.strip() not in drop)
+            content = content[:body_start] + body + content[end:]
+            end = body_start + len(body)
+        
+        lines = []
+        seen = set()
+        for website in add:
+            for host in self._hosts_for(website):
+                if host not in seen and not self._is_kept(host, keep):
+                    seen.add(host)
+                    lines.append(f"127.0.0.1 {host}")
+        if lines:
+            content = content[:end] + '\n'.join(lines) + '\n' + content[end:]
+        return content
+    
+    @staticmethod
+    def _hosts_for(website: str) -> List[str]:
+        """Các tên miền bị chặn cho một website: domain chính và www subdomain"""
+        return [website] if website.startswith("www.") else [website, f"www.{website}"]
+    
+    @staticmethod
+    def _is_kept(host: str, keep: Set[str]) -> bool:
+        """Tên miền vẫn có trong khối chặn do một website trong keep"""
+        return host in keep or (host.startswith("www.") and host[4:] in keep)
+    
+    def build_block_content(self, content: str, websites: List[str]) -> str:
+        """Nội dung hosts file mới: bỏ các entry chặn cũ rồi thêm khối chặn cho websites"""
+        return self.swap_region(content, self.build_region(websites))
+    
+    def swap_region(self, content: str, region: str) -> str:
+        """Bỏ khối chặn cũ khỏi nội dung hosts và thêm `region` vào cuối"""
+        # Xóa các entry cũ nếu có
+        content = self._remove_existing_blocks(content)
+        
+        # Thêm vào cuối file
+        if not content.endswith('\n'):
+            content += '\n'
+        return content + region
+    
+    def build_region(self, websites: List[str]) -> str:
+        """Khối chặn (giữa hai marker) cho danh sách website"""
+        block_entries = [self.block_marker_start]
+        for website in websites:
+            # Chặn cả domain chính và www subdomain
+            block_entries.append(f"127.0.0.1 {website}")
+            if not website.startswith("www."):
+                block_entries.append(f"127.0.0.1 www.{website}")
+        block_entries.append(self.block_marker_end)
+        return '\n'.join(block_entries) + '\n'
+    
     def remove_block_entries(self) -> bool:
         """Xóa các entry chặn khỏi hosts file"""
         try:
@@ -134,52 +221,34 @@ class WebsiteBlocker:
             
             # Ghi lại file nếu có thay đổi
             if new_content != content:
-                temp_file = "/tmp/focusguard_hosts_clean"
-                with open(temp_file, 'w') as f:
-                    f.write(new_content)
-                
-                result = subprocess.run(
-                    ["sudo", "cp", temp_file, str(self.hosts_file)],
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Xóa file temp
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
+                result = self._write_hosts(new_content, "/tmp/focusguard_hosts_clean")
                 
                 if result.returncode == 0:
-                    print("Đã xóa các entry chặn website")
+                    logger.info("Đã xóa các entry chặn website")
                     return True
                 else:
-                    print(f"Lỗi ghi hosts file: {result.stderr}")
+                    logger.error("Lỗi ghi hosts file: %s", result.stderr)
                     return False
             
             return True
             
         except Exception as e:
-            print(f"Lỗi xóa entry chặn: {e}")
+            logger.error("Lỗi xóa entry chặn: %s", e)
             return False
     
     def _remove_existing_blocks(self, content: str) -> str:
-        """Xóa các block FocusGuard có từ trước"""
-        lines = content.split('\n')
-        new_lines = []
-        inside_block = False
-        
-        for line in lines:
-            if line.strip() == self.block_marker_start:
-                inside_block = True
-                continue
-            elif line.strip() == self.block_marker_end:
-                inside_block = False
-                continue
-            elif not inside_block:
-                new_lines.append(line)
-        
-        return '\n'.join(new_lines)
+        """Xóa các block FocusGuard có từ trước (cắt theo vị trí marker, không duyệt từng dòng)"""
+        start = content.find(self.block_marker_start)
+        while start != -1:
+            line_start = content.rfind('\n', 0, start) + 1
+            end = content.find(self.block_marker_end, start)
+            if end == -1:
+                # Block chưa đóng: bỏ tới cuối file
+                return content[:line_start]
+            line_end = content.find('\n', end)
+            content = content[:line_start] + (content[line_end + 1:] if line_end != -1 else "")
+            start = content.find(self.block_marker_start, line_start)
+        return content
     
     def is_blocking_active(self) -> bool:
         """Kiểm tra có đang chặn website không"""
@@ -214,6 +283,6 @@ class WebsiteBlocker:
                             blocked_sites.append(website)
             
         except Exception as e:
-            print(f"Lỗi đọc hosts file: {e}")
+            logger.error("Lỗi đọc hosts file: %s", e)
         
         return blocked_sites
@@ -0,0 +1,205 @@
+"""
+Ứng dụng Qt chính của FocusGuard
+"""
+
+import logging
+import sys
+import signal
+from pathlib import Path
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEvent, QObject, QTimer, pyqtSignal
+
+# Thêm thư mục src vào path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from src.gui.main_window import MainWindow
+from src.core.config_manager import ConfigManager
+from src.core.password_manager import PasswordManager
+from src.core.focus_engine import FocusEngine
+from src.core.engine_server import EngineServer
+from src.core.engine_client import EngineClient
+from src.core.profiler import profiler
+from src.core.startup import StartupTasks, start_background_init
+from src.core.watchdog import StallWatchdog
+from src.core.metrics import start_exporters
+from src.core.logs import pipeline
+
+logger = logging.getLogger(__name__)
+
+class FirstPaintWatcher(QObject):
+    """Ghi mốc lần vẽ đầu tiên của cửa sổ chính rồi thoát (chế độ --profile-startup)"""
+    
+    def __init__(self, app: QApplication):
+        super().__init__(app)
+        self.app = app
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            profiler.mark("first_paint")
+            profiler.add_span("event_loop_to_first_paint", profiler.marks.get("event_loop", 0.0),
+                              profiler.marks["first_paint"])
+            obj.removeEventFilter(self)
+            # Thoát sau khi frame đầu tiên vẽ xong
+            QTimer.singleShot(0, self.app.quit)
+        return False
+
+class FocusGuardApp(QApplication):
+    """Ứng dụng chính FocusGuard"""
+    instanceCommandReceived = pyqtSignal(dict)  # Lệnh từ lần chạy thứ hai
+    
+    def __init__(self, argv, startup: StartupTasks = None):
+        super().__init__(argv)
+        
+        # Thiết lập ứng dụng
+        self.setQuitOnLastWindowClosed(False)
+        self.setApplicationName("FocusGuard")
+        self.setApplicationVersion("1.0.0")
+        
+        # Khởi tạo các thành phần (đã bắt đầu trên thread pool từ main)
+        self.startup = startup if startup is not None else start_background_init()
+        self.config_manager: ConfigManager = self.startup.result("config_manager")
+        self.password_manager: PasswordManager = self.startup.result("password_manager")
+        pipeline.set_level(self.config_manager.settings.diagnostics.log_level)
+        self.engine_server = None
+        with profiler.span("engine"):
+            self.engine = self.create_engine()
+        self.main_window = None
+        self.watchdog = None
+        
+        # Ghi các thay đổi cấu hình còn chờ trước khi thoát
+        self.aboutToQuit.connect(self.config_manager.stop_watching)
+        self.aboutToQuit.connect(self.config_manager.flush)
+        self.aboutToQuit.connect(self.startup.shutdown)
+        
+        # Phát hiện giao diện bị treo
+        self.start_watchdog()
+        
+        # Xuất metric (tùy chọn, theo section metrics của cấu hình)
+        for exporter in start_exporters(self.config_manager.settings.metrics, "gui"):
+            self.aboutToQuit.connect(exporter.close)
+        
+        # Lệnh từ instance khác được chuyển về luồng giao diện qua signal
+        self.instanceCommandReceived.connect(self.handle_instance_command)
+        
+        # Thiết lập signal handlers
+        signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGTERM, self.signal_handler)
+    
+    def create_engine(self):
+        """Dùng daemon nếu đang chạy, không thì chạy engine trong process và phục vụ CLI"""
+        server = EngineServer()
+        if not server.bind():
+            logger.info("Kết nối tới FocusGuard daemon đang chạy")
+            engine = EngineClient()
+        else:
+            engine = FocusEngine(self.config_manager, self.password_manager,
+                                 self.startup.result("session_manager"))
+            # Dọn hosts, bật lịch chặn/hạn mức (sudo, ghi hosts) trên thread nền trong lúc dựng cửa sổ;
+            # MainWindow cho mọi tác vụ engine chờ bước này
+            self.startup.submit("engine_start", self.start_engine, engine, server)
+            # Khối chặn hosts của các hồ sơ được biên dịch trong lúc dựng cửa sổ
+            self.startup.submit("hosts_regions", engine.prepare_profiles)
+            self.engine_server = server
+            self.aboutToQuit.connect(server.close)
+        
+        # Tìm phiên dở dang trong lúc dựng cửa sổ chính (sau khi engine đã khởi động xong)
+        self.startup.submit("unfinished_session", self.find_unfinished_session, engine)
+        return engine
+    
+    def start_engine(self, engine: FocusEngine, server: EngineServer):
+        """Dọn khối chặn còn sót, bật lịch chặn, hạn mức, sinkhole, danh sách theo dõi rồi nhận lệnh (thread nền)"""
+        with profiler.span("hosts_cleanup"):
+            engine.cleanup_leftover_blocks(self.startup.result("hosts_check"))
+        engine.start_schedules()
+        engine.start_quotas()
+        engine.start_sinkhole()
+        engine.start_subscriptions()
+        server.serve(engine)
+    
+    def find_unfinished_session(self, engine):
+        """Phiên dở dang của lần chạy trước (thread nền, chờ engine khởi động)"""
+        if "engine_start" in self.startup:
+            self.startup.result("engine_start")
+        return engine.find_unfinished_session()
+    
+    def start_watchdog(self):
+        """Bật watchdog phát hiện event loop bị treo (theo section diagnostics của cấu hình)"""
+        diagnostics = self.config_manager.settings.diagnostics
+        if not diagnostics.stall_watchdog:
+            return
+        
+        self.watchdog = StallWatchdog(
+            threshold_ms=diagnostics.stall_threshold_ms,
+            log_path=self.config_manager.get_data_dir() / "stalls.log"
+        )
+        # Nhịp tim chạy trên luồng chính; treo event loop thì nhịp bị trễ
+        self.heartbeat_timer = QTimer(self)
+        self.heartbeat_timer.timeout.connect(self.watchdog.beat)
+        self.heartbeat_timer.start(int(self.watchdog.interval * 1000))
+        self.watchdog.start()
+        self.aboutToQuit.connect(self.stop_watchdog)
+    
+    def stop_watchdog(self):
+        """Dừng watchdog và in thống kê treo giao diện"""
+        self.heartbeat_timer.stop()
+        self.watchdog.stop()
+        if self.watchdog.total_stalls():
+            logger.info(self.watchdog.summary())
+    
+    def signal_handler(self, signum, frame):
+        """Xử lý signal để thoát ứng dụng một cách an toàn"""
+        logger.info("Nhận signal %s, đang thoát...", signum)
+        self.quit()
+    
+    def receive_instance_command(self, request: dict) -> dict:
+        """Nhận lệnh từ instance khác (chạy trên thread IPC)"""
+        command = request.get("command")
+        if command not in ("show",):
+            return {"ok": False, "error": f"Lệnh không hỗ trợ: {command}"}
+        
+        self.instanceCommandReceived.emit(request)
+        return {"ok": True}
+    
+    def handle_instance_command(self, request: dict):
+        """Thực hiện lệnh từ instance khác trên luồng giao diện"""
+        if request.get("command") == "show" and self.main_window is not None:
+            self.main_window.show()
+            self.main_window.raise_()
+            self.main_window.activateWindow()
+    
+    def initialize(self):
+        """Khởi tạo ứng dụng"""
+        logger.info("Initializing FocusGuard...")
+        
+        # Kiểm tra xem có cần setup không
+        if not self.startup.result("has_password"):
+            if profiler.enabled:
+                # Không chờ người dùng khi đo (CI); cần đặt mật khẩu trước
+                print("Chưa đặt mật khẩu, không thể đo thời gian khởi động")
+                return False
+            logger.info("Password not set, showing setup dialog...")
+            from src.gui.setup_dialog import SetupDialog
+            setup_dialog = SetupDialog()
+            setup_dialog.show()
+            setup_dialog.raise_()
+            setup_dialog.activateWindow()
+            if setup_dialog.exec_() != setup_dialog.Accepted:
+                logger.info("Setup dialog cancelled")
+                return False
+            logger.info("Setup completed successfully")
+        
+        # Tạo cửa sổ chính
+        logger.info("Creating main window...")
+        with profiler.span("main_window"):
+            self.main_window = MainWindow(self.config_manager, self.password_manager, self.engine, self.startup)
+        # Cửa sổ đã đăng ký nhận thay đổi cấu hình: bắt đầu theo dõi file
+        self.config_manager.start_watching()
+        if profiler.enabled:
+            self.main_window.installEventFilter(FirstPaintWatcher(self))
+        self.main_window.show()
+        self.main_window.raise_()
+        self.main_window.activateWindow()
+        logger.info("Main window created and shown")
+        
+        return True
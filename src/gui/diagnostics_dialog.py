@@ -0,0 +1,100 @@
+"""
+Dialog chẩn đoán cho FocusGuard
+Xem các dòng log gần nhất (bộ đệm vòng trong bộ nhớ) và đổi mức log lúc chạy
+"""
+
+import logging
+import sys
+from pathlib import Path
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
+                            QPlainTextEdit, QPushButton, QMessageBox)
+from PyQt5.QtGui import QFont
+
+# Thêm thư mục src vào path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+from src.core.config_manager import ConfigManager
+from src.core.config_model import ConfigError, LOG_LEVELS
+from src.core.logs import pipeline
+
+class DiagnosticsDialog(QDialog):
+    """Dialog xem log và cài đặt chẩn đoán"""
+    
+    def __init__(self, config_manager: ConfigManager, watchdog=None, parent=None):
+        super().__init__(parent)
+        self.config_manager = config_manager
+        self.watchdog = watchdog
+        self.setup_ui()
+        self.refresh()
+    
+    def setup_ui(self):
+        """Thiết lập giao diện"""
+        self.setWindowTitle("FocusGuard - Chẩn đoán")
+        self.resize(760, 480)
+        
+        layout = QVBoxLayout(self)
+        
+        # Mức log đang ghi và bộ lọc hiển thị
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Mức ghi log:"))
+        self.level_combo = QComboBox()
+        self.level_combo.addItems(LOG_LEVELS)
+        self.level_combo.setCurrentText(self.config_manager.settings.diagnostics.log_level)
+        self.level_combo.currentTextChanged.connect(self.change_log_level)
+        controls.addWidget(self.level_combo)
+        
+        controls.addWidget(QLabel("Hiển thị từ:"))
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItems(LOG_LEVELS)
+        self.filter_combo.currentTextChanged.connect(self.refresh)
+        controls.addWidget(self.filter_combo)
+        controls.addStretch()
+        
+        refresh_btn = QPushButton("🔄 Cập nhật")
+        refresh_btn.clicked.connect(self.refresh)
+        controls.addWidget(refresh_btn)
+        layout.addLayout(controls)
+        
+        # Các dòng log gần nhất
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setFont(QFont("Monospace", 9))
+        layout.addWidget(self.log_view)
+        
+        # Đường dẫn file log đầy đủ
+        log_path = pipeline.log_path
+        path_label = QLabel(f"File log: {log_path}" if log_path else "File log: (không ghi được)")
+        path_label.setWordWrap(True)
+        layout.addWidget(path_label)
+        
+        close_btn = QPushButton("Đóng")
+        close_btn.clicked.connect(self.accept)
+        layout.addWidget(close_btn)
+    
+    def refresh(self):
+        """Hiển thị lại bộ đệm log (và thống kê treo giao diện nếu có)"""
+        min_level = logging.getLevelName(self.filter_combo.currentText())
+        lines = []
+        for entry in pipeline.ring.entries(min_level):
+            lines.append(f"{entry['ts']} {entry['level']:<7} {entry['logger']}: {entry['msg']}")
+            if "exc" in entry:
+                lines.append(entry["exc"])
+        
+        if self.watchdog is not None and self.watchdog.total_stalls():
+            lines.append("")
+            lines.append(self.watchdog.summary())
+        
+        self.log_view.setPlainText("\n".join(lines))
+        self.log_view.verticalScrollBar().setValue(self.log_view.verticalScrollBar().maximum())
+    
+    def change_log_level(self, level: str):
+        """Đổi mức log ngay lập tức và lưu vào cấu hình"""
+        diagnostics = self.config_manager.settings.diagnostics.to_dict()
+        diagnostics["log_level"] = level
+        try:
+            self.config_manager.set("diagnostics", diagnostics)
+        except ConfigError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
+            return
+        pipeline.set_level(level)
@@ -0,0 +1,37 @@
+"""
+Chuyển kết quả của concurrent.futures về luồng giao diện Qt
+"""
+
+import logging
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+# Thêm thư mục src vào path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+logger = logging.getLogger(__name__)
+
+class FutureBridge(QObject):
+    """Gọi callback trên luồng giao diện khi future hoàn tất"""
+    resolved = pyqtSignal(object, object)  # (callback, future)
+    
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        # Luôn xếp hàng qua event loop, kể cả khi future đã xong từ trước
+        self.resolved.connect(self._deliver, Qt.QueuedConnection)
+    
+    def watch(self, future: Future, callback: Callable[[Any], None]):
+        """Đăng ký callback(result) cho future (callback chạy trên luồng giao diện)"""
+        future.add_done_callback(lambda f: self.resolved.emit(callback, f))
+    
+    def _deliver(self, callback: Callable[[Any], None], future: Future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Lỗi tác vụ nền: %s", e)
+            return
+        callback(result)
@@ -3,36 +3,49 @@ Cửa sổ chính của FocusGuard
 Giao diện timer, quản lý website, thống kê
 """
 
+import logging
 import sys
 import os
+from datetime import datetime
 from pathlib import Path
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QPushButton, QSpinBox, QListWidget, 
+                            QLabel, QPushButton, QSpinBox, QListWidget, QListWidgetItem,
                             QLineEdit, QMessageBox, QTabWidget, QProgressBar,
                             QTextEdit, QCheckBox, QGroupBox, QGridLayout,
-                            QSystemTrayIcon, QMenu, QAction, QSplitter)
+                            QSystemTrayIcon, QMenu, QAction, QSplitter, QComboBox)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 import subprocess
+from html import escape as html_escape
 
 # Thêm thư mục src vào path
 current_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(current_dir))
 
 from src.core.config_manager import ConfigManager
+from src.core.config_model import DEFAULT_PROFILE, ConfigError
 from src.core.password_manager import PasswordManager
-from src.core.website_blocker import WebsiteBlocker
 from src.core.session_manager import SessionManager
 from src.gui.password_dialog import PasswordDialog
 from src.gui.statistics_widget import StatisticsWidget
+from src.core.profiler import profiler
+from src.core.startup import StartupTasks
+from src.gui.future_bridge import FutureBridge
+from src.gui.tasks import TaskRunner
+from src.core.metrics import TIMER_DRIFT_SECONDS
+from src.core.clock import Clock, SYSTEM_CLOCK
+from src.core.session_plan import PHASE_LABELS, PHASE_WORK
+
+logger = logging.getLogger(__name__)
 
 class FocusTimer(QThread):
     """Thread timer cho phiên tập trung"""
     timeChanged = pyqtSignal(int)  # Thời gian còn lại (giây)
     finished = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, clock: Clock = SYSTEM_CLOCK):
         super().__init__()
+        self.clock = clock
         self.remaining_seconds = 0
         self.is_running = False
     
@@ -50,40 +63,82 @@ class FocusTimer(QThread):
     
     def run(self):
         """Chạy timer"""
+        last_tick = self.clock.monotonic()
         while self.is_running and self.remaining_seconds > 0:
             self.timeChanged.emit(self.remaining_seconds)
-            self.msleep(1000)  # Sleep 1 giây
+            self.clock.sleep(1.0)  # Sleep 1 giây (đồng hồ ảo trả về ngay)
             self.remaining_seconds -= 1
+            
+            # Độ lệch so với nhịp 1 giây lý tưởng
+            now = self.clock.monotonic()
+            TIMER_DRIFT_SECONDS.observe(abs(now - last_tick - 1.0))
+            last_tick = now
         
         if self.remaining_seconds <= 0:
             self.finished.emit()
 
 class MainWindow(QMainWindow):
     """Cửa sổ chính của ứng dụng"""
+    configChanged = pyqtSignal(object)  # Tập key cấu hình bị sửa từ bên ngoài (phát từ thread theo dõi)
     
-    def __init__(self, config_manager: ConfigManager, password_manager: PasswordManager):
+    def __init__(self, config_manager: ConfigManager, password_manager: PasswordManager, engine,
+                 startup: StartupTasks):
         super().__init__()
         
         self.config_manager = config_manager
         self.password_manager = password_manager
-        self.website_blocker = WebsiteBlocker(config_manager.get_backup_hosts_path())
-        self.session_manager = SessionManager(config_manager.get_data_dir())
+        # Engine điều khiển phiên (FocusEngine trong process hoặc EngineClient tới daemon)
+        self.engine = engine
+        # Kết quả khởi tạo chạy nền (xem src/core/startup.py)
+        self.startup = startup
+        self.startup_bridge = FutureBridge(self)
+        # Chỉ dùng để đọc thống kê và lịch sử
+        self.session_manager: SessionManager = startup.result("session_manager")
+        
+        # Tác vụ nền: mọi thao tác chặn (sudo, hosts, SQLite) chạy ngoài luồng giao diện
+        self.tasks = TaskRunner(self)
+        # Engine trong process còn đang khởi động trên thread nền: tác vụ engine đầu tiên chờ nó xong
+        if "engine_start" in startup:
+            self.tasks.submit(startup.result, "engine_start", resource="engine", track_busy=False,
+                              on_error=lambda e: logger.error("Lỗi khởi động engine: %s", e))
+        self.sync_pending = False
+        # Hạn mức đang hiển thị, chỉ dựng lại danh sách khi đổi
+        self.quota_rows = None
         
         # Trạng thái phiên
         self.current_session_id = None
         self.is_focus_session_active = False
-        self.focus_timer = FocusTimer()
+        self.current_phase_index = 0
+        self.plan_waiting = False
+        self.session_paused = False
+        # Timer hiển thị dùng cùng đồng hồ với engine (EngineClient luôn dùng thời gian thật)
+        self.focus_timer = FocusTimer(getattr(engine, "clock", SYSTEM_CLOCK))
         
         # Thiết lập UI
-        self.setup_ui()
-        self.setup_system_tray()
+        with profiler.span("setup_ui"):
+            self.setup_ui()
+        with profiler.span("system_tray"):
+            self.setup_system_tray()
         self.setup_connections()
         
         # Khôi phục vị trí cửa sổ
         self.restore_window_position()
         
-        # Kiểm tra phiên đang chạy
-        self.check_existing_session()
+        # Cấu hình bị sửa từ bên ngoài (CLI, policy): ConfigManager báo từ thread theo dõi, signal đưa về luồng giao diện
+        self.configChanged.connect(self.apply_config_changes)
+        self.config_listener = self.configChanged.emit
+        self.config_manager.add_listener(self.config_listener)
+        
+        # Khung cửa sổ hiện trước, thống kê và phiên dở dang điền vào khi truy vấn nền xong
+        self.startup_bridge.watch(startup.future("today_stats"), self.show_today_stats)
+        self.startup_bridge.watch(startup.future("week_stats"), self.show_startup_stats)
+        self.startup_bridge.watch(startup.future("unfinished_session"), self.check_existing_session)
+        
+        # Đồng bộ với phiên được điều khiển từ nơi khác (CLI, daemon)
+        QTimer.singleShot(0, self.sync_with_engine)
+        self.engine_sync_timer = QTimer(self)
+        self.engine_sync_timer.timeout.connect(self.sync_with_engine)
+        self.engine_sync_timer.start(2000)
     
     def setup_ui(self):
         """Thiết lập giao diện người dùng"""
@@ -112,6 +167,14 @@ class MainWindow(QMainWindow):
         # Đặt tỷ lệ split
         splitter.setStretchFactor(0, 1)
         splitter.setStretchFactor(1, 2)
+        
+        # Chỉ báo bận khi có tác vụ nền đang chạy
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setMaximumWidth(120)
+        self.busy_indicator.setFormat("Đang xử lý...")
+        self.busy_indicator.setVisible(False)
+        self.statusBar().addPermanentWidget(self.busy_indicator)
     
     def create_left_panel(self):
         """Tạo panel bên trái với timer và controls"""
@@ -133,6 +196,12 @@ class MainWindow(QMainWindow):
         self.time_display.setStyleSheet("color: #2196F3; background: #f0f0f0; border-radius: 10px; padding: 20px;")
         timer_layout.addWidget(self.time_display)
         
+        # Pha hiện tại của chu kỳ (ẩn với phiên một pha)
+        self.phase_label = QLabel("")
+        self.phase_label.setAlignment(Qt.AlignCenter)
+        self.phase_label.setVisible(False)
+        timer_layout.addWidget(self.phase_label)
+        
         # Thanh tiến trình
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -147,8 +216,24 @@ class MainWindow(QMainWindow):
         self.duration_spinbox.setValue(self.config_manager.get_focus_duration())
         time_setting_layout.addWidget(self.duration_spinbox)
         
+        # Số pha tập trung; > 1 xen kẽ nghỉ ngắn/dài theo cấu hình
+        time_setting_layout.addWidget(QLabel("Chu kỳ:"))
+        self.cycles_spinbox = QSpinBox()
+        self.cycles_spinbox.setRange(1, 24)
+        self.cycles_spinbox.setValue(self.config_manager.settings.pomodoro.cycles)
+        self.cycles_spinbox.setToolTip("Số pha tập trung trong phiên, nghỉ giữa các pha")
+        time_setting_layout.addWidget(self.cycles_spinbox)
+        
         timer_layout.addLayout(time_setting_layout)
         
+        # Hồ sơ chặn của phiên
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Hồ sơ chặn:"))
+        self.profile_combo = QComboBox()
+        self.update_profile_combo()
+        profile_layout.addWidget(self.profile_combo, 1)
+        timer_layout.addLayout(profile_layout)
+        
         # Nút điều khiển
         control_layout = QHBoxLayout()
         
@@ -156,6 +241,11 @@ class MainWindow(QMainWindow):
         self.start_btn.clicked.connect(self.start_focus_session)
         control_layout.addWidget(self.start_btn)
         
+        self.pause_btn = QPushButton("⏸️ Tạm dừng")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+        control_layout.addWidget(self.pause_btn)
+        
         self.stop_btn = QPushButton("⏹️ Dừng")
         self.stop_btn.clicked.connect(self.stop_focus_session)
         self.stop_btn.setEnabled(False)
@@ -188,17 +278,16 @@ class MainWindow(QMainWindow):
         stats_group = QGroupBox("📊 Thống kê hôm nay")
         stats_layout = QGridLayout(stats_group)
         
-        today_stats = self.session_manager.get_today_stats()
-        
-        self.total_time_label = QLabel(f"{today_stats['total_focus_time']} phút")
+        # Giá trị được điền khi truy vấn nền hoàn tất
+        self.total_time_label = QLabel("…")
         stats_layout.addWidget(QLabel("Tổng thời gian:"), 0, 0)
         stats_layout.addWidget(self.total_time_label, 0, 1)
         
-        self.sessions_count_label = QLabel(str(today_stats['sessions_completed']))
+        self.sessions_count_label = QLabel("…")
         stats_layout.addWidget(QLabel("Phiên hoàn thành:"), 1, 0)
         stats_layout.addWidget(self.sessions_count_label, 1, 1)
         
-        self.success_rate_label = QLabel(f"{today_stats['success_rate']:.1f}%")
+        self.success_rate_label = QLabel("…")
         stats_layout.addWidget(QLabel("Tỷ lệ thành công:"), 2, 0)
         stats_layout.addWidget(self.success_rate_label, 2, 1)
         
@@ -219,7 +308,9 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(website_tab, "🌐 Website")
         
         # Tab 2: Thống kê
-        self.stats_widget = StatisticsWidget(self.session_manager)
+        with profiler.span("stats_widget"):
+            self.stats_widget = StatisticsWidget(self.session_manager, auto_refresh=False)
+        self.stats_widget.refreshRequested.connect(self.update_today_stats)
         self.tab_widget.addTab(self.stats_widget, "📈 Thống kê")
         
         # Tab 3: Lịch sử
@@ -264,6 +355,16 @@ class MainWindow(QMainWindow):
         # Kết nối Enter key
         self.website_input.returnPressed.connect(self.add_website)
         
+        # Website có hạn mức mỗi ngày (section quotas của cấu hình)
+        layout.addWidget(QLabel("⏳ Website có hạn mức hôm nay:"))
+        self.quota_list = QListWidget()
+        self.quota_list.setMaximumHeight(120)
+        layout.addWidget(self.quota_list)
+        
+        quota_btn = QPushButton("🔓 Mở / chặn lại website đã chọn")
+        quota_btn.clicked.connect(self.toggle_quota_site)
+        layout.addWidget(quota_btn)
+        
         return widget
     
     def create_history_tab(self):
@@ -275,6 +376,8 @@ class MainWindow(QMainWindow):
         
         self.history_text = QTextEdit()
         self.history_text.setReadOnly(True)
+        self._history_html = None
+        # Lịch sử điền vào khi truy vấn nền xong, không chặn lần vẽ đầu tiên
         self.update_history_display()
         layout.addWidget(self.history_text)
         
@@ -308,6 +411,10 @@ class MainWindow(QMainWindow):
         check_sudo_btn.clicked.connect(self.check_sudo_permissions)
         sudo_layout.addWidget(check_sudo_btn)
         
+        diagnostics_btn = QPushButton("Chẩn đoán (log)")
+        diagnostics_btn.clicked.connect(self.show_diagnostics)
+        sudo_layout.addWidget(diagnostics_btn)
+        
         layout.addWidget(sudo_group)
         
         # Thông tin ứng dụng
@@ -358,24 +465,68 @@ class MainWindow(QMainWindow):
         """Thiết lập các kết nối signal/slot"""
         self.focus_timer.timeChanged.connect(self.update_timer_display)
         self.focus_timer.finished.connect(self.on_timer_finished)
+        self.tasks.busyChanged.connect(self.set_busy)
     
     def restore_window_position(self):
         """Khôi phục vị trí cửa sổ"""
-        pos = self.config_manager.get("window_position", {"x": 100, "y": 100})
-        size = self.config_manager.get("window_size", {"width": 900, "height": 700})
+        pos = self.config_manager.settings.window_position
+        size = self.config_manager.settings.window_size
         
-        self.move(pos["x"], pos["y"])
-        self.resize(size["width"], size["height"])
+        self.move(pos.x, pos.y)
+        self.resize(size.width, size.height)
     
-    def check_existing_session(self):
-        """Kiểm tra phiên đang chạy"""
-        current_session = self.session_manager.get_current_session()
+    def apply_config_changes(self, changed: set):
+        """Áp dụng cấu hình mới sau khi file bị process khác sửa"""
+        if "blocked_websites" in changed:
+            self.update_website_list()
+        
+        if "strict_mode" in changed:
+            self.strict_mode_cb.blockSignals(True)
+            self.strict_mode_cb.setChecked(self.config_manager.is_strict_mode())
+            self.strict_mode_cb.blockSignals(False)
+        
+        if "default_focus_duration" in changed and not self.is_focus_session_active:
+            self.duration_spinbox.setValue(self.config_manager.get_focus_duration())
+        
+        if "profiles" in changed:
+            self.update_profile_combo()
+        
+        self.refresh_engine_config(changed)
+    
+    def refresh_engine_config(self, changed: set):
+        """Áp các key `changed` vào engine: khối chặn hồ sơ, lịch chặn, hạn mức và danh sách theo dõi"""
+        if changed & {"profiles", "schedules", "blocked_websites"}:
+            self.tasks.submit(self.engine.prepare_profiles, resource="engine", track_busy=False,
+                              on_error=lambda e: logger.warning("Lỗi biên dịch hồ sơ chặn: %s", e))
+        if changed & {"schedules", "blocked_websites"}:
+            self.tasks.submit(self.engine.refresh_schedules, resource="engine", track_busy=False,
+                              on_error=lambda e: logger.warning("Lỗi cập nhật lịch chặn: %s", e))
+        if "quotas" in changed:
+            self.tasks.submit(self.engine.refresh_quotas, resource="engine", track_busy=False,
+                              on_error=lambda e: logger.warning("Lỗi cập nhật hạn mức: %s", e))
+        if "subscriptions" in changed:
+            self.tasks.submit(self.engine.refresh_subscriptions, resource="engine", track_busy=False,
+                              on_error=lambda e: logger.warning("Lỗi cập nhật danh sách theo dõi: %s", e))
+    
+    def update_profile_combo(self):
+        """Điền danh sách hồ sơ chặn, giữ lựa chọn hiện tại nếu còn"""
+        current = self.profile_combo.currentData()
+        self.profile_combo.clear()
+        self.profile_combo.addItem("Mặc định (danh sách website)", DEFAULT_PROFILE)
+        for name in self.config_manager.get_profile_names():
+            self.profile_combo.addItem(name, name)
+        index = self.profile_combo.findData(current)
+        self.profile_combo.setCurrentIndex(max(0, index))
+    
+    def check_existing_session(self, current_session):
+        """Hỏi người dùng về phiên chưa kết thúc (tìm trên thread nền lúc khởi động)"""
         if current_session:
-            # Có phiên đang chạy
+            # Có phiên đang chạy (hoặc đang tạm dừng)
+            state = "đang tạm dừng" if current_session.get('paused') else "đang chạy"
             reply = QMessageBox.question(
                 self,
                 "Phiên đang chạy",
-                "Có phiên tập trung đang chạy từ trước.\n"
+                f"Có phiên tập trung {state} từ trước.\n"
                 "Bạn có muốn tiếp tục phiên này không?",
                 QMessageBox.Yes | QMessageBox.No
             )
@@ -384,44 +535,131 @@ class MainWindow(QMainWindow):
                 self.resume_session(current_session)
             else:
                 # Kết thúc phiên cũ
-                self.session_manager.end_session(current_session['id'], completed=False, notes="Bị gián đoạn do khởi động lại app")
+                self.tasks.submit(self.engine.discard_session, current_session['id'], resource="engine",
+                                  on_error=self.show_engine_error)
     
     def resume_session(self, session_info):
-        """Tiếp tục phiên đang chạy"""
-        self.current_session_id = session_info['id']
-        self.is_focus_session_active = True
-        
-        # Tính thời gian còn lại
-        from datetime import datetime
-        elapsed = (datetime.now() - session_info['start_time']).total_seconds()
-        planned_seconds = session_info['planned_duration'] * 60
-        remaining_seconds = max(0, planned_seconds - elapsed)
-        
-        if remaining_seconds > 0:
-            # Bắt đầu timer với thời gian còn lại
-            self.focus_timer.remaining_seconds = int(remaining_seconds)
-            self.focus_timer.is_running = True
-            self.focus_timer.start()
-            
-            # Cập nhật UI
-            self.start_btn.setEnabled(False)
-            self.stop_btn.setEnabled(True)
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setMaximum(planned_seconds)
+        """Tiếp tục phiên đang chạy (chặn lại website trên thread nền)"""
+        self.tasks.submit(self.engine.resume_session, session_info['id'], resource="engine",
+                          on_result=self.on_session_resumed, on_error=self.show_engine_error)
+    
+    def on_session_resumed(self, status):
+        """Cập nhật giao diện sau khi engine tiếp tục phiên"""
+        if status['active']:
+            self.show_session_started(status)
             
-            # Bật chặn website
-            if not self.website_blocker.add_block_entries(session_info['websites_blocked']):
+            if status['blocking_error']:
                 QMessageBox.warning(self, "Lỗi", "Không thể chặn website. Kiểm tra quyền sudo!")
         else:
             # Phiên đã hết thời gian
-            self.on_timer_finished()
+            self.show_session_ended(status['last_result'])
+    
+    def sync_with_engine(self):
+        """Lấy trạng thái phiên của engine trên thread nền (bỏ qua nếu lần trước chưa xong)"""
+        if self.sync_pending:
+            return
+        
+        self.sync_pending = True
+        future = self.tasks.submit(
+            self.engine.status, resource="engine", track_busy=False,
+            on_result=self.apply_engine_status,
+            on_error=lambda e: logger.warning("Lỗi đồng bộ với engine: %s", e)
+        )
+        future.done.connect(self.on_sync_done)
+    
+    def on_sync_done(self):
+        self.sync_pending = False
+    
+    def apply_engine_status(self, status):
+        """Cập nhật giao diện theo trạng thái phiên của engine"""
+        self.show_schedule_status(status)
+        self.show_quotas(status)
+        if status['active']:
+            if (not self.is_focus_session_active or status['session_id'] != self.current_session_id
+                    or status['phase_index'] != self.current_phase_index or status['waiting'] != self.plan_waiting
+                    or status['paused'] != self.session_paused):
+                self.show_session_started(status)
+            elif not self.session_paused and abs(self.focus_timer.remaining_seconds - status['remaining_seconds']) > 1:
+                # Chỉnh lệch giữa timer hiển thị và hạn thật của phiên
+                self.focus_timer.remaining_seconds = status['remaining_seconds']
+        elif self.is_focus_session_active:
+            # Phiên đã kết thúc ở nơi khác
+            self.show_session_ended(status['last_result'])
+    
+    def show_schedule_status(self, status):
+        """Thông báo trên thanh trạng thái khi lịch chặn đang chặn website"""
+        scheduled = status.get('scheduled_websites')
+        if scheduled:
+            until = datetime.fromtimestamp(status['scheduled_until']).strftime("%H:%M")
+            self.statusBar().showMessage(f"🗓️ Đang chặn {len(scheduled)} website theo lịch tới {until}")
+        elif self.statusBar().currentMessage().startswith("🗓️"):
+            self.statusBar().clearMessage()
+    
+    def show_quotas(self, status):
+        """Cập nhật danh sách hạn mức website (phút còn lại, đang mở hay bị chặn)"""
+        rows = tuple((quota['website'], quota['minutes'], quota['remaining_seconds'] // 60, quota['open'])
+                     for quota in status.get('quotas', ()))
+        if rows == self.quota_rows:
+            return
+        self.quota_rows = rows
+        
+        current = self.quota_list.currentItem()
+        selected = current.data(Qt.UserRole) if current else None
+        self.quota_list.clear()
+        for website, minutes, remaining, is_open in rows:
+            state = "🔓 đang mở" if is_open else "🔒 bị chặn"
+            item = QListWidgetItem(f"{website} — còn {remaining}/{minutes} phút ({state})")
+            item.setData(Qt.UserRole, website)
+            self.quota_list.addItem(item)
+            if website == selected:
+                self.quota_list.setCurrentItem(item)
+    
+    def toggle_quota_site(self):
+        """Mở website có hạn mức đang chọn, hoặc chặn lại nếu đang mở"""
+        current = self.quota_list.currentItem()
+        if not current:
+            QMessageBox.warning(self, "Lỗi", "Vui lòng chọn website có hạn mức!")
+            return
+        
+        website = current.data(Qt.UserRole)
+        is_open = any(row[0] == website and row[3] for row in self.quota_rows or ())
+        call = self.engine.close_site if is_open else self.engine.open_site
+        self.tasks.submit(call, website, resource="engine",
+                          on_result=self.apply_engine_status, on_error=self.show_engine_error)
+    
+    def show_engine_error(self, error):
+        """Hiển thị lỗi từ engine rồi đồng bộ lại trạng thái"""
+        QMessageBox.warning(self, "Lỗi", str(error))
+        self.sync_with_engine()
+    
+    def set_busy(self, busy):
+        """Chỉ báo bận khi còn tác vụ nền đang chờ; khóa các nút điều khiển phiên"""
+        self.busy_indicator.setVisible(busy)
+        if busy:
+            self.start_btn.setEnabled(False)
+            self.pause_btn.setEnabled(False)
+            self.stop_btn.setEnabled(False)
+        else:
+            self.start_btn.setEnabled(not self.is_focus_session_active or self.plan_waiting)
+            self.pause_btn.setEnabled(self.is_focus_session_active and not self.plan_waiting)
+            self.stop_btn.setEnabled(self.is_focus_session_active)
     
     # === TIMER METHODS ===
     
     def start_focus_session(self):
-        """Bắt đầu phiên tập trung"""
-        # Kiểm tra quyền sudo
-        if not self.website_blocker.has_sudo_access():
+        """Bắt đầu phiên tập trung (hoặc lần nghỉ đang chờ của chu kỳ)"""
+        if self.plan_waiting:
+            self.tasks.submit(self.engine.continue_plan, resource="engine",
+                              on_result=self.show_session_started, on_error=self.show_engine_error)
+            return
+        
+        # Kiểm tra quyền sudo (chạy sudo -n trên thread nền)
+        self.tasks.submit(self.engine.has_sudo_access, on_result=self.start_with_sudo_status,
+                          on_error=self.show_engine_error)
+    
+    def start_with_sudo_status(self, has_sudo):
+        """Bắt đầu phiên sau khi biết có quyền sudo hay không"""
+        if not has_sudo:
             reply = QMessageBox.question(
                 self,
                 "Không có quyền sudo",
@@ -434,37 +672,106 @@ class MainWindow(QMainWindow):
                 return
         
         duration = self.duration_spinbox.value()
-        websites = self.config_manager.get_blocked_websites()
-        
-        # Tạo phiên mới
-        self.current_session_id = self.session_manager.start_session(duration, websites)
-        if self.current_session_id == -1:
-            QMessageBox.critical(self, "Lỗi", "Không thể bắt đầu phiên tập trung!")
-            return
+        cycles = self.cycles_spinbox.value()
+        profile = self.profile_combo.currentData()
+        
+        # Tạo phiên mới và chặn website theo hồ sơ đã chọn
+        self.tasks.submit(
+            self.engine.start_session, duration, None, has_sudo, cycles, profile, resource="engine",
+            on_result=lambda status: self.on_session_started(status, has_sudo),
+            on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Không thể bắt đầu phiên tập trung!\n{e}")
+        )
+    
+    def on_session_started(self, status, has_sudo):
+        """Cập nhật giao diện sau khi engine bắt đầu phiên"""
+        if has_sudo and status['blocking_error']:
+            QMessageBox.warning(self, "Lỗi", "Không thể chặn website!")
         
-        # Chặn website
-        if self.website_blocker.has_sudo_access():
-            if not self.website_blocker.add_block_entries(websites):
-                QMessageBox.warning(self, "Lỗi", "Không thể chặn website!")
+        # Bắt đầu timer và cập nhật UI
+        self.show_session_started(status)
         
-        # Bắt đầu timer
-        self.focus_timer.start_timer(duration)
+        QMessageBox.information(
+            self,
+            "Bắt đầu tập trung",
+            f"Phiên tập trung {status['planned_duration']} phút"
+            + (f" × {(status['phase_count'] + 1) // 2} chu kỳ" if status['phase_count'] > 1 else "")
+            + " đã bắt đầu!\n"
+            "Website xao nhãng đã được chặn."
+        )
+    
+    def show_session_started(self, status):
+        """Hiển thị phiên đang chạy theo trạng thái của engine"""
+        self.current_session_id = status['session_id']
         self.is_focus_session_active = True
+        self.current_phase_index = status['phase_index']
+        self.plan_waiting = status['waiting']
+        self.session_paused = status['paused']
+        
+        # Pha hiện tại của chu kỳ
+        if status['phase_count'] > 1:
+            phase = f"{PHASE_LABELS[status['phase_kind']]} (pha {status['phase_index'] + 1}/{status['phase_count']})"
+            if self.plan_waiting:
+                phase = f"Chờ bắt đầu: {phase} ({status['planned_duration']} phút)"
+            self.phase_label.setText(phase)
+            self.phase_label.setStyleSheet("color: #2196F3;" if status['phase_kind'] == PHASE_WORK else "color: #4CAF50;")
+        self.phase_label.setVisible(status['phase_count'] > 1)
+        
+        if self.plan_waiting:
+            # Không đếm ngược khi chờ; nút Bắt đầu dùng để vào lần nghỉ
+            self.focus_timer.stop_timer()
+            self.update_timer_display(0)
+            self.start_btn.setText("▶️ Bắt đầu nghỉ")
+            self.start_btn.setEnabled(True)
+            self.pause_btn.setEnabled(False)
+            self.stop_btn.setEnabled(True)
+            self.progress_bar.setVisible(False)
+            return
         
-        # Cập nhật UI
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setMaximum(status['planned_duration'] * 60)
+        self.start_btn.setText("🚀 Bắt đầu")
         self.start_btn.setEnabled(False)
+        self.pause_btn.setEnabled(True)
         self.stop_btn.setEnabled(True)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(duration * 60)
         
-        # Lưu thời lượng mặc định
-        self.config_manager.set_focus_duration(duration)
+        if self.session_paused:
+            # Giữ nguyên thời gian còn lại cho tới khi tiếp tục
+            self.focus_timer.stop_timer()
+            self.focus_timer.remaining_seconds = status['remaining_seconds']
+            self.update_timer_display(status['remaining_seconds'])
+            self.pause_btn.setText("▶️ Tiếp tục")
+            return
+        self.pause_btn.setText("⏸️ Tạm dừng")
         
-        QMessageBox.information(
-            self,
-            "Bắt đầu tập trung",
-            f"Phiên tập trung {duration} phút đã bắt đầu!\n"
-            "Website xao nhãng đã được chặn."
+        # Timer vừa đếm hết pha trước: chờ thread kết thúc rồi chạy lại với pha mới
+        if self.focus_timer.remaining_seconds <= 0:
+            self.focus_timer.wait()
+        
+        # Bắt đầu timer với thời gian còn lại
+        self.focus_timer.remaining_seconds = status['remaining_seconds']
+        if not self.focus_timer.isRunning():
+            self.focus_timer.is_running = True
+            self.focus_timer.start()
+    
+    def toggle_pause(self):
+        """Tạm dừng hoặc tiếp tục phiên"""
+        if not self.is_focus_session_active or self.plan_waiting:
+            return
+        
+        if self.session_paused:
+            self.tasks.submit(self.engine.unpause_session, resource="engine",
+                              on_result=self.show_session_started, on_error=self.show_engine_error)
+            return
+        
+        password = None
+        if self.config_manager.is_strict_mode():
+            password = PasswordDialog.ask(self.password_manager, "Tạm dừng phiên tập trung", self)
+            if password is None:
+                return
+        
+        self.tasks.submit(
+            self.engine.pause_session, password, password is not None, resource="engine",
+            on_result=self.show_session_started, on_error=self.show_engine_error
         )
     
     def stop_focus_session(self):
@@ -472,44 +779,44 @@ class MainWindow(QMainWindow):
         if not self.is_focus_session_active:
             return
         
+        password = None
         # Kiểm tra chế độ nghiêm khắc
         if self.config_manager.is_strict_mode():
             # Yêu cầu mật khẩu
-            dialog = PasswordDialog(self.password_manager, "Dừng phiên tập trung", self)
-            if dialog.exec_() != dialog.Accepted:
+            password = PasswordDialog.ask(self.password_manager, "Dừng phiên tập trung", self)
+            if password is None:
                 return
         
-        # Dừng timer
+        # Kết thúc phiên và tắt chặn website (daemon tự xác thực lại mật khẩu)
+        self.tasks.submit(
+            self.engine.stop_session, password, password is not None, resource="engine",
+            on_result=self.on_session_stopped, on_error=self.show_engine_error
+        )
+    
+    def on_session_stopped(self, status):
+        """Cập nhật giao diện sau khi engine dừng phiên"""
+        # Dừng timer và cập nhật UI
         self.focus_timer.stop_timer()
-        
-        # Kết thúc phiên
-        if self.current_session_id:
-            self.session_manager.end_session(
-                self.current_session_id, 
-                completed=False, 
-                notes="Dừng sớm bởi người dùng"
-            )
-        
-        # Tắt chặn website
-        self.website_blocker.remove_block_entries()
-        
-        # Cập nhật UI
         self.reset_ui_after_session()
+        self.update_today_stats()
         
         QMessageBox.information(self, "Dừng phiên", "Phiên tập trung đã được dừng.")
     
     def on_timer_finished(self):
         """Xử lý khi timer kết thúc"""
-        # Kết thúc phiên
-        if self.current_session_id:
-            self.session_manager.end_session(
-                self.current_session_id,
-                completed=True,
-                notes="Hoàn thành đầy đủ"
-            )
-        
-        # Tắt chặn website
-        self.website_blocker.remove_block_entries()
+        self.tasks.submit(self.engine.poll, resource="engine", on_result=self.on_poll_result,
+                          on_error=lambda e: logger.error("Lỗi kết thúc phiên: %s", e))
+    
+    def on_poll_result(self, status):
+        if status['active']:
+            # Timer hiển thị chạy nhanh hơn hạn thật của phiên
+            self.show_session_started(status)
+        else:
+            self.show_session_ended(status['last_result'])
+    
+    def show_session_ended(self, result):
+        """Cập nhật giao diện khi phiên kết thúc"""
+        self.focus_timer.stop_timer()
         
         # Cập nhật UI
         self.reset_ui_after_session()
@@ -517,20 +824,28 @@ class MainWindow(QMainWindow):
         # Cập nhật thống kê
         self.update_today_stats()
         
-        # Thông báo hoàn thành
-        QMessageBox.information(
-            self,
-            "🎉 Hoàn thành!",
-            "Chúc mừng! Bạn đã hoàn thành phiên tập trung.\n"
-            "Các trang web đã được mở khóa."
-        )
+        if result and result.get('completed'):
+            # Thông báo hoàn thành
+            QMessageBox.information(
+                self,
+                "🎉 Hoàn thành!",
+                "Chúc mừng! Bạn đã hoàn thành phiên tập trung.\n"
+                "Các trang web đã được mở khóa."
+            )
     
     def reset_ui_after_session(self):
         """Reset UI sau khi kết thúc phiên"""
         self.is_focus_session_active = False
         self.current_session_id = None
+        self.current_phase_index = 0
+        self.plan_waiting = False
+        self.session_paused = False
+        self.phase_label.setVisible(False)
         
+        self.start_btn.setText("🚀 Bắt đầu")
         self.start_btn.setEnabled(True)
+        self.pause_btn.setText("⏸️ Tạm dừng")
+        self.pause_btn.setEnabled(False)
         self.stop_btn.setEnabled(False)
         self.progress_bar.setVisible(False)
         
@@ -574,8 +889,14 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Thông báo", "Website này đã có trong danh sách!")
             return
         
-        self.config_manager.add_blocked_website(website)
+        try:
+            self.config_manager.add_blocked_website(website)
+        except ConfigError as e:
+            QMessageBox.warning(self, "Lỗi", f"Website không hợp lệ!\n{e}")
+            return
+        
         self.update_website_list()
+        self.refresh_engine_config({"blocked_websites"})
         self.website_input.clear()
     
     def remove_website(self):
@@ -596,6 +917,7 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             self.config_manager.remove_blocked_website(website)
             self.update_website_list()
+            self.refresh_engine_config({"blocked_websites"})
     
     # === SETTINGS ===
     
@@ -617,8 +939,7 @@ class MainWindow(QMainWindow):
     def change_password(self):
         """Đổi mật khẩu"""
         # Xác thực mật khẩu cũ
-        dialog = PasswordDialog(self.password_manager, "Xác thực mật khẩu cũ", self)
-        if dialog.exec_() != dialog.Accepted:
+        if PasswordDialog.ask(self.password_manager, "Xác thực mật khẩu cũ", self) is None:
             return
         
         # Nhập mật khẩu mới (tương tự setup dialog)
@@ -626,12 +947,28 @@ class MainWindow(QMainWindow):
         setup_dialog = SetupDialog(self)
         setup_dialog.setWindowTitle("Đổi mật khẩu")
         
-        if setup_dialog.exec_() == setup_dialog.Accepted:
+        accepted = setup_dialog.exec_() == setup_dialog.Accepted
+        # Dialog có parent là cửa sổ chính: xóa ngay, không để tích lũy tới khi thoát
+        setup_dialog.deleteLater()
+        if accepted:
             QMessageBox.information(self, "Thành công", "Mật khẩu đã được thay đổi!")
     
+    def show_diagnostics(self):
+        """Mở dialog xem log gần nhất"""
+        from PyQt5.QtWidgets import QApplication
+        from src.gui.diagnostics_dialog import DiagnosticsDialog
+        dialog = DiagnosticsDialog(self.config_manager, getattr(QApplication.instance(), "watchdog", None), self)
+        dialog.exec_()
+        dialog.deleteLater()
+    
     def check_sudo_permissions(self):
-        """Kiểm tra quyền sudo"""
-        if self.website_blocker.has_sudo_access():
+        """Kiểm tra quyền sudo (trên thread nền)"""
+        self.tasks.submit(self.engine.has_sudo_access, on_result=self.show_sudo_status,
+                          on_error=self.show_engine_error)
+    
+    def show_sudo_status(self, has_sudo):
+        """Hiển thị kết quả kiểm tra quyền sudo"""
+        if has_sudo:
             QMessageBox.information(
                 self,
                 "Quyền sudo",
@@ -652,44 +989,68 @@ class MainWindow(QMainWindow):
     # === HISTORY & STATS ===
     
     def update_history_display(self):
-        """Cập nhật hiển thị lịch sử"""
-        sessions = self.session_manager.get_recent_sessions(20)
-        
-        html = "<html><body>"
-        html += "<h3>📚 Lịch sử phiên tập trung</h3>"
+        """Cập nhật lịch sử (truy vấn SQLite trên thread nền)"""
+        self.tasks.submit(self.query_history, resource="stats", on_result=self.show_history, track_busy=False)
+    
+    def query_history(self):
+        """Truy vấn các phiên gần nhất (chạy trên thread nền)"""
+        return self.session_manager.get_recent_sessions(20)
+    
+    def show_history(self, sessions):
+        """Hiển thị lịch sử đã truy vấn"""
+        parts = ["<html><body>", "<h3>📚 Lịch sử phiên tập trung</h3>"]
         
         if not sessions:
-            html += "<p>Chưa có phiên nào được hoàn thành.</p>"
+            parts.append("<p>Chưa có phiên nào được hoàn thành.</p>")
         else:
             for session in sessions:
-                start_time = session['start_time']
-                duration = session['actual_duration']
                 status = "✅ Hoàn thành" if session['completed'] else "❌ Gián đoạn"
-                
-                html += f"""
-                <div style='border: 1px solid #ddd; margin: 5px; padding: 10px; border-radius: 5px;'>
-                    <strong>Phiên #{session['id']}</strong><br>
-                    <strong>Thời gian:</strong> {start_time}<br>
-                    <strong>Thời lượng:</strong> {duration} phút<br>
-                    <strong>Trạng thái:</strong> {status}<br>
-                    <strong>Ghi chú:</strong> {session['notes'] or 'Không có'}
-                </div>
-                """
-        
-        html += "</body></html>"
-        self.history_text.setHtml(html)
+                parts.append(
+                    "<div style='border: 1px solid #ddd; margin: 5px; padding: 10px; border-radius: 5px;'>"
+                    f"<strong>Phiên #{session['id']}</strong><br>"
+                    f"<strong>Thời gian:</strong> {session['start_time']}<br>"
+                    f"<strong>Thời lượng:</strong> {session['actual_duration']} phút<br>"
+                    + (f"<strong>Hồ sơ chặn:</strong> {html_escape(session['profile'])}<br>" if session['profile'] else "")
+                    + (f"<strong>Ứng dụng bị chặn:</strong> {session['app_hits']} lần<br>" if session['app_hits'] else "")
+                    + (f"<strong>Lượt truy cập bị chặn:</strong> {session['blocked_attempts']}<br>"
+                       if session['blocked_attempts'] else "")
+                    + f"<strong>Trạng thái:</strong> {status}<br>"
+                    f"<strong>Ghi chú:</strong> {session['notes'] or 'Không có'}"
+                    "</div>"
+                )
+        
+        parts.append("</body></html>")
+        html = "".join(parts)
+        # Không dựng lại document của QTextEdit khi lịch sử không đổi
+        if html != self._history_html:
+            self._history_html = html
+            self.history_text.setHtml(html)
     
     def update_today_stats(self):
-        """Cập nhật thống kê hôm nay"""
-        today_stats = self.session_manager.get_today_stats()
-        
+        """Cập nhật thống kê hôm nay (truy vấn SQLite trên thread nền)"""
+        self.tasks.submit(self.query_stats, resource="stats", on_result=self.show_stats, track_busy=False)
+    
+    def query_stats(self):
+        """Truy vấn thống kê hôm nay, 7 ngày và ứng dụng trong phiên (chạy trên thread nền)"""
+        return (self.session_manager.get_today_stats(), self.session_manager.get_week_stats(),
+                self.session_manager.get_app_usage_summary())
+    
+    def show_stats(self, stats):
+        """Hiển thị thống kê đã truy vấn"""
+        today_stats, week_stats, app_usage = stats
+        self.show_today_stats(today_stats)
+        self.stats_widget.show_stats(today_stats, week_stats, app_usage)
+    
+    def show_startup_stats(self, week_stats):
+        """Vẽ biểu đồ thống kê khi truy vấn nền lúc khởi động hoàn tất"""
+        with profiler.span("stats_render"):
+            self.stats_widget.show_stats(self.startup.result("today_stats"), week_stats)
+    
+    def show_today_stats(self, today_stats):
+        """Hiển thị thống kê hôm nay đã truy vấn sẵn"""
         self.total_time_label.setText(f"{today_stats['total_focus_time']} phút")
         self.sessions_count_label.setText(str(today_stats['sessions_completed']))
         self.success_rate_label.setText(f"{today_stats['success_rate']:.1f}%")
-        
-        # Cập nhật stats widget
-        if hasattr(self, 'stats_widget'):
-            self.stats_widget.refresh_stats()
     
     # === WINDOW EVENTS ===
     
@@ -706,8 +1067,7 @@ class MainWindow(QMainWindow):
         """Xử lý đóng cửa sổ"""
         if self.is_focus_session_active and self.config_manager.is_strict_mode():
             # Chế độ nghiêm khắc - yêu cầu mật khẩu
-            dialog = PasswordDialog(self.password_manager, "Thoát ứng dụng", self)
-            if dialog.exec_() != dialog.Accepted:
+            if PasswordDialog.ask(self.password_manager, "Thoát ứng dụng", self) is None:
                 event.ignore()
                 return
         
@@ -723,19 +1083,32 @@ class MainWindow(QMainWindow):
         # Lưu vị trí cửa sổ
         pos = self.pos()
         size = self.size()
-        self.config_manager.set("window_position", {"x": pos.x(), "y": pos.y()})
-        self.config_manager.set("window_size", {"width": size.width(), "height": size.height()})
-        
-        # Dừng phiên nếu đang chạy
+        with self.config_manager.batch():
+            self.config_manager.set("window_position", {"x": pos.x(), "y": pos.y()})
+            self.config_manager.set("window_size", {"width": size.width(), "height": size.height()})
+        
+        # Bỏ các tác vụ còn chờ, dừng timer
+        self.engine_sync_timer.stop()
+        self.config_manager.remove_listener(self.config_listener)
+        self.tasks.cancel_all()
         if self.is_focus_session_active:
             self.focus_timer.stop_timer()
-            if self.current_session_id:
-                self.session_manager.end_session(
-                    self.current_session_id,
-                    completed=False,
-                    notes="Thoát ứng dụng"
-                )
-            self.website_blocker.remove_block_entries()
+        self.hide()
+        
+        # Ghi cấu hình và dừng phiên (phiên do daemon giữ vẫn tiếp tục) rồi thoát ứng dụng
+        self.tasks.submit(self.shutdown_engine, resource="engine",
+                          on_result=lambda _: self.exit_application(),
+                          on_error=self.exit_application)
+    
+    def shutdown_engine(self):
+        """Ghi cấu hình và dừng engine (chạy trên thread nền)"""
+        self.config_manager.flush()
+        self.engine.shutdown(notes="Thoát ứng dụng")
+    
+    def exit_application(self, error=None):
+        """Thoát event loop sau khi engine đã dừng"""
+        if error is not None:
+            logger.error("Lỗi khi thoát ứng dụng: %s", error)
         
         # Thoát ứng dụng
         from PyQt5.QtWidgets import QApplication
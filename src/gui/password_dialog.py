@@ -4,10 +4,11 @@ Dialog xác thực mật khẩu
 
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QPushButton, QMessageBox, QCheckBox)
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 from pathlib import Path
 import sys
+from typing import Optional, Set
 
 # Thêm thư mục src vào path
 current_dir = Path(__file__).parent.parent.parent
@@ -15,6 +16,35 @@ sys.path.insert(0, str(current_dir))
 
 from src.core.password_manager import PasswordManager
 
+class PasswordVerifyWorker(QThread):
+    """Thread xác thực mật khẩu (bcrypt) ngoài luồng giao diện"""
+    verified = pyqtSignal(bool)
+    # Worker của dialog đã đóng giữa chừng, giữ tham chiếu tới khi chạy xong
+    _detached: Set["PasswordVerifyWorker"] = set()
+    
+    def __init__(self, password_manager: PasswordManager, password: str, parent=None):
+        super().__init__(parent)
+        self.password_manager = password_manager
+        self.password = password
+    
+    def run(self):
+        """Chạy xác thực"""
+        self.verified.emit(self.password_manager.verify_password(self.password))
+    
+    def detach(self):
+        """Bỏ kết quả và tách khỏi dialog: worker chạy nốt KDF rồi tự xóa, không ai phải chờ"""
+        self.verified.disconnect()
+        self.setParent(None)
+        PasswordVerifyWorker._detached.add(self)
+        self.finished.connect(self._release)
+        if self.isFinished():
+            self._release()
+    
+    def _release(self):
+        if self in PasswordVerifyWorker._detached:
+            PasswordVerifyWorker._detached.discard(self)
+            self.deleteLater()
+
 class PasswordDialog(QDialog):
     """Dialog xác thực mật khẩu"""
     
@@ -22,14 +52,35 @@ class PasswordDialog(QDialog):
         super().__init__(parent)
         self.password_manager = password_manager
         self.title = title
+        self.verify_worker = None
+        self._lockout_until = 0
+        
+        # Một timer duy nhất cho thời điểm hết khóa
+        self.unlock_timer = QTimer(self)
+        self.unlock_timer.setSingleShot(True)
+        self.unlock_timer.timeout.connect(self.update_lockout_status)
+        
+        # Tick hiển thị đếm ngược, chỉ chạy khi đang khóa và dialog hiển thị
+        self.display_timer = QTimer(self)
+        self.display_timer.timeout.connect(self.update_lockout_countdown)
+        
         self.setup_ui()
         self.update_lockout_status()
+    
+    @classmethod
+    def ask(cls, password_manager: PasswordManager, title="Xác thực mật khẩu", parent=None) -> Optional[str]:
+        """Hiện dialog và trả về mật khẩu đã xác thực (None nếu hủy)
         
-        # Timer để cập nhật trạng thái khóa
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_lockout_status)
-        self.timer.start(1000)  # Cập nhật mỗi giây
-        
+        Dialog (cùng các QTimer của nó) được xóa ngay sau khi đóng, không nằm lại dưới parent.
+        """
+        dialog = cls(password_manager, title, parent)
+        try:
+            if dialog.exec_() != cls.Accepted:
+                return None
+            return dialog.password_input.text()
+        finally:
+            dialog.deleteLater()
+    
     def setup_ui(self):
         """Thiết lập giao diện"""
         self.setWindowTitle(self.title)
@@ -97,28 +148,27 @@ class PasswordDialog(QDialog):
             self.password_input.setEchoMode(QLineEdit.Password)
     
     def update_lockout_status(self):
-        """Cập nhật trạng thái khóa"""
-        if self.password_manager.is_locked_out():
-            remaining = self.password_manager.get_lockout_remaining()
-            minutes = remaining // 60
-            seconds = remaining % 60
-            
-            self.status_label.setText(
-                f"⚠️ Tài khoản bị khóa!\n"
-                f"Thời gian còn lại: {minutes:02d}:{seconds:02d}"
-            )
+        """Cập nhật trạng thái khóa (gọi khi trạng thái có thể đã thay đổi)"""
+        if self.is_verifying():
+            return
+        
+        self._lockout_until = self.password_manager.get_lockout_until()
+        
+        if self._lockout_until:
             self.status_label.setStyleSheet("color: red;")
             self.password_input.setEnabled(False)
             self.verify_btn.setEnabled(False)
+            self.update_lockout_countdown()
             
-            if remaining <= 0:
-                # Hết thời gian khóa
-                self.status_label.setText("")
-                self.status_label.setStyleSheet("")
-                self.password_input.setEnabled(True)
-                self.verify_btn.setEnabled(True)
-                self.password_input.setFocus()
+            # Hẹn đúng thời điểm hết khóa thay vì kiểm tra mỗi giây
+            remaining_ms = max(0, int((self._lockout_until - self.password_manager.clock.time()) * 1000))
+            self.unlock_timer.start(remaining_ms + 50)
+            if self.isVisible():
+                self.display_timer.start(1000)
         else:
+            self.unlock_timer.stop()
+            self.display_timer.stop()
+            
             remaining_attempts = self.password_manager.get_remaining_attempts()
             if remaining_attempts < 3:
                 self.status_label.setText(
@@ -131,10 +181,38 @@ class PasswordDialog(QDialog):
             
             self.password_input.setEnabled(True)
             self.verify_btn.setEnabled(True)
+            self.password_input.setFocus()
+    
+    def update_lockout_countdown(self):
+        """Cập nhật đồng hồ đếm ngược (không đọc file)"""
+        remaining = max(0, int(self._lockout_until - self.password_manager.clock.time()))
+        minutes = remaining // 60
+        seconds = remaining % 60
+        
+        self.status_label.setText(
+            f"⚠️ Tài khoản bị khóa!\n"
+            f"Thời gian còn lại: {minutes:02d}:{seconds:02d}"
+        )
+    
+    def showEvent(self, event):
+        """Bắt đầu tick hiển thị khi dialog hiện ra"""
+        super().showEvent(event)
+        if self._lockout_until:
+            self.update_lockout_countdown()
+            self.display_timer.start(1000)
+    
+    def hideEvent(self, event):
+        """Dừng tick hiển thị khi dialog bị ẩn"""
+        self.display_timer.stop()
+        super().hideEvent(event)
+    
+    def is_verifying(self) -> bool:
+        """Kiểm tra có đang xác thực trên worker thread không"""
+        return self.verify_worker is not None and self.verify_worker.isRunning()
     
     def verify_password(self):
-        """Xác thực mật khẩu"""
-        if self.password_manager.is_locked_out():
+        """Xác thực mật khẩu (bcrypt chạy trên worker thread)"""
+        if self.is_verifying() or self.password_manager.is_locked_out():
             return
         
         password = self.password_input.text()
@@ -143,7 +221,25 @@ class PasswordDialog(QDialog):
             QMessageBox.warning(self, "Lỗi", "Vui lòng nhập mật khẩu!")
             return
         
-        if self.password_manager.verify_password(password):
+        self.status_label.setText("⏳ Đang xác thực...")
+        self.status_label.setStyleSheet("color: gray;")
+        self.password_input.setEnabled(False)
+        self.verify_btn.setEnabled(False)
+        
+        self.verify_worker = PasswordVerifyWorker(self.password_manager, password, self)
+        self.verify_worker.verified.connect(self.on_password_verified)
+        self.verify_worker.start()
+    
+    def on_password_verified(self, is_correct: bool):
+        """Xử lý kết quả xác thực từ worker thread"""
+        if self.verify_worker is None:
+            # Dialog đã đóng trong lúc đang xác thực
+            return
+        
+        self.verify_worker.wait()
+        self.verify_worker = None
+        
+        if is_correct:
             self.accept()
         else:
             remaining = self.password_manager.get_remaining_attempts()
@@ -162,6 +258,7 @@ class PasswordDialog(QDialog):
                     "Tài khoản sẽ bị khóa trong 5 phút."
                 )
             
+            self.update_lockout_status()
             self.password_input.clear()
             self.password_input.setFocus()
     
@@ -172,8 +269,15 @@ class PasswordDialog(QDialog):
         else:
             super().keyPressEvent(event)
     
+    def done(self, result):
+        """Đóng dialog ngay cả khi đang xác thực (worker chạy nốt trên thread của nó)"""
+        if self.verify_worker is not None:
+            self.verify_worker.detach()
+            self.verify_worker = None
+        super().done(result)
+    
     def closeEvent(self, event):
         """Xử lý đóng dialog"""
-        if hasattr(self, 'timer'):
-            self.timer.stop()
+        self.unlock_timer.stop()
+        self.display_timer.stop()
         super().closeEvent(event)
@@ -6,9 +6,8 @@ import sys
 from pathlib import Path
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                             QGroupBox, QGridLayout, QPushButton)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.dates as mdates
@@ -19,15 +18,20 @@ current_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(current_dir))
 
 from src.core.session_manager import SessionManager
+from src.core.metrics import CHART_RENDER_SECONDS
 
 class StatisticsWidget(QWidget):
     """Widget hiển thị thống kê"""
+    refreshRequested = pyqtSignal()  # Nút "Cập nhật"; bên sở hữu truy vấn rồi gọi show_stats()
     
-    def __init__(self, session_manager: SessionManager):
+    def __init__(self, session_manager: SessionManager, auto_refresh: bool = True):
         super().__init__()
         self.session_manager = session_manager
         self.setup_ui()
-        self.refresh_stats()
+        # auto_refresh=False: dữ liệu được truy vấn nền và đưa vào qua show_stats()
+        if auto_refresh:
+            self.refreshRequested.connect(self.refresh_stats)
+            self.refresh_stats()
     
     def setup_ui(self):
         """Thiết lập giao diện"""
@@ -81,90 +85,149 @@ class StatisticsWidget(QWidget):
         # Tạo matplotlib figure
         self.figure = Figure(figsize=(10, 6))
         self.canvas = FigureCanvas(self.figure)
+        # Artist của biểu đồ, tạo ở lần vẽ đầu tiên (_build_chart)
+        self.bars = None
         chart_layout.addWidget(self.canvas)
         
         # Nút refresh
         refresh_btn = QPushButton("🔄 Cập nhật")
-        refresh_btn.clicked.connect(self.refresh_stats)
+        refresh_btn.clicked.connect(self.refreshRequested)
         chart_layout.addWidget(refresh_btn)
         
         layout.addWidget(chart_group)
         
+        # === ỨNG DỤNG TRONG PHIÊN ===
+        apps_group = QGroupBox("🖥️ Ứng dụng dùng nhiều nhất trong phiên")
+        apps_layout = QGridLayout(apps_group)
+        self.session_apps_label = QLabel("Chưa có dữ liệu")
+        self.today_apps_label = QLabel("Chưa có dữ liệu")
+        for label in (self.session_apps_label, self.today_apps_label):
+            label.setWordWrap(True)
+        apps_layout.addWidget(QLabel("Phiên gần nhất:"), 0, 0)
+        apps_layout.addWidget(self.session_apps_label, 0, 1)
+        apps_layout.addWidget(QLabel("Hôm nay:"), 1, 0)
+        apps_layout.addWidget(self.today_apps_label, 1, 1)
+        
+        layout.addWidget(apps_group)
+        
         # Spacer
         layout.addStretch()
     
     def refresh_stats(self):
-        """Cập nhật thống kê"""
+        """Cập nhật thống kê (truy vấn ngay trên thread gọi)"""
+        self.show_stats(self.session_manager.get_today_stats(), self.session_manager.get_week_stats(),
+                        self.session_manager.get_app_usage_summary())
+    
+    def show_stats(self, today_stats, week_stats, app_usage=None):
+        """Hiển thị thống kê đã truy vấn sẵn"""
+        if app_usage is not None:
+            self.show_app_usage(app_usage)
+        
         # Cập nhật thống kê hôm nay
-        today_stats = self.session_manager.get_today_stats()
         self.today_time_label.setText(f"{today_stats['total_focus_time']}")
         self.today_sessions_label.setText(str(today_stats['sessions_completed']))
         self.today_success_label.setText(f"{today_stats['success_rate']:.1f}")
         
         # Cập nhật thống kê tuần
-        week_stats = self.session_manager.get_week_stats()
         week_total = sum(day['total_focus_time'] for day in week_stats)
         self.week_time_label.setText(str(week_total))
         
         # Cập nhật biểu đồ
         self.update_chart(week_stats)
     
+    @staticmethod
+    def _format_apps(apps) -> str:
+        if not apps:
+            return "Chưa có dữ liệu"
+        return ", ".join(f"{app['app']} ({app['cpu_seconds'] / 60:.1f} phút CPU)" for app in apps)
+    
+    def show_app_usage(self, app_usage):
+        """Hiển thị các ứng dụng dùng nhiều CPU nhất (theo phiên và theo ngày)"""
+        session_text = self._format_apps(app_usage['session'])
+        if app_usage['session_id'] is not None:
+            session_text = f"#{app_usage['session_id']}: {session_text}"
+        self.session_apps_label.setText(session_text)
+        self.today_apps_label.setText(self._format_apps(app_usage['today']))
+    
     def update_chart(self, week_stats):
         """Cập nhật biểu đồ"""
+        with CHART_RENDER_SECONDS.time():
+            self._draw_chart(week_stats)
+    
+    def _build_chart(self, days: int):
+        """Tạo các artist của biểu đồ một lần; các lần cập nhật sau chỉ đổi dữ liệu"""
         self.figure.clear()
         
-        # Tạo subplot
-        ax = self.figure.add_subplot(111)
-        
-        # Dữ liệu cho biểu đồ
-        dates = []
-        times = []
-        sessions = []
-        
-        for day in week_stats:
-            date = datetime.fromisoformat(day['date']).date()
-            dates.append(date)
-            times.append(day['total_focus_time'])
-            sessions.append(day['sessions_completed'])
+        # Tạo subplot và trục y thứ hai cho số phiên
+        self.ax = self.figure.add_subplot(111)
+        self.ax2 = self.ax.twinx()
         
-        # Biểu đồ cột cho thời gian tập trung
-        bars = ax.bar(dates, times, alpha=0.7, color='#2196F3', label='Thời gian tập trung (phút)')
+        # Ngày giữ chỗ, vị trí thật được đặt trong _draw_chart
+        today = datetime.now().date()
+        placeholder = [today - timedelta(days=days - 1 - i) for i in range(days)]
+        self.bars = self.ax.bar(placeholder, [0] * days, alpha=0.7, color='#2196F3',
+                                label='Thời gian tập trung (phút)')
+        self.sessions_line, = self.ax2.plot(placeholder, [0] * days, color='#FF9800', marker='o',
+                                            linewidth=2, label='Số phiên hoàn thành')
         
-        # Tạo trục y thứ hai cho số phiên
-        ax2 = ax.twinx()
-        line = ax2.plot(dates, sessions, color='#FF9800', marker='o', linewidth=2, label='Số phiên hoàn thành')
+        # Giá trị trên các cột (ẩn khi bằng 0)
+        self.value_labels = [
+            self.ax.text(0, 0, '', ha='center', va='bottom', fontsize=9, visible=False)
+            for _ in range(days)
+        ]
         
         # Thiết lập labels và title
-        ax.set_xlabel('Ngày')
-        ax.set_ylabel('Thời gian (phút)', color='#2196F3')
-        ax2.set_ylabel('Số phiên', color='#FF9800')
-        ax.set_title('Thống kê tập trung 7 ngày gần nhất')
+        self.ax.set_xlabel('Ngày')
+        self.ax.set_ylabel('Thời gian (phút)', color='#2196F3')
+        self.ax2.set_ylabel('Số phiên', color='#FF9800')
+        self.ax.set_title('Thống kê tập trung 7 ngày gần nhất')
         
-        # Format trục x
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
-        ax.xaxis.set_major_locator(mdates.DayLocator())
-        
-        # Xoay labels trục x
-        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
+        # Format trục x, xoay labels
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
+        self.ax.xaxis.set_major_locator(mdates.DayLocator())
+        self.ax.tick_params(axis='x', labelrotation=45)
         
         # Thiết lập màu cho các trục
-        ax.tick_params(axis='y', labelcolor='#2196F3')
-        ax2.tick_params(axis='y', labelcolor='#FF9800')
+        self.ax.tick_params(axis='y', labelcolor='#2196F3')
+        self.ax2.tick_params(axis='y', labelcolor='#FF9800')
         
         # Grid
-        ax.grid(True, alpha=0.3)
+        self.ax.grid(True, alpha=0.3)
         
         # Legend
-        lines1, labels1 = ax.get_legend_handles_labels()
-        lines2, labels2 = ax2.get_legend_handles_labels()
-        ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-        
-        # Thêm giá trị lên các cột
-        for bar, time_val in zip(bars, times):
-            if time_val > 0:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                       f'{int(time_val)}', ha='center', va='bottom', fontsize=9)
+        lines1, labels1 = self.ax.get_legend_handles_labels()
+        lines2, labels2 = self.ax2.get_legend_handles_labels()
+        self.ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+    
+    def _draw_chart(self, week_stats):
+        """Vẽ biểu đồ thời gian tập trung và số phiên"""
+        # Dựng lại artist chỉ khi số ngày thay đổi (thường là 7 ngày, tạo một lần)
+        if self.bars is None or len(self.bars) != len(week_stats):
+            self._build_chart(len(week_stats))
+        
+        # Dữ liệu cho biểu đồ
+        dates = []
+        times = []
+        sessions = []
+        
+        for day in week_stats:
+            date = datetime.fromisoformat(day['date']).date()
+            dates.append(mdates.date2num(date))
+            times.append(day['total_focus_time'])
+            sessions.append(day['sessions_completed'])
+        
+        # Cập nhật cột, đường và nhãn giá trị tại chỗ
+        for bar, label, x, time_val in zip(self.bars, self.value_labels, dates, times):
+            bar.set_x(x - bar.get_width() / 2)
+            bar.set_height(time_val)
+            label.set_position((x, time_val + 1))
+            label.set_text(f'{int(time_val)}')
+            label.set_visible(time_val > 0)
+        self.sessions_line.set_data(dates, sessions)
+        
+        for axis in (self.ax, self.ax2):
+            axis.relim()
+            axis.autoscale_view()
         
         # Tight layout
         self.figure.tight_layout()
@@ -0,0 +1,178 @@
+"""
+Lớp tác vụ nền cho giao diện trên QThreadPool
+Đưa các thao tác chặn (sudo, file hosts, SQLite, bcrypt) ra khỏi luồng giao diện;
+kết quả trả về qua signal Qt, hỗ trợ hủy và đảm bảo thứ tự theo từng tài nguyên
+"""
+
+import logging
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Set
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Thêm thư mục src vào path
+current_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(current_dir))
+
+logger = logging.getLogger(__name__)
+
+class TaskFuture(QObject):
+    """Kết quả của một tác vụ nền; các signal luôn phát trên luồng giao diện"""
+    finished = pyqtSignal(object)  # Kết quả
+    failed = pyqtSignal(object)  # Ngoại lệ
+    cancelled = pyqtSignal()
+    done = pyqtSignal()  # Phát sau cùng, dù thành công, lỗi hay bị hủy
+    _completed = pyqtSignal(object, object)  # (kết quả, ngoại lệ) từ worker thread
+    
+    def __init__(self, name: str, parent: QObject = None):
+        super().__init__(parent)
+        self.name = name
+        self._cancel_requested = False
+        self._done = False
+        self._result = None
+        self._error: Optional[BaseException] = None
+        
+        # Worker phát từ thread khác nên signal được xếp hàng về luồng của future
+        self._completed.connect(self._on_completed)
+    
+    def cancel(self) -> bool:
+        """Hủy tác vụ: chưa chạy thì bỏ qua hẳn, đang chạy thì bỏ kết quả; False nếu đã xong"""
+        if self._done:
+            return False
+        self._cancel_requested = True
+        return True
+    
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested
+    
+    def is_done(self) -> bool:
+        return self._done
+    
+    def result(self) -> Any:
+        return self._result
+    
+    def exception(self) -> Optional[BaseException]:
+        return self._error
+    
+    def _on_completed(self, result: Any, error: Optional[BaseException]):
+        self._done = True
+        self._result = result
+        self._error = error
+        
+        if self._cancel_requested:
+            self.cancelled.emit()
+        elif error is not None:
+            self.failed.emit(error)
+        else:
+            self.finished.emit(result)
+        self.done.emit()
+
+class _Task(QRunnable):
+    """QRunnable chạy một hàm và báo kết quả cho future"""
+    
+    def __init__(self, runner: "TaskRunner", future: TaskFuture, func: Callable, args: tuple,
+                 resource: Optional[str]):
+        super().__init__()
+        self.runner = runner
+        self.future = future
+        self.func = func
+        self.args = args
+        self.resource = resource
+    
+    def run(self):
+        result, error = None, None
+        if not self.future.is_cancelled():
+            try:
+                result = self.func(*self.args)
+            except Exception as e:
+                error = e
+        
+        self.future._completed.emit(result, error)
+        self.runner._task_finished(self.resource)
+
+class TaskRunner(QObject):
+    """Chạy tác vụ trên QThreadPool riêng của ứng dụng"""
+    busyChanged = pyqtSignal(bool)  # Có/không còn tác vụ (được theo dõi) đang chờ
+    
+    def __init__(self, parent: QObject = None, max_threads: int = 4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        
+        self._lock = threading.Lock()
+        # Hàng đợi theo tài nguyên: mỗi tài nguyên chỉ chạy một tác vụ tại một thời điểm, theo thứ tự submit
+        self._queues: Dict[str, Deque[_Task]] = {}
+        self._futures: Set[TaskFuture] = set()
+        self._busy_count = 0
+    
+    def submit(self, func: Callable, *args, resource: Optional[str] = None,
+               on_result: Callable[[Any], None] = None, on_error: Callable[[Exception], None] = None,
+               track_busy: bool = True) -> TaskFuture:
+        """Chạy func(*args) trên thread pool
+        
+        resource: các tác vụ cùng tài nguyên chạy tuần tự (ví dụ mọi thao tác ghi file hosts).
+        track_busy: False cho tác vụ định kỳ không nên bật chỉ báo bận.
+        """
+        future = TaskFuture(getattr(func, "__name__", "task"), self)
+        if on_result is not None:
+            future.finished.connect(on_result)
+        future.failed.connect(on_error if on_error is not None else self._report_error)
+        future.done.connect(lambda: self._on_done(future, track_busy))
+        self._futures.add(future)
+        
+        if track_busy:
+            self._busy_count += 1
+            if self._busy_count == 1:
+                self.busyChanged.emit(True)
+        
+        task = _Task(self, future, func, args, resource)
+        if resource is None:
+            self.pool.start(task)
+            return future
+        
+        with self._lock:
+            queue = self._queues.setdefault(resource, deque())
+            queue.append(task)
+            start_now = len(queue) == 1
+        if start_now:
+            self.pool.start(task)
+        return future
+    
+    def _task_finished(self, resource: Optional[str]):
+        """Gọi từ worker thread: chạy tác vụ kế tiếp của cùng tài nguyên"""
+        if resource is None:
+            return
+        
+        with self._lock:
+            queue = self._queues[resource]
+            queue.popleft()
+            next_task = queue[0] if queue else None
+            if not queue:
+                del self._queues[resource]
+        if next_task is not None:
+            self.pool.start(next_task)
+    
+    def _on_done(self, future: TaskFuture, track_busy: bool):
+        self._futures.discard(future)
+        if track_busy:
+            self._busy_count -= 1
+            if self._busy_count == 0:
+                self.busyChanged.emit(False)
+    
+    def _report_error(self, error: Exception):
+        logger.error("Lỗi tác vụ nền: %s", error)
+    
+    def is_busy(self) -> bool:
+        """Còn tác vụ được theo dõi đang chờ không"""
+        return self._busy_count > 0
+    
+    def cancel_all(self):
+        """Hủy mọi tác vụ chưa hoàn tất"""
+        for future in list(self._futures):
+            future.cancel()
+    
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Chờ các tác vụ đang chạy kết thúc (dùng khi thoát)"""
+        return self.pool.waitForDone(msecs)
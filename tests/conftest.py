@@ -0,0 +1,44 @@
+"""
+Fixture dùng chung: HOME tạm, hosts file tạm (không sudo) và đồng hồ ảo
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.core.clock import SimulatedClock
+
+BASE_HOSTS = "127.0.0.1\tlocalhost\n::1\tip6-localhost\n"
+# Giữa ngày (giờ địa phương): các test không vô tình qua nửa đêm
+START = datetime(2024, 3, 4, 12, 0).timestamp()
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """HOME tạm: cấu hình, database và mật khẩu không đụng tới máy thật"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def clock():
+    return SimulatedClock(START)
+
+@pytest.fixture
+def hosts_path(home):
+    path = home / "hosts"
+    path.write_text(BASE_HOSTS)
+    return path
+
+@pytest.fixture
+def engine(home, clock, hosts_path):
+    """FocusEngine thật trên hosts file tạm và đồng hồ ảo"""
+    from src.core.config_manager import ConfigManager
+    from src.core.focus_engine import FocusEngine
+    from src.core.session_manager import SessionManager
+    from src.core.website_blocker import WebsiteBlocker
+    
+    config_manager = ConfigManager()
+    blocker = WebsiteBlocker(home / "hosts.backup", hosts_path, use_sudo=False)
+    session_manager = SessionManager(config_manager.get_data_dir(), clock)
+    engine = FocusEngine(config_manager, None, session_manager, blocker, clock)
+    yield engine
+    engine.shutdown()
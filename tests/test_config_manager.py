@@ -0,0 +1,104 @@
+"""
+ConfigManager: đọc lại file bị sửa từ bên ngoài và báo cho mọi listener
+"""
+
+import json
+import threading
+
+import pytest
+
+from src.core.config_manager import ConfigManager
+
+@pytest.fixture
+def config_manager(home):
+    return ConfigManager(save_delay=0)
+
+def edit_file(config_manager, **values):
+    """Sửa config.json như một process khác (CLI, policy)"""
+    data = json.loads(config_manager.config_file.read_text())
+    data.update(values)
+    config_manager.config_file.write_text(json.dumps(data))
+
+def test_every_listener_gets_external_change(config_manager):
+    first, second = [], []
+    config_manager.add_listener(first.append)
+    config_manager.add_listener(second.append)
+    
+    edit_file(config_manager, strict_mode=True)
+    assert config_manager.reload_if_changed() == {"strict_mode"}
+    assert config_manager.reload_if_changed() == set()
+    assert first == second == [{"strict_mode"}]
+    assert config_manager.is_strict_mode()
+
+def test_removed_listener_is_not_called(config_manager):
+    calls = []
+    config_manager.add_listener(calls.append)
+    config_manager.remove_listener(calls.append)
+    
+    edit_file(config_manager, strict_mode=True)
+    config_manager.reload_if_changed()
+    assert calls == []
+
+def test_failing_listener_does_not_stop_others(config_manager):
+    calls = []
+    
+    def broken(changed):
+        raise RuntimeError("listener lỗi")
+    
+    config_manager.add_listener(broken)
+    config_manager.add_listener(calls.append)
+    edit_file(config_manager, default_focus_duration=40)
+    assert config_manager.reload_if_changed() == {"default_focus_duration"}
+    assert calls == [{"default_focus_duration"}]
+
+def test_watcher_thread_delivers_changes(config_manager):
+    received = threading.Event()
+    changes = []
+    
+    def listener(changed):
+        changes.append(changed)
+        received.set()
+    
+    config_manager.add_listener(listener)
+    config_manager.start_watching(interval=0.01)
+    try:
+        edit_file(config_manager, strict_mode=True)
+        assert received.wait(5)
+    finally:
+        config_manager.stop_watching()
+    assert changes == [{"strict_mode"}]
+
+def test_own_changes_are_not_reported(config_manager):
+    calls = []
+    config_manager.add_listener(calls.append)
+    config_manager.set("strict_mode", True)
+    assert config_manager.reload_if_changed() == set()
+    assert calls == []
+
+def test_set_validates_the_changed_key(config_manager):
+    from src.core.config_model import ConfigError
+    
+    config_manager.set("default_focus_duration", 40)
+    assert config_manager.get_focus_duration() == 40
+    with pytest.raises(ConfigError):
+        config_manager.set("default_focus_duration", 0)
+    assert config_manager.get_focus_duration() == 40
+    assert config_manager.config["default_focus_duration"] == 40
+
+def test_set_section_keeps_nested_defaults(config_manager):
+    config_manager.set("window_position", {"x": 5})
+    assert config_manager.settings.window_position.y == 100
+    assert config_manager.config["window_position"] == {"x": 5, "y": 100}
+
+def test_set_unknown_key_is_kept(config_manager):
+    config_manager.set("plugin", {"enabled": True})
+    assert config_manager.config["plugin"] == {"enabled": True}
+    assert json.loads(config_manager.config_file.read_text())["plugin"] == {"enabled": True}
+
+def test_config_is_read_only(config_manager):
+    config = config_manager.config
+    with pytest.raises(TypeError):
+        config["strict_mode"] = True
+    config_manager.set("strict_mode", True)
+    assert config["strict_mode"] is False
+    assert config_manager.config["strict_mode"] is True
@@ -0,0 +1,54 @@
+"""
+HostsRegionCache: giữ khối của các hồ sơ, giới hạn khối của danh sách ghép tạm thời, không ghi đĩa
+"""
+
+import pytest
+
+from src.core.hosts_regions import HostsRegionCache
+from src.core.website_blocker import WebsiteBlocker
+
+@pytest.fixture
+def blocker(home, hosts_path):
+    return WebsiteBlocker(home / "hosts.backup", hosts_path, use_sudo=False)
+
+@pytest.fixture
+def cache(home, blocker):
+    return HostsRegionCache(home / "hosts_regions", blocker, adhoc_limit=2)
+
+def sites(prefix, count=3):
+    return [f"{prefix}{index}.example.com" for index in range(count)]
+
+def test_region_matches_blocker(cache, blocker):
+    websites = sites("a")
+    assert cache.get(websites) == blocker.build_region(websites)
+
+def test_prepared_regions_are_kept(cache, blocker, monkeypatch):
+    profiles = [sites("a"), sites("b")]
+    assert cache.prepare(profiles + [sites("a")]) == 2
+    
+    built = []
+    monkeypatch.setattr(blocker, "build_region", lambda websites: built.append(websites) or "")
+    for index in range(5):
+        cache.get(sites(f"tmp{index}"))
+    cache.get(profiles[0])
+    cache.get(profiles[1])
+    assert len(built) == 5
+
+def test_adhoc_regions_are_bounded(cache):
+    for index in range(6):
+        cache.get(sites(f"tmp{index}"))
+    assert len(cache._adhoc) == 2
+    
+    # Lần prepare sau thay bộ hồ sơ cũ
+    cache.prepare([sites("a")])
+    cache.prepare([sites("b")])
+    assert len(cache._prepared) == 1
+
+def test_nothing_written_and_legacy_copies_removed(cache, home):
+    legacy = home / "hosts_regions"
+    legacy.mkdir()
+    (legacy / "0123abcd.hosts").write_text("0.0.0.0 evil.example.com\n")
+    
+    cache.prepare([sites("a")])
+    cache.get(sites("b"))
+    assert not legacy.exists()
@@ -0,0 +1,32 @@
+"""
+kdf: tham số đọc từ hash đã lưu bị giới hạn trước khi dẫn xuất khóa
+"""
+
+import pytest
+
+from src.core import kdf
+
+def test_pbkdf2_round_trip():
+    stored = kdf.hash_password("secret", "pbkdf2_sha256", {"i": 1000})
+    assert kdf.verify_password("secret", stored)
+    assert not kdf.verify_password("wrong", stored)
+
+@pytest.mark.parametrize("iterations", [0, -1, kdf.Pbkdf2Kdf.max_iterations + 1])
+def test_pbkdf2_rejects_iterations_outside_limit(iterations):
+    stored = kdf.hash_password("secret", "pbkdf2_sha256", {"i": 1000})
+    tampered = stored.replace("i=1000", f"i={iterations}")
+    with pytest.raises(ValueError):
+        kdf.verify_password("secret", tampered)
+
+def test_scrypt_rejects_oversized_n():
+    if not kdf.BACKENDS["scrypt"].is_available():
+        pytest.skip("scrypt không có sẵn")
+    stored = kdf.encode_hash("scrypt", {"n": 2 ** 30, "r": 8, "p": 1}, "c2FsdA$ZGlnZXN0")
+    with pytest.raises(ValueError):
+        kdf.verify_password("secret", stored)
+
+def test_bcrypt_rejects_cost_above_limit():
+    pytest.importorskip("bcrypt")
+    stored = "$2b$31$" + "a" * 53
+    with pytest.raises(ValueError):
+        kdf.verify_password("secret", stored)
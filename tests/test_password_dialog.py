@@ -0,0 +1,81 @@
+"""
+PasswordDialog: đóng dialog trong lúc đang xác thực không chặn luồng giao diện
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5.QtWidgets")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEvent
+from PyQt5.QtWidgets import QApplication
+
+from src.core.clock import SYSTEM_CLOCK
+from src.gui.password_dialog import PasswordDialog, PasswordVerifyWorker
+
+class SlowPasswordManager:
+    """Giả lập KDF chậm: verify_password chờ tới khi test cho phép"""
+    clock = SYSTEM_CLOCK
+    
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+    
+    def verify_password(self, password):
+        self.calls += 1
+        self.release.wait(10)
+        return True
+    
+    def get_lockout_until(self):
+        return 0
+    
+    def get_remaining_attempts(self):
+        return 5
+    
+    def is_locked_out(self):
+        return False
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+def process_until(app, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+        time.sleep(0.01)
+    return condition()
+
+def test_reject_during_verify_does_not_wait(app):
+    manager = SlowPasswordManager()
+    dialog = PasswordDialog(manager, "Test")
+    dialog.password_input.setText("secret")
+    dialog.verify_password()
+    worker = dialog.verify_worker
+    assert process_until(app, lambda: manager.calls == 1)
+    
+    start = time.monotonic()
+    dialog.reject()
+    assert time.monotonic() - start < 0.5
+    assert dialog.verify_worker is None
+    assert worker in PasswordVerifyWorker._detached
+    
+    dialog.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    manager.release.set()
+    # Worker chạy xong thì tự giải phóng, kết quả không tới dialog đã đóng
+    assert process_until(app, lambda: not PasswordVerifyWorker._detached)
+
+def test_verified_password_accepts(app):
+    manager = SlowPasswordManager()
+    manager.release.set()
+    dialog = PasswordDialog(manager, "Test")
+    dialog.password_input.setText("secret")
+    dialog.verify_password()
+    assert process_until(app, lambda: dialog.result() == PasswordDialog.Accepted)
+    dialog.deleteLater()
@@ -0,0 +1,162 @@
+"""
+ProcessBlocker ở chế độ quét /proc: kill/tạm dừng tiến trình có tên bị chặn, SIGCONT khi stop()
+"""
+
+import functools
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.core import focus_engine
+from src.core.process_blocker import ProcessBlocker
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="cần /proc của Linux")
+
+NAME = "focusguard-distractor"
+TIMEOUT = 5.0
+
+@pytest.fixture
+def distractor(tmp_path):
+    """Chạy bản sao của sleep mang tên bị chặn; dọn tiến trình khi test xong"""
+    sleep = shutil.which("sleep")
+    if sleep is None:
+        pytest.skip("không có lệnh sleep")
+    path = tmp_path / NAME
+    shutil.copy(sleep, path)
+    processes = []
+    
+    def spawn():
+        process = subprocess.Popen([str(path), "30"])
+        processes.append(process)
+        return process
+    
+    yield spawn
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+class HitRecorder:
+    """on_hit ghi lại các lần chặn (name, pid)"""
+    
+    def __init__(self):
+        self.hits = []
+        self.event = threading.Event()
+    
+    def __call__(self, name, pid):
+        self.hits.append((name, pid))
+        self.event.set()
+
+@pytest.fixture
+def recorder():
+    return HitRecorder()
+
+@pytest.fixture
+def blocker_factory(recorder):
+    """Tạo bộ chặn chế độ quét báo lần chặn cho recorder; luôn stop() khi test xong"""
+    blockers = []
+    
+    def create(action):
+        blocker = ProcessBlocker([NAME], action=action, on_hit=recorder, use_connector=False, scan_interval=0.05)
+        blockers.append(blocker)
+        return blocker
+    
+    yield create
+    for blocker in blockers:
+        blocker.stop()
+
+def process_state(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rpartition(")")[2].split()[0]
+
+def wait_for_state(pid, states):
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        if process_state(pid) in states:
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_kills_new_process(distractor, blocker_factory, recorder):
+    blocker = blocker_factory("kill")
+    blocker.start()
+    assert blocker.mode == "scan"
+    
+    process = distractor()
+    assert process.wait(timeout=TIMEOUT) == -signal.SIGKILL
+    assert recorder.event.wait(TIMEOUT)
+    assert recorder.hits == [(NAME, process.pid)]
+    assert blocker.hits[NAME] == 1
+
+def test_kills_running_process_on_start(distractor, blocker_factory):
+    process = distractor()
+    # Chờ exec xong để /proc mang tên của bản sao
+    deadline = time.monotonic() + TIMEOUT
+    while os.path.basename(os.readlink(f"/proc/{process.pid}/exe")) != NAME:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    
+    blocker = blocker_factory("kill")
+    blocker.start()
+    assert process.wait(timeout=TIMEOUT) == -signal.SIGKILL
+    assert blocker.hits[NAME] == 1
+
+def test_ignores_other_processes(blocker_factory):
+    other = subprocess.Popen([shutil.which("sleep"), "30"])
+    try:
+        blocker = blocker_factory("kill")
+        blocker.start()
+        time.sleep(0.2)
+        assert other.poll() is None
+        assert not blocker.hits
+    finally:
+        other.kill()
+        other.wait()
+
+def test_suspends_and_resumes_on_stop(distractor, blocker_factory, recorder):
+    blocker = blocker_factory("suspend")
+    blocker.start()
+    
+    process = distractor()
+    assert recorder.event.wait(TIMEOUT)
+    assert recorder.hits == [(NAME, process.pid)]
+    assert wait_for_state(process.pid, {"T", "t"})
+    assert process.poll() is None
+    
+    blocker.stop()
+    assert wait_for_state(process.pid, {"S", "R"})
+    assert blocker.mode is None
+    # Đã dừng: tiến trình mới không bị chặn nữa
+    other = distractor()
+    time.sleep(0.2)
+    assert other.poll() is None
+    assert recorder.hits == [(NAME, process.pid)]
+
+def test_engine_records_app_hits(engine, distractor, monkeypatch):
+    # Bộ chặn của engine quét /proc dày để test không phải chờ chu kỳ mặc định
+    monkeypatch.setattr(focus_engine, "ProcessBlocker",
+                        functools.partial(ProcessBlocker, use_connector=False, scan_interval=0.05))
+    engine.config_manager.set("blocked_apps", [NAME])
+    engine.config_manager.set("app_block_action", "kill")
+    engine.start_session(25, ["example.com"])
+    
+    process = distractor()
+    assert process.wait(timeout=TIMEOUT) == -signal.SIGKILL
+    engine.stop_session(authorized=True)
+    
+    # on_hit ghi database sau khi kill, trên thread của bộ chặn
+    deadline = time.monotonic() + TIMEOUT
+    while engine.session_manager.get_recent_sessions(1)[0]["app_hits"] == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert engine.session_manager.get_recent_sessions()[0]["app_hits"] == 1
+
+def test_rejects_unknown_action():
+    with pytest.raises(ValueError):
+        ProcessBlocker([NAME], action="ignore")
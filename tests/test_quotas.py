@@ -0,0 +1,78 @@
+"""
+Hạn mức theo website: mở/đóng, hết hạn mức và đặt lại sang ngày mới
+"""
+
+import pytest
+
+from src.core.engine_protocol import EngineError
+
+SITE = "news.example.com"
+
+@pytest.fixture
+def quotas(engine):
+    engine.config_manager.set("quotas", [{"website": SITE, "minutes": 10}])
+    engine.start_quotas()
+    return engine
+
+def blocked(engine):
+    return set(engine.website_blocker.get_blocked_websites_from_hosts())
+
+def quota(engine):
+    (entry,) = engine.status()["quotas"]
+    return entry
+
+def test_closed_site_is_blocked(quotas):
+    assert SITE in blocked(quotas)
+    assert quota(quotas) == {"website": SITE, "minutes": 10, "used_seconds": 0,
+                             "remaining_seconds": 600, "open": False}
+
+def test_open_and_close_counts_usage(quotas, clock):
+    quotas.open_site(SITE)
+    assert SITE not in blocked(quotas)
+    assert quota(quotas)["open"]
+    
+    clock.advance(240)
+    assert quota(quotas)["used_seconds"] == 240
+    quotas.close_site(SITE)
+    assert SITE in blocked(quotas)
+    assert quota(quotas)["used_seconds"] == 240
+    assert quota(quotas)["remaining_seconds"] == 360
+    
+    # Đóng website đã chặn: không đổi gì
+    quotas.close_site(SITE)
+    assert quota(quotas)["used_seconds"] == 240
+
+def test_exhausted_quota_blocks_site(quotas, clock):
+    quotas.open_site(SITE)
+    clock.advance(601)
+    quotas._scheduler.run_due()
+    
+    assert SITE in blocked(quotas)
+    entry = quota(quotas)
+    assert not entry["open"]
+    assert entry["used_seconds"] == 600
+    assert entry["remaining_seconds"] == 0
+    with pytest.raises(EngineError) as error:
+        quotas.open_site(SITE)
+    assert error.value.code == "quota_exhausted"
+
+def test_quota_resets_next_day(quotas, clock):
+    quotas.open_site(SITE)
+    clock.advance(600)
+    quotas._scheduler.run_due()
+    
+    clock.advance(24 * 3600)
+    quotas.open_site(SITE)
+    assert SITE not in blocked(quotas)
+    assert quota(quotas)["used_seconds"] == 0
+
+def test_site_without_quota(quotas):
+    with pytest.raises(EngineError) as error:
+        quotas.open_site("other.example.com")
+    assert error.value.code == "no_quota"
+
+def test_site_blocked_by_session(quotas):
+    quotas.start_session(25, [SITE])
+    with pytest.raises(EngineError) as error:
+        quotas.open_site(SITE)
+    assert error.value.code == "site_blocked"
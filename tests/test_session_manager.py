@@ -0,0 +1,47 @@
+"""
+SessionManager: lịch sử phiên gần nhất kèm số lần chặn
+"""
+
+import sqlite3
+
+import pytest
+
+from src.core.session_manager import SessionManager
+
+@pytest.fixture
+def session_manager(tmp_path, clock):
+    return SessionManager(tmp_path, clock)
+
+def run_session(session_manager, clock, minutes=25):
+    session_id = session_manager.start_session(minutes, ["a.example.com"])
+    clock.advance(minutes * 60)
+    session_manager.end_session(session_id, completed=True)
+    clock.advance(300)
+    return session_id
+
+def test_recent_sessions_newest_first_with_hits(session_manager, clock):
+    ids = [run_session(session_manager, clock) for _ in range(5)]
+    session_manager.record_app_hit(ids[-1], "steam")
+    session_manager.record_app_hit(ids[-1], "steam")
+    session_manager.record_app_hit(ids[-1], "discord")
+    session_manager.record_block_hits(ids[-1], {"a.example.com": 4, "b.example.com": 1})
+    session_manager.record_block_hits(ids[0], {"a.example.com": 7})
+    
+    recent = session_manager.get_recent_sessions(3)
+    assert [session['id'] for session in recent] == ids[:-4:-1]
+    assert recent[0]['app_hits'] == 3
+    assert recent[0]['blocked_attempts'] == 5
+    assert recent[1]['app_hits'] == recent[1]['blocked_attempts'] == 0
+    assert session_manager.get_recent_sessions(10)[-1]['blocked_attempts'] == 7
+
+def test_unfinished_session_not_in_history(session_manager, clock):
+    finished = run_session(session_manager, clock)
+    session_manager.start_session(25, ["a.example.com"])
+    assert [session['id'] for session in session_manager.get_recent_sessions()] == [finished]
+
+def test_history_uses_start_time_index(session_manager):
+    with sqlite3.connect(session_manager.db_path) as conn:
+        plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM sessions WHERE end_time IS NOT NULL ORDER BY start_time DESC LIMIT 10"
+        ))
+    assert "idx_sessions_start_time" in plan
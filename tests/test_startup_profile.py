@@ -0,0 +1,43 @@
+"""
+Ngân sách khởi động: chạy main.py --profile-startup không cần display (QT_QPA_PLATFORM=offscreen)
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PyQt5.QtWidgets")
+
+from src.core.profiler import EXIT_OVER_BUDGET
+
+MAIN = Path(__file__).resolve().parent.parent / "main.py"
+TIMEOUT = 120
+
+@pytest.fixture
+def profile_env(home):
+    """HOME tạm đã có mật khẩu (chế độ đo không hiện hộp thoại thiết lập)"""
+    from src.core.password_manager import PasswordManager
+    
+    password_manager = PasswordManager()
+    password_manager.target_verify_ms = 2
+    password_manager.set_password("focusguard-startup")
+    env = dict(os.environ, HOME=str(home), QT_QPA_PLATFORM="offscreen")
+    env.pop("DISPLAY", None)
+    return env
+
+def run_profile(env, budget_ms):
+    return subprocess.run([sys.executable, str(MAIN), "--profile-startup", "--startup-budget-ms", str(budget_ms)],
+                          env=env, capture_output=True, text=True, timeout=TIMEOUT)
+
+def test_within_budget(profile_env):
+    result = run_profile(profile_env, 60000)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "first_paint" in result.stdout
+
+def test_over_budget(profile_env):
+    result = run_profile(profile_env, 1)
+    assert result.returncode == EXIT_OVER_BUDGET, result.stdout + result.stderr
+    assert "Vượt ngân sách khởi động" in result.stdout
@@ -0,0 +1,129 @@
+"""
+Danh sách chặn theo dõi: tải có điều kiện từ http.server trên 127.0.0.1 và lưu phần thay đổi
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.config_model import Subscription
+from src.core.session_manager import SessionManager
+from src.core.subscriptions import SubscriptionUpdater, fetch_blocklist, parse_line
+
+LAST_MODIFIED = "Mon, 04 Mar 2024 10:00:00 GMT"
+
+class BlocklistHandler(BaseHTTPRequestHandler):
+    """Trả nội dung hiện tại của server; 304 khi If-None-Match khớp ETag"""
+    
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        if server.etag and self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = server.body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        if server.etag:
+            self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), BlocklistHandler)
+    httpd.body, httpd.etag, httpd.status, httpd.requests = "", None, 200, []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/list.txt"
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+@pytest.fixture
+def session_manager(tmp_path, clock):
+    return SessionManager(tmp_path, clock)
+
+@pytest.fixture
+def updater(session_manager, clock):
+    return SubscriptionUpdater(session_manager, clock)
+
+def test_parse_line_formats():
+    assert list(parse_line("0.0.0.0 a.example.com b.example.com # ads")) == ["a.example.com", "b.example.com"]
+    assert list(parse_line("||tracker.example.net^")) == ["tracker.example.net"]
+    assert list(parse_line("Plain.Example.org.")) == ["plain.example.org"]
+    assert list(parse_line("10.0.0.1 intranet.example.com")) == []
+    assert list(parse_line("0.0.0.0 localhost")) == []
+    assert list(parse_line("! comment")) == []
+
+def test_fetch_then_not_modified(server):
+    server.body = "0.0.0.0 a.example.com\n0.0.0.0 b.example.com\n"
+    server.etag = '"v1"'
+    
+    domains, etag, last_modified = fetch_blocklist(server.url, timeout=5)
+    assert domains == {"a.example.com", "b.example.com"}
+    assert etag == '"v1"'
+    assert last_modified == LAST_MODIFIED
+    
+    assert fetch_blocklist(server.url, etag, last_modified, timeout=5) is None
+    headers = server.requests[-1]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+
+def test_refresh_stores_delta(server, updater, session_manager, clock):
+    server.body = "a.example.com\nb.example.com\n"
+    server.etag = '"v1"'
+    assert updater.refresh(server.url) == ({"a.example.com", "b.example.com"}, set())
+    assert session_manager.get_subscription_domains(server.url) == {"a.example.com", "b.example.com"}
+    assert session_manager.get_subscription(server.url)["etag"] == '"v1"'
+    
+    server.body = "b.example.com\nc.example.com\n"
+    server.etag = '"v2"'
+    clock.advance(3600)
+    assert updater.refresh(server.url) == ({"c.example.com"}, {"a.example.com"})
+    assert session_manager.get_subscription_domains(server.url) == {"b.example.com", "c.example.com"}
+    
+    # Không đổi: máy chủ trả 304 cho ETag đã lưu, tập đã lưu giữ nguyên
+    clock.advance(3600)
+    assert updater.refresh(server.url) == (set(), set())
+    assert server.requests[-1]["If-None-Match"] == '"v2"'
+    state = session_manager.get_subscription(server.url)
+    assert state["etag"] == '"v2"'
+    assert state["checked_at"] == clock.now()
+    assert session_manager.get_subscription_domains(server.url) == {"b.example.com", "c.example.com"}
+
+def test_empty_response_keeps_stored_domains(server, updater, session_manager):
+    server.body = "a.example.com\n"
+    assert updater.refresh(server.url) == ({"a.example.com"}, set())
+    
+    server.body = "<html>maintenance</html>\n"
+    assert updater.refresh(server.url) is None
+    assert session_manager.get_subscription_domains(server.url) == {"a.example.com"}
+
+def test_fetch_error_keeps_stored_domains(server, updater, session_manager):
+    server.body = "a.example.com\n"
+    assert updater.refresh(server.url) is not None
+    
+    server.status = 500
+    assert updater.refresh(server.url) is None
+    assert session_manager.get_subscription_domains(server.url) == {"a.example.com"}
+
+def test_is_due(server, updater, clock):
+    subscription = Subscription(url=server.url, refresh_hours=24)
+    assert updater.is_due(subscription, clock.time())
+    
+    server.body = "a.example.com\n"
+    updater.refresh(server.url)
+    assert not updater.is_due(subscription, clock.time() + 23 * 3600)
+    assert updater.is_due(subscription, clock.time() + 24 * 3600)
@@ -0,0 +1,61 @@
+"""
+StallWatchdog: lần treo của luồng chính được ghi nhận (và ghi stalls.log) trên thread giám sát
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.core.watchdog import StallWatchdog
+
+@pytest.fixture
+def watchdog(tmp_path):
+    watchdog = StallWatchdog(threshold_ms=50, interval_ms=10, log_path=tmp_path / "stalls.log")
+    yield watchdog
+    watchdog.stop()
+
+def stall(watchdog, seconds):
+    """Luồng chính không gửi nhịp trong `seconds` giây"""
+    watchdog.beat()
+    time.sleep(seconds)
+    watchdog.beat()
+
+def test_stall_recorded_off_main_thread(watchdog, monkeypatch):
+    writers = []
+    write_log = watchdog._write_log
+    monkeypatch.setattr(watchdog, "_write_log", lambda text: (writers.append(threading.current_thread()),
+                                                             write_log(text)))
+    watchdog.start()
+    stall(watchdog, 0.3)
+    # Nhịp tim không ghi nhận gì trên luồng chính
+    assert writers == []
+    
+    deadline = time.monotonic() + 5
+    while not watchdog.total_stalls() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert watchdog.total_stalls() == 1
+    assert writers and threading.main_thread() not in writers
+    assert watchdog.max_stall_ms >= 200
+    text = watchdog.log_path.read_text()
+    assert "Giao diện bị treo" in text
+    assert "test_watchdog.py" in text
+
+def test_pending_stall_recorded_on_stop(watchdog):
+    watchdog.start()
+    watchdog.beat()
+    time.sleep(0.3)
+    watchdog._stop_event.set()
+    watchdog._thread.join()
+    watchdog.beat()
+    watchdog.stop()
+    assert watchdog.total_stalls() == 1
+
+def test_no_stall_when_beating(watchdog):
+    watchdog.start()
+    for _ in range(20):
+        watchdog.beat()
+        time.sleep(0.005)
+    watchdog.stop()
+    assert watchdog.total_stalls() == 0
+    assert not watchdog.log_path.exists()